@@ -1,244 +1,474 @@
 import { NextResponse } from 'next/server';
-import { findUser, createUser, updateUser } from '@/lib/db';
-import { createToken, verifyToken } from '@/lib/token';
+import { findUser, createUser, updateUser, getDBStats } from '@/lib/db';
+import { createToken, verifyToken, getVerifyCacheStats } from '@/lib/token';
 import * as diffieHellman from '@/lib/crypto/diffieHellman';
+import { takeKeyPair, getKeyPoolMetrics } from '@/lib/dhKeyPool';
+import { startRequest, renderMetrics } from '@/lib/metrics';
+import { getFeatureCatalog, catalogCacheControl, matchesETag } from '@/lib/featureCatalog';
+import { hashPassword, verifyPassword, getPasswordHashMetrics, DUMMY_PASSWORD_HASH } from '@/lib/passwordHash';
+import { admit, clientKey, getAdmissionMetrics } from '@/lib/admission';
+import { checkBodyHeaders, readJsonBody } from '@/lib/requestBody';
 
-// Simple password hashing (in production, use bcrypt)
-function hashPassword(password) {
-  return Buffer.from(password).toString('base64');
+const MAX_VERIFY_BATCH = 1000;
+const KB = 1024;
+
+// POST dispatch table, resolved before admission and before the body is
+// read. maxBody caps the JSON body in bytes; it is enforced while the body
+// streams in, so an oversized upload is cut off rather than buffered.
+// Known routes are also the metric labels; anything else is 'unknown'.
+const POST_HANDLERS = new Map([
+  ['register', { handler: handleRegister, maxBody: 8 * KB }],
+  ['login', { handler: handleLogin, maxBody: 8 * KB }],
+  ['verify', { handler: handleVerify, maxBody: 32 * KB }],
+  ['verify/batch', { handler: handleVerifyBatch, maxBody: MAX_VERIFY_BATCH * 4 * KB }],
+  ['payment', { handler: handlePayment, maxBody: 32 * KB }],
+  ['dh/generate', { handler: handleDhGenerate, maxBody: 1 * KB }],
+  ['dh/shared-secret', { handler: handleDhSharedSecret, maxBody: 16 * KB }]
+]);
+
+const GET_HANDLERS = new Map([
+  ['health', handleHealth],
+  ['metrics', handleMetrics],
+  ['dh/pool', handleDhPool],
+  ['features', handleFeatures]
+]);
+
+// Body errors from lib/requestBody.js
+const BODY_ERROR_STATUS = {
+  UNSUPPORTED_MEDIA_TYPE: 415,
+  BODY_TOO_LARGE: 413,
+  INVALID_JSON: 400
+};
+
+// Shed requests (admission control, full password hash queue) get a
+// Retry-After so well-behaved clients back off
+function shed({ status = 503, error = 'Server busy, please retry', retryAfter = 1 } = {}) {
+  return NextResponse.json(
+    { error },
+    { status, headers: { 'Retry-After': String(retryAfter) } }
+  );
 }
 
-function verifyPassword(password, hash) {
-  return hashPassword(password) === hash;
+function bodyErrorResponse(error) {
+  return NextResponse.json(
+    { error: error.message },
+    { status: BODY_ERROR_STATUS[error.code] }
+  );
 }
 
 export async function POST(request, { params }) {
   const path = params?.path?.join('/') || '';
-  
+  const route = POST_HANDLERS.get(path);
+  const timer = startRequest('POST ' + (route ? path : 'unknown'));
+  if (!route) {
+    return timer.finish(NextResponse.json(
+      { error: 'Endpoint not found' },
+      { status: 404 }
+    ));
+  }
+  // Wrong content type or a declared length over the cap: refused on the
+  // headers alone, without taking an admission slot
+  const headerError = checkBodyHeaders(request, route.maxBody);
+  if (headerError) {
+    return timer.finish(bodyErrorResponse(headerError));
+  }
+  // Decided before the body is read, so a shed request costs almost nothing
+  const admission = await admit(path, clientKey(request));
+  if (!admission.admitted) {
+    return timer.finish(shed(admission));
+  }
+  try {
+    return timer.finish(await handlePost(request, route, timer));
+  } finally {
+    admission.release();
+  }
+}
+
+async function handlePost(request, { handler, maxBody }, timer) {
   try {
-    // Parse body only if content exists
-    let body = {};
-    const contentType = request.headers.get('content-type');
-    if (contentType && contentType.includes('application/json')) {
-      const text = await request.text();
-      if (text) {
-        body = JSON.parse(text);
-      }
+    const body = await timer.timeAsync('body_parse', () => readJsonBody(request, maxBody));
+    return await handler(body, timer);
+  } catch (error) {
+    if (BODY_ERROR_STATUS[error.code]) {
+      return bodyErrorResponse(error);
     }
-    
-    // Register endpoint
-    if (path === 'register') {
-      const { email, password, name } = body;
-      
-      if (!email || !password || !name) {
-        return NextResponse.json(
-          { error: 'Missing required fields' },
-          { status: 400 }
-        );
-      }
-      
-      const existingUser = findUser(email);
-      if (existingUser) {
-        return NextResponse.json(
-          { error: 'User already exists' },
-          { status: 400 }
-        );
-      }
-      
-      const user = createUser({
-        email,
-        password: hashPassword(password),
-        name,
-        subscription: 'free'
-      });
-      
-      const token = createToken({
-        userId: user.id,
-        email: user.email,
-        name: user.name,
-        subscription: user.subscription
-      });
-      
-      return NextResponse.json({
-        user: {
-          id: user.id,
-          email: user.email,
-          name: user.name,
-          subscription: user.subscription
-        },
-        token
-      });
+    if (error.code === 'PASSWORD_QUEUE_FULL') {
+      return shed();
     }
-    
-    // Login endpoint
-    if (path === 'login') {
-      const { email, password } = body;
-      
-      if (!email || !password) {
-        return NextResponse.json(
-          { error: 'Missing email or password' },
-          { status: 400 }
-        );
-      }
-      
-      const user = findUser(email);
-      if (!user || !verifyPassword(password, user.password)) {
-        return NextResponse.json(
-          { error: 'Invalid credentials' },
-          { status: 401 }
-        );
-      }
-      
-      const token = createToken({
-        userId: user.id,
-        email: user.email,
-        name: user.name,
-        subscription: user.subscription
-      });
-      
-      return NextResponse.json({
-        user: {
-          id: user.id,
-          email: user.email,
-          name: user.name,
-          subscription: user.subscription
-        },
-        token
-      });
+    console.error('API Error:', error);
+    return NextResponse.json(
+      { error: 'Internal server error: ' + error.message },
+      { status: 500 }
+    );
+  }
+}
+
+// Register endpoint
+async function handleRegister(body, timer) {
+  const { email, password, name } = body;
+  
+  if (!email || !password || !name) {
+    return NextResponse.json(
+      { error: 'Missing required fields' },
+      { status: 400 }
+    );
+  }
+  
+  const existingUser = await timer.timeAsync('db_lookup', () => findUser(email));
+  if (existingUser) {
+    return NextResponse.json(
+      { error: 'User already exists' },
+      { status: 400 }
+    );
+  }
+  
+  const passwordHash = await timer.timeAsync('password_hash', () => hashPassword(password));
+  let user;
+  try {
+    user = await timer.timeAsync('db_write', () => createUser({
+      email,
+      password: passwordHash,
+      name,
+      subscription: 'free'
+    }));
+  } catch (error) {
+    // A concurrent registration took the email while the password was hashing
+    if (error.code !== 'USER_EXISTS') throw error;
+    return NextResponse.json(
+      { error: 'User already exists' },
+      { status: 400 }
+    );
+  }
+  
+  const token = timer.time('token_create', () => createToken({
+    userId: user.id,
+    email: user.email,
+    name: user.name,
+    subscription: user.subscription
+  }));
+  
+  return NextResponse.json({
+    user: {
+      id: user.id,
+      email: user.email,
+      name: user.name,
+      subscription: user.subscription
+    },
+    token
+  });
+}
+
+// Login endpoint
+async function handleLogin(body, timer) {
+  const { email, password } = body;
+  
+  if (!email || !password) {
+    return NextResponse.json(
+      { error: 'Missing email or password' },
+      { status: 400 }
+    );
+  }
+  
+  const user = await timer.timeAsync('db_lookup', () => findUser(email));
+  // Unknown emails still pay for a KDF run, so response time doesn't reveal
+  // which accounts exist
+  const check = await timer.timeAsync('password_verify',
+    () => verifyPassword(password, user ? user.password : DUMMY_PASSWORD_HASH));
+  if (!user || !check.valid) {
+    return NextResponse.json(
+      { error: 'Invalid credentials' },
+      { status: 401 }
+    );
+  }
+  
+  // Upgrade legacy or outdated hashes in the background
+  if (check.needsRehash) {
+    hashPassword(password)
+      .then((passwordHash) => updateUser(email, { password: passwordHash }))
+      .catch((error) => console.error('Password rehash failed:', error));
+  }
+  
+  const token = timer.time('token_create', () => createToken({
+    userId: user.id,
+    email: user.email,
+    name: user.name,
+    subscription: user.subscription
+  }));
+  
+  return NextResponse.json({
+    user: {
+      id: user.id,
+      email: user.email,
+      name: user.name,
+      subscription: user.subscription
+    },
+    token
+  });
+}
+
+// Verify token endpoint
+async function handleVerify(body, timer) {
+  const { token } = body;
+  
+  if (!token) {
+    return NextResponse.json(
+      { error: 'Token required' },
+      { status: 400 }
+    );
+  }
+  
+  const result = timer.time('token_verify', () => verifyToken(token));
+  return NextResponse.json(result);
+}
+
+// Batch token verification: results in request order, each distinct
+// token decoded once per batch
+async function handleVerifyBatch(body, timer) {
+  const { tokens } = body;
+  
+  if (!Array.isArray(tokens)) {
+    return NextResponse.json(
+      { error: 'Tokens array required' },
+      { status: 400 }
+    );
+  }
+  
+  if (tokens.length > MAX_VERIFY_BATCH) {
+    return NextResponse.json(
+      { error: `Batch too large (max ${MAX_VERIFY_BATCH} tokens)` },
+      { status: 400 }
+    );
+  }
+  
+  const seen = new Map();
+  const results = tokens.map((token) => {
+    if (typeof token !== 'string' || !token) {
+      return { valid: false, error: 'Token required' };
     }
-    
-    // Verify token endpoint
-    if (path === 'verify') {
-      const { token } = body;
-      
-      if (!token) {
-        return NextResponse.json(
-          { error: 'Token required' },
-          { status: 400 }
-        );
-      }
-      
-      const result = verifyToken(token);
-      return NextResponse.json(result);
+    let result = seen.get(token);
+    if (!result) {
+      result = timer.time('token_verify', () => verifyToken(token));
+      seen.set(token, result);
     }
+    return result;
+  });
+  
+  return NextResponse.json({ results });
+}
+
+// Payment endpoint
+async function handlePayment(body, timer) {
+  const { token, tier, paymentMethod } = body;
+  
+  if (!token || !tier) {
+    return NextResponse.json(
+      { error: 'Token and tier required' },
+      { status: 400 }
+    );
+  }
+  
+  const verification = timer.time('token_verify', () => verifyToken(token));
+  if (!verification.valid) {
+    return NextResponse.json(
+      { error: 'Invalid token' },
+      { status: 401 }
+    );
+  }
+  
+  const { email } = verification.payload;
+  
+  // Handle payment method
+  if (paymentMethod === 'stripe') {
+    const stripeKey = process.env.STRIPE_SECRET_KEY;
     
-    // Payment endpoint
-    if (path === 'payment') {
-      const { token, tier, paymentMethod } = body;
-      
-      if (!token || !tier) {
-        return NextResponse.json(
-          { error: 'Token and tier required' },
-          { status: 400 }
-        );
-      }
-      
-      const verification = verifyToken(token);
-      if (!verification.valid) {
-        return NextResponse.json(
-          { error: 'Invalid token' },
-          { status: 401 }
-        );
-      }
-      
-      const { email } = verification.payload;
-      
-      // Handle payment method
-      if (paymentMethod === 'stripe') {
-        const stripeKey = process.env.STRIPE_SECRET_KEY;
-        
-        if (!stripeKey) {
-          return NextResponse.json(
-            { error: 'Stripe not configured. Please use demo payment.' },
-            { status: 400 }
-          );
-        }
-        
-        // Simulate Stripe payment
-        // In production, you would create a Stripe checkout session here
-        const paymentSuccessful = true; // Simulated
-        
-        if (paymentSuccessful) {
-          const updatedUser = updateUser(email, { subscription: tier });
-          
-          const newToken = createToken({
-            userId: updatedUser.id,
-            email: updatedUser.email,
-            name: updatedUser.name,
-            subscription: updatedUser.subscription
-          });
-          
-          return NextResponse.json({
-            success: true,
-            message: 'Payment processed via Stripe',
-            subscription: tier,
-            token: newToken
-          });
-        }
-      } else if (paymentMethod === 'demo') {
-        // Demo payment - automatically approve
-        const updatedUser = updateUser(email, { subscription: tier });
-        
-        const newToken = createToken({
-          userId: updatedUser.id,
-          email: updatedUser.email,
-          name: updatedUser.name,
-          subscription: updatedUser.subscription
-        });
-        
-        return NextResponse.json({
-          success: true,
-          message: 'Demo payment successful',
-          subscription: tier,
-          token: newToken
-        });
-      }
-      
+    if (!stripeKey) {
       return NextResponse.json(
-        { error: 'Invalid payment method' },
+        { error: 'Stripe not configured. Please use demo payment.' },
         { status: 400 }
       );
     }
     
-    // Diffie-Hellman key exchange endpoints
-    if (path === 'dh/generate') {
-      const keyPair = diffieHellman.generateKeyPair();
-      const params = diffieHellman.getPublicParameters();
+    // Simulate Stripe payment
+    // In production, you would create a Stripe checkout session here
+    const paymentSuccessful = true; // Simulated
+    
+    if (paymentSuccessful) {
+      const updatedUser = await timer.timeAsync('db_write', () => updateUser(email, { subscription: tier }));
+      
+      const newToken = timer.time('token_create', () => createToken({
+        userId: updatedUser.id,
+        email: updatedUser.email,
+        name: updatedUser.name,
+        subscription: updatedUser.subscription
+      }));
+      
       return NextResponse.json({
-        publicKey: keyPair.publicKey,
-        parameters: params
+        success: true,
+        message: 'Payment processed via Stripe',
+        subscription: tier,
+        token: newToken
       });
     }
+  } else if (paymentMethod === 'demo') {
+    // Demo payment - automatically approve
+    const updatedUser = await timer.timeAsync('db_write', () => updateUser(email, { subscription: tier }));
     
-    if (path === 'dh/shared-secret') {
-      const { privateKey, otherPublicKey } = body;
-      const sharedSecret = diffieHellman.computeSharedSecret(privateKey, otherPublicKey);
-      return NextResponse.json({ sharedSecret });
-    }
+    const newToken = timer.time('token_create', () => createToken({
+      userId: updatedUser.id,
+      email: updatedUser.email,
+      name: updatedUser.name,
+      subscription: updatedUser.subscription
+    }));
     
+    return NextResponse.json({
+      success: true,
+      message: 'Demo payment successful',
+      subscription: tier,
+      token: newToken
+    });
+  }
+  
+  return NextResponse.json(
+    { error: 'Invalid payment method' },
+    { status: 400 }
+  );
+}
+
+// Diffie-Hellman key exchange endpoints
+async function handleDhGenerate(body, timer) {
+  const group = body.group || diffieHellman.DEFAULT_GROUP;
+  if (!diffieHellman.getGroup(group)) {
     return NextResponse.json(
-      { error: 'Endpoint not found' },
-      { status: 404 }
+      { error: 'Unknown DH group' },
+      { status: 400 }
+    );
+  }
+  
+  // Pre-generated off the event loop by the key-pair pool
+  const keyPair = timer.time('dh_keypair', () => takeKeyPair(group));
+  const params = diffieHellman.getPublicParameters(group);
+  return NextResponse.json({
+    publicKey: keyPair.publicKey,
+    parameters: params
+  });
+}
+
+async function handleDhSharedSecret(body, timer) {
+  const { privateKey, otherPublicKey } = body;
+  if (privateKey === undefined || otherPublicKey === undefined) {
+    return NextResponse.json(
+      { error: 'privateKey and otherPublicKey required' },
+      { status: 400 }
+    );
+  }
+  
+  const group = body.group || diffieHellman.DEFAULT_GROUP;
+  if (!diffieHellman.getGroup(group)) {
+    return NextResponse.json(
+      { error: 'Unknown DH group' },
+      { status: 400 }
+    );
+  }
+  
+  let sharedSecret;
+  try {
+    sharedSecret = timer.time('dh_shared_secret', () =>
+      diffieHellman.computeSharedSecret(privateKey, otherPublicKey, group)
     );
-    
   } catch (error) {
-    console.error('API Error:', error);
+    if (error.code !== 'INVALID_DH_VALUE') throw error;
     return NextResponse.json(
-      { error: 'Internal server error: ' + error.message },
-      { status: 500 }
+      { error: error.message },
+      { status: 400 }
     );
   }
+  return NextResponse.json({ sharedSecret });
 }
 
 export async function GET(request, { params }) {
   const path = params?.path?.join('/') || '';
-  
-  if (path === 'health') {
-    return NextResponse.json({ status: 'ok' });
+  const handler = GET_HANDLERS.get(path);
+  const timer = startRequest('GET ' + (handler ? path : 'unknown'));
+  if (!handler) {
+    return timer.finish(NextResponse.json(
+      { error: 'Method not allowed' },
+      { status: 405 }
+    ));
+  }
+  return timer.finish(await handler(request));
+}
+
+function handleHealth() {
+  return NextResponse.json({ status: 'ok' });
+}
+
+// Feature catalogue: pre-serialized per tier, 304 when the ETag matches
+function handleFeatures(request) {
+  const { searchParams } = new URL(request.url);
+  const catalog = getFeatureCatalog(searchParams.get('tier'));
+  const headers = {
+    'ETag': catalog.etag,
+    'Cache-Control': catalogCacheControl(searchParams.get('v'))
+  };
+  if (matchesETag(request.headers.get('if-none-match'), catalog.etag)) {
+    return new NextResponse(null, { status: 304, headers });
   }
+  return new NextResponse(catalog.body, {
+    headers: { ...headers, 'Content-Type': 'application/json' }
+  });
+}
+
+function handleDhPool() {
+  return NextResponse.json(getKeyPoolMetrics());
+}
+
+async function handleMetrics() {
+  return new NextResponse(renderMetrics(await collectScrapeMetrics()), {
+    headers: { 'Content-Type': 'text/plain; version=0.0.4' }
+  });
+}
+
+// Sampled on each /api/metrics scrape: point-in-time gauges, plus counters
+// that other modules keep and only ever increase
+async function collectScrapeMetrics() {
+  const db = await getDBStats();
+  const cache = getVerifyCacheStats();
+  const pool = getKeyPoolMetrics();
   
-  return NextResponse.json(
-    { error: 'Method not allowed' },
-    { status: 405 }
+  const metrics = [
+    { name: 'db_file_size_bytes', help: 'Size of the user DB files', value: db.snapshotBytes, labels: { file: 'snapshot' } },
+    { name: 'db_file_size_bytes', help: 'Size of the user DB files', value: db.journalBytes, labels: { file: 'journal' } },
+    { name: 'db_journal_records', help: 'Mutations in the journal since the last compaction', value: db.journalRecords },
+    { name: 'db_users', help: 'Users resident in the in-memory store', value: db.users },
+    { name: 'token_verify_cache_size', help: 'Entries in the verified-token cache', value: cache.size },
+    { name: 'token_verify_cache_hits_total', help: 'Verified-token cache hits', type: 'counter', value: cache.hits },
+    { name: 'token_verify_cache_misses_total', help: 'Verified-token cache misses', type: 'counter', value: cache.misses }
+  ];
+  for (const [group, stats] of Object.entries(pool.groups)) {
+    metrics.push({ name: 'dh_pool_depth', help: 'Pre-generated DH key pairs ready', value: stats.depth, labels: { group } });
+    metrics.push({ name: 'dh_pool_misses_total', help: 'DH key requests served inline', type: 'counter', value: stats.misses, labels: { group } });
+  }
+  const memory = process.memoryUsage();
+  metrics.push(
+    { name: 'process_resident_memory_bytes', help: 'Resident set size of the server process', value: memory.rss },
+    { name: 'nodejs_heap_used_bytes', help: 'V8 heap in use', value: memory.heapUsed }
+  );
+  const hashing = getPasswordHashMetrics();
+  metrics.push(
+    { name: 'password_hash_workers_busy', help: 'Password hash workers running a job', value: hashing.busy },
+    { name: 'password_hash_queue_depth', help: 'Password hash jobs waiting for a worker', value: hashing.queued },
+    { name: 'password_hash_rejected_total', help: 'Password hash jobs refused because the queue was full', type: 'counter', value: hashing.rejected }
   );
+  const admission = getAdmissionMetrics();
+  metrics.push({ name: 'admission_event_loop_lag_ms', help: 'Worst event-loop stall in the last window, used for load shedding', value: admission.lagMs });
+  for (const [route, stats] of Object.entries(admission.routes)) {
+    metrics.push(
+      { name: 'admission_in_flight', help: 'Admitted requests still running', value: stats.inFlight, labels: { route } },
+      { name: 'admission_queued', help: 'Requests waiting for a concurrency slot', value: stats.queued, labels: { route } }
+    );
+    for (const [reason, count] of Object.entries(stats.shed)) {
+      metrics.push({ name: 'admission_shed_total', help: 'Requests refused by admission control', type: 'counter', value: count, labels: { route, reason } });
+    }
+  }
+  return metrics;
 }
@@ -8,10 +8,11 @@ import { Badge } from '@/components/ui/badge';
 import { Alert, AlertDescription } from '@/components/ui/alert';
 import { Tabs, TabsContent, TabsList, TabsTrigger } from '@/components/ui/tabs';
 import Link from 'next/link';
-import { getAllFeaturesWithAccess } from '@/lib/accessControl';
+import { useFeatureCatalog } from '@/lib/featureCatalogClient';
+import { decodeToken, verifyToken } from '@/lib/token';
 
 function AvailableFeatures({ tier }) {
-  const features = getAllFeaturesWithAccess(tier);
+  const features = useFeatureCatalog(tier);
   return (
     <div className="mt-4">
       <h4 className="text-white font-semibold mb-2">Available Features</h4>
@@ -46,7 +47,7 @@ export default function Home() {
   const [verification, setVerification] = useState(null);
   const [error, setError] = useState('');
 
-  const decodeToken = () => {
+  const handleDecode = () => {
     setError('');
     setDecoded(null);
     setVerification(null);
@@ -63,124 +64,25 @@ export default function Home() {
         return;
       }
 
-      // Decode header
-      const headerEncrypted = atob(parts[0]);
-      const headerDecrypted = groupSubstitutionDecrypt(headerEncrypted);
-      const header = JSON.parse(headerDecrypted);
-
-      // Decode payload
-      const payloadEncrypted = atob(parts[1]);
-      const payloadDecrypted = vigenereDecrypt(payloadEncrypted);
-      const payload = JSON.parse(payloadDecrypted);
-
-      setDecoded({ header, payload, signature: parts[2] });
-
-      // Verify signature
-      const expectedSigData = parts[0] + '.' + parts[1];
-      const signatureDecrypted = transpositionDecrypt(atob(parts[2]));
-
-      if (signatureDecrypted === expectedSigData) {
-        const isExpired = payload.exp && payload.exp < Math.floor(Date.now() / 1000);
-        setVerification({
-          valid: !isExpired,
-          message: isExpired ? 'Token expired' : 'Signature verified'
-        });
-      } else {
-        setVerification({ valid: false, message: 'Invalid signature' });
+      // Decode header and payload (v1 and compact v2 formats)
+      const result = decodeToken(token);
+      if (result.error) {
+        setError(result.error);
+        return;
       }
+      setDecoded(result);
+
+      // Verify signature and expiry
+      const verified = verifyToken(token);
+      setVerification({
+        valid: verified.valid,
+        message: verified.valid ? 'Signature verified' : verified.error
+      });
     } catch (err) {
       setError('Failed to decode token: ' + err.message);
     }
   };
 
-  // Client-side decryption functions
-  const groupSubstitutionDecrypt = (ciphertext) => {
-    const REVERSE_MAP = {
-      'Z+ZZ': 'A', 'Y+YY': 'B', 'X+XX': 'C', 'W+WW': 'D', 'V+VV': 'E',
-      'U+UU': 'F', 'T+TT': 'G', 'S+SS': 'H', 'R+RR': 'I', 'Q+QQ': 'J',
-      'P+PP': 'K', 'O+OO': 'L', 'N+NN': 'M', 'M+MM': 'N', 'L+LL': 'O',
-      'K+KK': 'P', 'J+JJ': 'Q', 'I+II': 'R', 'H+HH': 'S', 'G+GG': 'T',
-      'F+FF': 'U', 'E+EE': 'V', 'D+DD': 'W', 'C+CC': 'X', 'B+BB': 'Y',
-      'A+AA': 'Z', 'z+zz': 'a', 'y+yy': 'b', 'x+xx': 'c', 'w+ww': 'd',
-      'v+vv': 'e', 'u+uu': 'f', 't+tt': 'g', 's+ss': 'h', 'r+rr': 'i',
-      'q+qq': 'j', 'p+pp': 'k', 'o+oo': 'l', 'n+nn': 'm', 'm+mm': 'n',
-      'l+ll': 'o', 'k+kk': 'p', 'j+jj': 'q', 'i+ii': 'r', 'h+hh': 's',
-      'g+gg': 't', 'f+ff': 'u', 'e+ee': 'v', 'd+dd': 'w', 'c+cc': 'x',
-      'b+bb': 'y', 'a+aa': 'z', '_+__': ' ', '-+--': '.', '*+**': ',',
-      '#+##': ':', '[+[[': '{', ']+]]': '}', "'+'''": '"',
-      '9+99': '0', '8+88': '1', '7+77': '2', '6+66': '3', '5+55': '4',
-      '4+44': '5', '3+33': '6', '2+22': '7', '1+11': '8', '0+00': '9'
-    };
-
-    let decrypted = '';
-    const groups = ciphertext.split('|');
-
-    for (const group of groups) {
-      if (REVERSE_MAP[group]) {
-        decrypted += REVERSE_MAP[group];
-      } else {
-        const parts = group.split('+');
-        if (parts.length > 0) {
-          decrypted += parts[0];
-        }
-      }
-    }
-
-    return decrypted;
-  };
-
-  const vigenereDecrypt = (ciphertext, key = 'SECRETKEY') => {
-    const ALPHABET = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789 .,;:!?-_';
-    let decrypted = '';
-    let keyIndex = 0;
-
-    for (let i = 0; i < ciphertext.length; i++) {
-      const char = ciphertext[i];
-      const charIndex = ALPHABET.indexOf(char);
-
-      if (charIndex !== -1) {
-        const keyChar = key[keyIndex % key.length];
-        const keyCharIndex = ALPHABET.indexOf(keyChar.toUpperCase());
-        let newIndex = (charIndex - keyCharIndex) % ALPHABET.length;
-        if (newIndex < 0) newIndex += ALPHABET.length;
-        decrypted += ALPHABET[newIndex];
-        keyIndex++;
-      } else {
-        decrypted += char;
-      }
-    }
-
-    return decrypted;
-  };
-
-  const transpositionDecrypt = (ciphertext, key = '34152') => {
-    const keyArray = key.split('').map(Number);
-    const numCols = keyArray.length;
-    const numRows = Math.ceil(ciphertext.length / numCols);
-    const grid = Array(numRows).fill(null).map(() => Array(numCols).fill(''));
-    const sortedKey = keyArray.map((val, idx) => ({ val, idx })).sort((a, b) => a.val - b.val);
-
-    let textIndex = 0;
-    for (const { idx } of sortedKey) {
-      for (let row = 0; row < numRows; row++) {
-        if (textIndex < ciphertext.length) {
-          grid[row][idx] = ciphertext[textIndex++];
-        }
-      }
-    }
-
-    let decrypted = '';
-    for (let row = 0; row < numRows; row++) {
-      for (let col = 0; col < numCols; col++) {
-        if (grid[row][col] !== 'X' || row < numRows - 1) {
-          decrypted += grid[row][col];
-        }
-      }
-    }
-
-    return decrypted.replace(/X+$/, '');
-  };
-
   const formatDate = (timestamp) => {
     return new Date(timestamp * 1000).toLocaleString();
   };
@@ -227,7 +129,7 @@ export default function Home() {
                 onChange={(e) => setToken(e.target.value)}
               />
               <Button
-                onClick={decodeToken}
+                onClick={handleDecode}
                 className="mt-4 w-full bg-gradient-to-r from-purple-600 to-pink-600 hover:from-purple-700 hover:to-pink-700"
               >
                 Decode Token
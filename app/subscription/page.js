@@ -10,12 +10,8 @@ import { Label } from '@/components/ui/label';
 import { Check, Crown, Zap, Star } from 'lucide-react';
 import { useRouter } from 'next/navigation';
 import Link from 'next/link';
-import {
-	getAllFeaturesWithAccess,
-	getStoredToken,
-	getStoredUser,
-	verifyUserToken
-} from '@/lib/accessControl';
+import { getStoredToken, getStoredUser, verifyUserToken } from '@/lib/clientToken';
+import { useFeatureCatalog } from '@/lib/featureCatalogClient';
 
 const TIERS = [
 	{
@@ -75,7 +71,7 @@ export default function SubscriptionPage() {
 	const [paymentMethod, setPaymentMethod] = useState('demo');
 	const [isLoading, setIsLoading] = useState(false);
 	const [message, setMessage] = useState({ type: '', text: '' });
-	const [allFeatures, setAllFeatures] = useState([]);
+	const allFeatures = useFeatureCatalog(user ? currentTier : null);
 
 	useEffect(() => {
 		const storedToken = getStoredToken();
@@ -91,7 +87,6 @@ export default function SubscriptionPage() {
 			setToken(storedToken);
 			setUser(storedUser);
 			setCurrentTier(verification.tier);
-			setAllFeatures(getAllFeaturesWithAccess(verification.tier));
 		} else {
 			router.push('/auth');
 		}
@@ -133,8 +128,7 @@ export default function SubscriptionPage() {
 				localStorage.setItem('token', data.token);
 				setToken(data.token);
 
-				// Update features locally and broadcast change so other pages update immediately
-				setAllFeatures(getAllFeaturesWithAccess(data.subscription));
+				// Features follow currentTier; broadcast change so other pages update immediately
 				if (typeof window !== 'undefined') {
 					window.dispatchEvent(new Event('tokenUpdated'));
 				}
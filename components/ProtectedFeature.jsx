@@ -1,60 +1,19 @@
 'use client';
 
-import { useState, useEffect, useCallback } from 'react';
 import { Alert, AlertDescription } from '@/components/ui/alert';
 import { Button } from '@/components/ui/button';
 import { Lock } from 'lucide-react';
 import Link from 'next/link';
-import { hasFeatureAccess, getStoredToken, verifyUserToken } from '@/lib/accessControl';
+import { useFeatureAccess } from '@/lib/featureCatalogClient';
+import { useTokenSession } from '@/lib/tokenSession';
 
 export default function ProtectedFeature({ featureId, requiredTier, children, fallback }) {
-  const [hasAccess, setHasAccess] = useState(false);
-  const [currentTier, setCurrentTier] = useState('free');
-  const [loading, setLoading] = useState(true);
+  // Token verification and change events are handled once by the shared session
+  const { loading, tier } = useTokenSession();
+  // Entitlements come from the shared /api/features catalogue (null until loaded)
+  const hasAccess = useFeatureAccess(loading ? null : tier, featureId);
 
-  const refreshAccess = useCallback(() => {
-    const token = getStoredToken();
-    if (token) {
-      const verification = verifyUserToken(token);
-      if (verification.valid) {
-        setCurrentTier(verification.tier);
-        setHasAccess(hasFeatureAccess(verification.tier, featureId));
-      } else {
-        setCurrentTier('free');
-        setHasAccess(false);
-      }
-    } else {
-      setCurrentTier('free');
-      setHasAccess(false);
-    }
-    setLoading(false);
-  }, [featureId]);
-
-  useEffect(() => {
-    // Initial check
-    refreshAccess();
-
-    // Listen for token changes across the app
-    const onTokenUpdated = () => refreshAccess();
-    const onStorage = (e) => {
-      if (e.key === 'token') refreshAccess();
-    };
-    const onVisibility = () => {
-      if (document.visibilityState === 'visible') refreshAccess();
-    };
-
-    window.addEventListener('tokenUpdated', onTokenUpdated);
-    window.addEventListener('storage', onStorage);
-    document.addEventListener('visibilitychange', onVisibility);
-
-    return () => {
-      window.removeEventListener('tokenUpdated', onTokenUpdated);
-      window.removeEventListener('storage', onStorage);
-      document.removeEventListener('visibilitychange', onVisibility);
-    };
-  }, [refreshAccess]);
-
-  if (loading) {
+  if (loading || hasAccess === null) {
     return (
       <div className="text-gray-400 p-4">Loading...</div>
     );
@@ -0,0 +1,296 @@
+// Cipher and token micro-benchmarks with a JSON baseline and regression gate
+// Imports are relative (not '@/') so plain node can run it, which is how
+// backend_test.py --crypto-bench invokes it:
+//   node docs/bench_crypto.js [--quick] [--filter vigenere]
+//   node docs/bench_crypto.js --save-baseline bench_baseline.json
+//   node docs/bench_crypto.js --baseline bench_baseline.json [--threshold 15] [--json -]
+// Each case is timed over several samples; ops/sec is reported as the mean
+// with a 95% confidence interval. Against a baseline, a case regresses when
+// even the top of its interval, relative to a reference workload, is more
+// than --threshold percent below the bottom of the baseline's interval, and
+// the process exits 1.
+import { readFileSync, writeFileSync } from 'fs';
+import * as groupSubstitution from '../lib/crypto/groupSubstitution.js';
+import * as vigenere from '../lib/crypto/vigenere.js';
+import * as transposition from '../lib/crypto/transposition.js';
+import * as diffieHellman from '../lib/crypto/diffieHellman.js';
+import { createToken, verifyToken, clearVerifyCache } from '../lib/token.js';
+
+// From a token payload up to tens of KB
+const SIZES = [128, 1024, 8192, 32768];
+const DH_GROUPS = ['modp2048', 'modp3072'];
+
+// Two-sided 95% Student t for 1..30 degrees of freedom
+const T95 = [
+  12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+  2.201, 2.179, 2.16, 2.145, 2.131, 2.12, 2.11, 2.101, 2.093, 2.086,
+  2.08, 2.074, 2.069, 2.064, 2.06, 2.056, 2.052, 2.048, 2.045, 2.042
+];
+
+function parseArgs(argv) {
+  const options = { samples: 10, minSampleMs: 30, threshold: 15, filter: null, json: null, baseline: null, saveBaseline: null };
+  for (let i = 0; i < argv.length; i++) {
+    const arg = argv[i];
+    const value = () => {
+      if (i + 1 >= argv.length) throw new Error(`${arg} needs a value`);
+      return argv[++i];
+    };
+    if (arg === '--quick') Object.assign(options, { samples: 5, minSampleMs: 10 });
+    else if (arg === '--samples') options.samples = Math.max(2, Number(value()));
+    else if (arg === '--min-sample-ms') options.minSampleMs = Number(value());
+    else if (arg === '--threshold') options.threshold = Number(value());
+    else if (arg === '--filter') options.filter = value();
+    else if (arg === '--json') options.json = value();
+    else if (arg === '--baseline') options.baseline = value();
+    else if (arg === '--save-baseline') options.saveBaseline = value();
+    else throw new Error(`Unknown option ${arg}`);
+  }
+  return options;
+}
+
+// JSON-shaped ASCII text of exactly `size` characters, like a token payload
+function payloadText(size) {
+  const base = JSON.stringify(userPayload(0, ''));
+  const filler = 'Benchmark User 0123456789 abcdefghij KLMNOPQRST ';
+  let name = '';
+  while (name.length < size - base.length) name += filler;
+  return JSON.stringify(userPayload(0, name.slice(0, Math.max(0, size - base.length))));
+}
+
+function userPayload(i, name) {
+  return {
+    userId: String(1763927257917 + i),
+    email: `user${i}@example.com`,
+    name,
+    subscription: 'premium',
+    iat: 1767225600,
+    exp: 1767229200
+  };
+}
+
+function buildCases() {
+  const cases = [];
+  const add = (primitive, size, bytes, setup) => cases.push({ id: `${primitive}/${size}`, primitive, size, bytes, setup });
+
+  for (const size of SIZES) {
+    const text = () => payloadText(size);
+    add('groupSubstitution.encrypt', size, size, () => {
+      const plaintext = text();
+      return () => groupSubstitution.encrypt(plaintext);
+    });
+    add('groupSubstitution.decrypt', size, size, () => {
+      const ciphertext = groupSubstitution.encrypt(text());
+      return () => groupSubstitution.decrypt(ciphertext);
+    });
+    add('vigenere.encrypt', size, size, () => {
+      const plaintext = text();
+      return () => vigenere.encrypt(plaintext, 'SECRETKEY');
+    });
+    add('vigenere.decrypt', size, size, () => {
+      const ciphertext = vigenere.encrypt(text(), 'SECRETKEY');
+      return () => vigenere.decrypt(ciphertext, 'SECRETKEY');
+    });
+    add('transposition.encrypt', size, size, () => {
+      const plaintext = text();
+      return () => transposition.encrypt(plaintext, '34152');
+    });
+    add('transposition.decrypt', size, size, () => {
+      const ciphertext = transposition.encrypt(text(), '34152');
+      return () => transposition.decrypt(ciphertext, '34152');
+    });
+    add('token.create', size, size, () => {
+      const payload = JSON.parse(text());
+      return () => createToken(payload);
+    });
+    add('token.verify', size, size, () => {
+      const token = createToken(JSON.parse(text()));
+      // Uncached: every call decodes and checks the signature
+      return () => {
+        clearVerifyCache();
+        return verifyToken(token).valid;
+      };
+    });
+  }
+
+  for (const group of DH_GROUPS) {
+    add('dh.generateKeyPair', group, null, () => () => diffieHellman.generateKeyPair(group));
+    add('dh.computeSharedSecret', group, null, () => {
+      const alice = diffieHellman.generateKeyPair(group);
+      const bob = diffieHellman.generateKeyPair(group);
+      return () => diffieHellman.computeSharedSecret(alice.privateKey, bob.publicKey, group);
+    });
+  }
+  return cases;
+}
+
+// Keeps results observable so the JIT cannot drop the work
+let sink = 0;
+
+// Fixed pure-JS workload timed next to every sample. Dividing by it cancels
+// most of the drift in machine speed (CPU steal, frequency scaling), so the
+// gate compares these ratios rather than raw ops/sec.
+const REFERENCE_TEXT = payloadText(4096);
+
+function reference() {
+  let hash = 0x811c9dc5;
+  for (let i = 0; i < REFERENCE_TEXT.length; i++) {
+    hash = Math.imul(hash ^ REFERENCE_TEXT.charCodeAt(i), 16777619);
+  }
+  return hash;
+}
+
+function timeBatch(fn, ops) {
+  const start = performance.now();
+  for (let i = 0; i < ops; i++) {
+    const result = fn();
+    sink ^= typeof result === 'string' ? result.length : 1;
+  }
+  return performance.now() - start;
+}
+
+// Smallest batch that takes at least minMs
+function calibrate(fn, minMs) {
+  let ops = 1;
+  let elapsed = timeBatch(fn, ops);
+  while (elapsed < minMs) {
+    ops = elapsed > 0 ? Math.max(ops * 2, Math.ceil((ops * minMs * 1.2) / elapsed)) : ops * 10;
+    elapsed = timeBatch(fn, ops);
+  }
+  return ops;
+}
+
+// Mean with a 95% confidence interval
+function summarize(values) {
+  const n = values.length;
+  const mean = values.reduce((sum, value) => sum + value, 0) / n;
+  const variance = values.reduce((sum, value) => sum + (value - mean) ** 2, 0) / (n - 1);
+  const halfWidth = (T95[n - 2] ?? 1.96) * Math.sqrt(variance / n);
+  return { mean, ci95: [Math.max(0, mean - halfWidth), mean + halfWidth], relCiPct: (100 * halfWidth) / mean };
+}
+
+// Samples are taken round-robin across cases, so a slow patch of the run
+// widens every interval a little instead of skewing one case
+function measureAll(cases, options) {
+  // The first calibration is a warm-up: sized on cold code, batches run short
+  calibrate(reference, options.minSampleMs / 4);
+  const referenceOps = calibrate(reference, options.minSampleMs / 4);
+  const runs = cases.map((testCase) => {
+    const fn = testCase.setup();
+    calibrate(fn, options.minSampleMs);
+    return { testCase, fn, ops: calibrate(fn, options.minSampleMs), rates: [], ratios: [] };
+  });
+  for (let round = 0; round < options.samples; round++) {
+    for (const run of runs) {
+      const referenceRate = referenceOps / timeBatch(reference, referenceOps);
+      const rate = (run.ops * 1000) / timeBatch(run.fn, run.ops);
+      run.rates.push(rate);
+      run.ratios.push(rate / (referenceRate * 1000));
+    }
+  }
+  return runs.map(({ testCase, ops, rates, ratios }) => {
+    const raw = summarize(rates);
+    const relative = summarize(ratios);
+    return {
+      id: testCase.id,
+      primitive: testCase.primitive,
+      size: testCase.size,
+      bytes: testCase.bytes,
+      samples: rates.length,
+      ops_per_sample: ops,
+      ops_per_sec: raw.mean,
+      ci95: raw.ci95,
+      rel_ci_pct: raw.relCiPct,
+      bytes_per_sec: testCase.bytes === null ? null : raw.mean * testCase.bytes,
+      relative: relative.mean,
+      relative_ci95: relative.ci95
+    };
+  });
+}
+
+function compare(results, baseline, threshold) {
+  const previous = new Map(baseline.results.map((result) => [result.id, result]));
+  for (const result of results) {
+    const before = previous.get(result.id);
+    if (!before) continue;
+    result.baseline_relative = before.relative;
+    result.change_pct = (100 * (result.relative - before.relative)) / before.relative;
+    // Both runs are noisy: only intervals that are clearly apart count
+    result.regressed = result.relative_ci95[1] < before.relative_ci95[0] * (1 - threshold / 100);
+  }
+  return results.filter((result) => result.regressed).map((result) => result.id);
+}
+
+function formatRate(value) {
+  if (value >= 1e6) return (value / 1e6).toFixed(2) + 'M';
+  if (value >= 1e3) return (value / 1e3).toFixed(1) + 'k';
+  return value.toFixed(1);
+}
+
+function printTable(results, print) {
+  print('=== Cipher and token benchmarks ===\n');
+  print(
+    'Case'.padEnd(36) + 'ops/s'.padStart(10) + '±95%'.padStart(8) + 'MB/s'.padStart(10) +
+    (results.some((result) => 'change_pct' in result) ? 'vs base'.padStart(10) : '')
+  );
+  for (const result of results) {
+    let line =
+      result.id.padEnd(36) +
+      formatRate(result.ops_per_sec).padStart(10) +
+      (result.rel_ci_pct.toFixed(1) + '%').padStart(8) +
+      (result.bytes_per_sec === null ? '-' : (result.bytes_per_sec / 1e6).toFixed(1)).padStart(10);
+    if ('change_pct' in result) {
+      line += ((result.change_pct >= 0 ? '+' : '') + result.change_pct.toFixed(1) + '%').padStart(10);
+      if (result.regressed) line += '  REGRESSED';
+    }
+    print(line);
+  }
+}
+
+function main(options) {
+  // With --json -, stdout carries only the JSON document
+  const print = options.json === '-' ? console.error : console.log;
+  // Read before measuring so a bad path fails fast
+  const baseline = options.baseline ? JSON.parse(readFileSync(options.baseline, 'utf8')) : null;
+
+  const cases = buildCases().filter((testCase) => !options.filter || testCase.id.includes(options.filter));
+  if (!cases.length) throw new Error(`No cases match --filter ${options.filter}`);
+  const results = measureAll(cases, options);
+  const regressions = baseline ? compare(results, baseline, options.threshold) : [];
+  printTable(results, print);
+
+  const report = {
+    suite: 'crypto',
+    node: process.version,
+    platform: `${process.platform}-${process.arch}`,
+    created_at: new Date().toISOString(),
+    samples: options.samples,
+    min_sample_ms: options.minSampleMs,
+    baseline: options.baseline,
+    threshold_pct: options.threshold,
+    regressions,
+    results
+  };
+  if (options.saveBaseline) {
+    writeFileSync(options.saveBaseline, JSON.stringify(report, null, 2) + '\n');
+    print(`\nBaseline written to ${options.saveBaseline}`);
+  }
+  if (options.json === '-') {
+    process.stdout.write(JSON.stringify(report) + '\n');
+  } else if (options.json) {
+    writeFileSync(options.json, JSON.stringify(report, null, 2) + '\n');
+  }
+  if (baseline) {
+    print(regressions.length
+      ? `\n${regressions.length} case(s) regressed more than ${options.threshold}% against ${options.baseline}`
+      : `\nNo regressions beyond ${options.threshold}% against ${options.baseline}`);
+  }
+  return regressions.length ? 1 : 0;
+}
+
+// Exit status: 0 ok, 1 regressions against the baseline, 2 bad options or files
+try {
+  process.exitCode = main(parseArgs(process.argv.slice(2)));
+} catch (error) {
+  console.error(`bench_crypto: ${error.message}`);
+  process.exitCode = 2;
+}
@@ -0,0 +1,50 @@
+// Compare v1 and v2 token formats: wire size, create and (uncached) verify time
+import { createToken, verifyToken, clearVerifyCache, TOKEN_ALG_V1, TOKEN_ALG_V2 } from '@/lib/token.js';
+
+const COUNT = 2000;
+
+function payloadFor(i) {
+  return {
+    userId: String(1763927257917 + i),
+    email: `user${i}@example.com`,
+    name: `Benchmark User ${i}`,
+    subscription: ['free', 'basic', 'premium'][i % 3]
+  };
+}
+
+function bench(alg) {
+  // Distinct tokens so every verification misses the verify cache
+  clearVerifyCache();
+  let start = performance.now();
+  const tokens = [];
+  for (let i = 0; i < COUNT; i++) tokens.push(createToken(payloadFor(i), 'SECRETKEY', '34152', alg));
+  const createUs = ((performance.now() - start) * 1000) / COUNT;
+
+  start = performance.now();
+  let valid = 0;
+  for (const token of tokens) if (verifyToken(token).valid) valid++;
+  const verifyUs = ((performance.now() - start) * 1000) / COUNT;
+
+  const bytes = tokens.reduce((sum, token) => sum + token.length, 0) / COUNT;
+  return { alg, bytes, createUs, verifyUs, valid };
+}
+
+// Warm up both paths before measuring
+bench(TOKEN_ALG_V1);
+bench(TOKEN_ALG_V2);
+
+const v1 = bench(TOKEN_ALG_V1);
+const v2 = bench(TOKEN_ALG_V2);
+
+console.log('=== Token format comparison ===\n');
+console.log('Format'.padEnd(10) + 'Bytes'.padStart(10) + 'Create us'.padStart(12) + 'Verify us'.padStart(12) + 'Valid'.padStart(12));
+for (const row of [v1, v2]) {
+  console.log(
+    row.alg.padEnd(10) +
+    row.bytes.toFixed(0).padStart(10) +
+    row.createUs.toFixed(1).padStart(12) +
+    row.verifyUs.toFixed(1).padStart(12) +
+    `${row.valid}/${COUNT}`.padStart(12)
+  );
+}
+console.log(`\nv2 is ${(100 * (1 - v2.bytes / v1.bytes)).toFixed(0)}% smaller and verifies ${(v1.verifyUs / v2.verifyUs).toFixed(1)}x faster`);
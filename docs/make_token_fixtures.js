@@ -0,0 +1,190 @@
+// Generate cross-implementation fixtures for the Python token codec
+// (tokencodec.py): tokens made and checked by lib/token.js, with the exact
+// verifyToken / decodeToken results at a pinned clock. Imports are relative
+// (not '@/') so plain node can run it:
+//   node docs/make_token_fixtures.js > tests/fixtures/token_vectors.json
+import * as groupSubstitution from '../lib/crypto/groupSubstitution.js';
+import * as vigenere from '../lib/crypto/vigenere.js';
+import { createHmacSha256 } from '../lib/crypto/sha256.js';
+import {
+  createToken, verifyToken, decodeToken, clearVerifyCache, TOKEN_ALG_V1, TOKEN_ALG_V2
+} from '../lib/token.js';
+
+const NOW_MS = 1767225600000; // 2026-01-01T00:00:00Z
+const realNow = Date.now;
+const cases = [];
+
+function at(ms, fn) {
+  Date.now = () => ms;
+  try {
+    return fn();
+  } finally {
+    Date.now = realNow;
+  }
+}
+
+function b64(str) {
+  return Buffer.from(str).toString('base64').replace(/=/g, '');
+}
+
+function b64url(bytes) {
+  return Buffer.from(bytes).toString('base64url');
+}
+
+// A v2 token around an arbitrary payload string, signed like lib/token.js
+function rawV2(payloadStr, vigenereKey = 'SECRETKEY', transpositionKey = '34152') {
+  const data = 'c2.' + b64url(Buffer.from(vigenere.encrypt(payloadStr, vigenereKey)));
+  return signV2(data, vigenereKey, transpositionKey);
+}
+
+function signV2(data, vigenereKey = 'SECRETKEY', transpositionKey = '34152') {
+  const mac = createHmacSha256(vigenereKey + '\u0000' + transpositionKey);
+  return data + '.' + b64url(mac(data).subarray(0, 16));
+}
+
+function add(name, token, keys = {}) {
+  const vigenereKey = keys.vigenereKey ?? 'SECRETKEY';
+  const transpositionKey = keys.transpositionKey ?? '34152';
+  clearVerifyCache();
+  const verify = at(NOW_MS, () => verifyToken(token, vigenereKey, transpositionKey));
+  const decode = decodeToken(token, vigenereKey);
+  cases.push({ name, token, vigenere_key: vigenereKey, transposition_key: transpositionKey, verify, decode });
+}
+
+const users = [
+  { userId: '1763927257917', email: 'test@example.com', name: 'Test User', subscription: 'premium' },
+  { userId: '1', email: 'demo@example.com', name: 'Demo', subscription: 'free' },
+  { userId: '42', email: 'zoe@example.com', name: 'Zoë Ångström', subscription: 'basic' },
+  { userId: '7', email: 'kanji@example.com', name: '日本語 ユーザー 🔐', subscription: 'premium' },
+  { userId: '8', email: 'q@example.com', name: 'Quote "\\ backslash\' {braces} [x]; a:b!', subscription: 'free' },
+  { userId: '9', email: 'long@example.com', name: 'L'.repeat(700), subscription: 'basic', extra: { nested: [1, 2.5, null, true] } },
+  { userId: 'X', email: 'xxx@example.com', name: 'XXXXX', subscription: 'free' }
+];
+
+// Plain tokens in both formats
+for (const alg of [TOKEN_ALG_V1, TOKEN_ALG_V2]) {
+  users.forEach((user, i) => {
+    add(`${alg} user ${i}`, at(NOW_MS, () => createToken(user, 'SECRETKEY', '34152', alg)));
+  });
+}
+
+// Non-default keys, including Vigenère keys with characters outside the
+// alphabet (shift -1) and ones that upper-case to several characters
+const keyPairs = [
+  ['abc', '3142'], ['K#Y', '1'], ['ﬅX', '987654321'], ['sécret', '11111'], ['🔑key', '2020'], ['Z', '0']
+];
+for (const alg of [TOKEN_ALG_V1, TOKEN_ALG_V2]) {
+  keyPairs.forEach(([vigenereKey, transpositionKey], i) => {
+    const token = at(NOW_MS, () => createToken(users[i % users.length], vigenereKey, transpositionKey, alg));
+    add(`${alg} keys ${i}`, token, { vigenereKey, transpositionKey });
+    add(`${alg} keys ${i} verified with default keys`, token);
+  });
+}
+
+// Expired, and tokens signed with other keys
+for (const alg of [TOKEN_ALG_V1, TOKEN_ALG_V2]) {
+  add(`${alg} expired`, at(NOW_MS - 7200 * 1000, () => createToken(users[0], 'SECRETKEY', '34152', alg)));
+  add(`${alg} expires this second`, at(NOW_MS - 3600 * 1000, () => createToken(users[1], 'SECRETKEY', '34152', alg)));
+  add(`${alg} wrong vigenere key`, at(NOW_MS, () => createToken(users[0], 'SECRETKEZ', '34152', alg)));
+  add(`${alg} wrong transposition key`, at(NOW_MS, () => createToken(users[0], 'SECRETKEY', '34125', alg)));
+}
+
+// Tampering
+for (const alg of [TOKEN_ALG_V1, TOKEN_ALG_V2]) {
+  const token = at(NOW_MS, () => createToken(users[0], 'SECRETKEY', '34152', alg));
+  const [h, p, s] = token.split('.');
+  const flip = (str, i) => str.slice(0, i) + (str[i] === 'A' ? 'B' : 'A') + str.slice(i + 1);
+  add(`${alg} tampered payload`, [h, flip(p, 10), s].join('.'));
+  add(`${alg} tampered signature`, [h, p, flip(s, 5)].join('.'));
+  add(`${alg} truncated signature`, [h, p, s.slice(0, -2)].join('.'));
+  add(`${alg} payload with whitespace`, [h, p.slice(0, 8) + ' ' + p.slice(8), s].join('.'));
+  add(`${alg} signature with junk characters`, [h, p, s.slice(0, 4) + '*~' + s.slice(4)].join('.'));
+  add(`${alg} signature with padding`, [h, p, s + '=='].join('.'));
+  add(`${alg} extra part`, token + '.x');
+}
+
+// v1 signatures are base64 standard but the decoder accepts base64url too
+{
+  const token = at(NOW_MS, () => createToken(users[3], 'SECRETKEY', '34152', TOKEN_ALG_V1));
+  const [h, p, s] = token.split('.');
+  add('v1 signature in base64url', [h, p, s.replace(/\+/g, '-').replace(/\//g, '_')].join('.'));
+  add('v1 payload in base64url', [h, p.replace(/\+/g, '-').replace(/\//g, '_'), s].join('.'));
+}
+
+// The transposition cipher drops 'X' from the last grid row and trims
+// trailing 'X', so some genuine v1 tokens never verify. Keep a few.
+{
+  let found = 0;
+  for (let i = 0; found < 6 && i < 5000; i++) {
+    const user = { userId: String(i), email: `u${i}@example.com`, name: `User ${i}`, subscription: 'free' };
+    const token = at(NOW_MS, () => createToken(user, 'SECRETKEY', '34152', TOKEN_ALG_V1));
+    clearVerifyCache();
+    if (!at(NOW_MS, () => verifyToken(token)).valid) {
+      add(`v1 trailing-X quirk ${found++}`, token);
+    }
+  }
+}
+
+// Hand-built v1 tokens: custom headers and signatures that decode to non-ASCII
+{
+  const payload = b64(vigenere.encrypt(JSON.stringify({ ...users[0], exp: 1900000000 }), 'SECRETKEY'));
+  const header = b64(groupSubstitution.encrypt('{"alg":"CUSTOM","typ":"JWT","kid":"k-1@2"}'));
+  add('v1 custom header', `${header}.${payload}.${b64('not a signature')}`);
+  add('v1 non-ASCII signature', `${header}.${payload}.${b64('é' + header + '.' + payload)}`);
+  add('v1 header with unmapped groups', `${b64('a+aa|@+@@|Q+QQ')}.${payload}.${b64('x')}`);
+  add('v1 undecodable header', `${b64('{+{{|')}.${payload}.${b64('x')}`);
+}
+
+// Hand-built v2 tokens: odd payloads JSON.parse and the exp check must agree on
+const rawPayloads = {
+  'number payload': '5',
+  'null payload': 'null',
+  'array payload': '[1,2]',
+  'string payload': '"hello"',
+  'exp as string': '{"exp":"5"}',
+  'exp as padded string': '{"exp":" 99999999999 "}',
+  'exp as hex string': '{"exp":"0x10"}',
+  'exp as junk string': '{"exp":"soon"}',
+  'exp as empty string': '{"exp":""}',
+  'exp as true': '{"exp":true}',
+  'exp as false': '{"exp":false}',
+  'exp as zero': '{"exp":0}',
+  'exp as empty array': '{"exp":[]}',
+  'exp as array': '{"exp":[99999999999]}',
+  'exp as object': '{"exp":{}}',
+  'exp as float': '{"exp":1767225599.5}',
+  'exp null': '{"exp":null}',
+  'NaN literal': '{"a":NaN}',
+  'Infinity literal': '{"exp":Infinity}',
+  'duplicate keys': '{"exp":1,"exp":99999999999}',
+  'surrogate escapes': '{"s":"\\ud83d\\ude00 \\ud800"}',
+  'whitespace around': ' \t{"a":1}\n',
+  'trailing garbage': '{"a":1} x',
+  'BOM': '﻿{"a":1}',
+  'empty payload': ''
+};
+for (const [name, payloadStr] of Object.entries(rawPayloads)) {
+  add(`v2 ${name}`, rawV2(payloadStr));
+}
+
+// Invalid UTF-8 in the payload bytes: both sides must substitute U+FFFD alike
+{
+  const invalid = [
+    [0x7b, 0x22, 0x6e, 0x22, 0x3a, 0x22, 0xff, 0xfe, 0x22, 0x7d],
+    [0x7b, 0x22, 0x6e, 0x22, 0x3a, 0x22, 0xe2, 0x82, 0x22, 0x7d],
+    [0x7b, 0x22, 0x6e, 0x22, 0x3a, 0x22, 0xf0, 0x9f, 0x98, 0x41, 0xc0, 0xaf, 0xed, 0xa0, 0x80, 0x22, 0x7d]
+  ];
+  invalid.forEach((bytes, i) => {
+    // Vigenère leaves bytes >= 0x80 alone, so encrypting the ASCII around them is enough
+    const text = Buffer.from(bytes).toString('latin1');
+    const encrypted = Buffer.from(vigenere.encrypt(text, 'SECRETKEY'), 'latin1');
+    add(`v2 invalid UTF-8 ${i}`, signV2('c2.' + b64url(encrypted)));
+  });
+}
+
+// Malformed
+for (const token of ['', '.', '..', 'a.b', 'a.b.c', 'c2..', 'c2.x.y', 'c2.' + b64url(Buffer.from('{}')) + '.', '...', 'not a token at all', 'é.é.é']) {
+  add(`malformed ${JSON.stringify(token)}`, token);
+}
+
+process.stdout.write(JSON.stringify({ now: Math.floor(NOW_MS / 1000), cases }, null, 2) + '\n');
@@ -0,0 +1,44 @@
+// Test per-client rate limiting against spoofed X-Forwarded-For hops
+// Imports are relative (not '@/') so plain node can run it:
+//   node docs/test_admission.js
+process.env.RATE_LIMIT_LOGIN = '2:0.001';
+delete process.env.ADMISSION_TRUSTED_PROXIES;
+const { admit, clientKey, getAdmissionMetrics } = await import('../lib/admission.js');
+
+let failures = 0;
+function check(name, ok) {
+  console.log(`  ✓ Test ${name}: ${ok ? 'PASSED' : 'FAILED'}`);
+  if (!ok) failures++;
+}
+
+// As seen behind one proxy: the client's own header, then the hop the proxy appended
+function request(forwardedFor) {
+  return new Request('http://localhost/api/login', {
+    method: 'POST',
+    headers: forwardedFor ? { 'x-forwarded-for': forwardedFor } : {}
+  });
+}
+
+async function login(forwardedFor) {
+  const admission = await admit('login', clientKey(request(forwardedFor)));
+  if (admission.admitted) admission.release();
+  return admission.admitted ? 200 : admission.status;
+}
+
+console.log('=== Testing admission client keys ===\n');
+
+console.log('1. Client key is the hop the proxy appended');
+check('single hop', clientKey(request('203.0.113.7')) === '203.0.113.7');
+check('spoofed leading hop ignored', clientKey(request('198.51.100.1, 203.0.113.7')) === '203.0.113.7');
+
+console.log('\n2. A fresh spoofed hop does not get a fresh bucket');
+const statuses = [];
+for (let i = 0; i < 4; i++) statuses.push(await login(`10.0.${i}.1, 203.0.113.9`));
+check('limited after the burst of 2', statuses.join(',') === '200,200,429,429');
+check('one bucket for the client', getAdmissionMetrics().clients === 1);
+
+console.log('\n3. Another real client keeps its own bucket');
+check('different proxy-seen address admitted', (await login('10.9.9.9, 203.0.113.10')) === 200);
+
+console.log(`\n=== ${failures ? `${failures} test(s) FAILED` : 'All Tests Complete'} ===`);
+process.exitCode = failures ? 1 : 0;
@@ -0,0 +1,55 @@
+// Test the journaled user store when a group commit fails
+// Imports are relative (not '@/') so plain node can run it:
+//   node docs/test_db.js
+// Runs against a scratch data/ directory, never the real one.
+import fs from 'fs';
+import os from 'os';
+import path from 'path';
+import { fileURLToPath } from 'url';
+
+const DB_MODULE = path.join(path.dirname(fileURLToPath(import.meta.url)), '..', 'lib', 'db.js');
+
+// db.js resolves data/ against the working directory when it is loaded
+const scratch = fs.mkdtempSync(path.join(os.tmpdir(), 'db-test-'));
+process.chdir(scratch);
+fs.mkdirSync('data');
+fs.writeFileSync('data/users.json', JSON.stringify({ users: [{ id: '1', email: 'a@example.com', subscription: 'free' }] }));
+
+// A fresh module instance is a server restart
+let run = 0;
+const load = () => import(`${DB_MODULE}?run=${++run}`);
+
+let failures = 0;
+function check(name, ok) {
+  console.log(`  ✓ Test ${name}: ${ok ? 'PASSED' : 'FAILED'}`);
+  if (!ok) failures++;
+}
+
+console.log('=== Testing DB commit failures ===\n');
+
+// A directory where the journal should be makes every append fail
+fs.mkdirSync('data/users.journal');
+let db = await load();
+
+console.log('1. Failed create is not visible');
+const created = await db.createUser({ email: 'b@example.com', subscription: 'free' }).then(() => true, () => false);
+check('create rejected', !created);
+check('no user after failed create', (await db.findUser('b@example.com')) === undefined);
+
+console.log('\n2. Failed update is not visible');
+const updated = await db.updateUser('a@example.com', { subscription: 'premium' }).then(() => true, () => false);
+check('update rejected', !updated);
+check('old value after failed update', (await db.findUser('a@example.com')).subscription === 'free');
+
+console.log('\n3. Writes after recovery commit and survive a restart');
+fs.rmdirSync('data/users.journal');
+await db.createUser({ email: 'c@example.com', subscription: 'basic' });
+check('create after recovery', (await db.findUser('c@example.com'))?.subscription === 'basic');
+db = await load();
+check('committed create survives restart', (await db.findUser('c@example.com'))?.subscription === 'basic');
+check('failed create absent after restart', (await db.findUser('b@example.com')) === undefined);
+check('failed update absent after restart', (await db.findUser('a@example.com')).subscription === 'free');
+
+fs.rmSync(scratch, { recursive: true, force: true });
+console.log(`\n=== ${failures ? `${failures} test(s) FAILED` : 'All Tests Complete'} ===`);
+process.exitCode = failures ? 1 : 0;
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Synthetic users.json generator for DB scaling tests
+Streams a valid data/users.json (same schema and layout as lib/db.js writes) with any
+number of users and a configurable tier mix, in constant memory
+"""
+
+import argparse
+import base64
+import json
+import os
+import random
+from datetime import datetime, timedelta, timezone
+
+from standin_server import SEED_USERS
+
+DEFAULT_TIERS = {"free": 70, "basic": 20, "premium": 10}
+DEFAULT_PASSWORD = "password123"
+FIRST_ID = 1700000000000
+FIRST_CREATED = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+FIRST_NAMES = ["Alex", "Sam", "Jordan", "Taylor", "Morgan", "Casey", "Riley", "Jamie",
+               "Avery", "Quinn", "Drew", "Robin", "Skyler", "Reese", "Kai", "Rowan"]
+LAST_NAMES = ["Smith", "Garcia", "Chen", "Okafor", "Novak", "Silva", "Kim", "Patel",
+              "Muller", "Rossi", "Haddad", "Kowalski", "Tanaka", "Nguyen", "Brown", "Cohen"]
+
+
+def parse_tiers(spec):
+    """Parse a tier mix such as 'free=70,basic=20,premium=10' into a weight dict"""
+    if not spec:
+        return dict(DEFAULT_TIERS)
+    tiers = {}
+    for part in spec.split(","):
+        name, _, weight = part.strip().partition("=")
+        if name not in DEFAULT_TIERS:
+            raise ValueError(f"Unknown tier in mix: {name}")
+        tiers[name] = float(weight) if weight else 1.0
+    return tiers
+
+
+def user_email(index, domain="example.com"):
+    """Email of the index-th generated user, so harnesses can log in as any of them"""
+    return f"user{index}@{domain}"
+
+
+def iter_users(count, tiers=None, seed=None, password=DEFAULT_PASSWORD, domain="example.com"):
+    """Yield `count` users in the users.json schema; all share `password`"""
+    tiers = tiers or dict(DEFAULT_TIERS)
+    names, weights = list(tiers), list(tiers.values())
+    rng = random.Random(seed)
+    encoded = base64.b64encode(password.encode()).decode()
+    # Spread creation times over a year, in id order
+    step_ms = timedelta(days=365) / timedelta(milliseconds=1) / max(count, 1)
+    first_ms = int(FIRST_CREATED.timestamp() * 1000)
+    for i in range(count):
+        created_ms = first_ms + int(step_ms * i)
+        created = datetime.fromtimestamp(created_ms // 1000, timezone.utc)
+        yield {
+            "id": str(FIRST_ID + i),
+            "email": user_email(i, domain),
+            "password": encoded,
+            "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            "subscription": rng.choices(names, weights)[0],
+            "createdAt": f"{created:%Y-%m-%dT%H:%M:%S}.{created_ms % 1000:03d}Z",
+        }
+
+
+_encode_string = json.encoder.encode_basestring
+_key_prefixes = {}
+
+
+def _format_user(user):
+    """One flat user object in JSON.stringify(data, null, 2) layout, nested inside "users"."""
+    fields = []
+    for key, value in user.items():
+        prefix = _key_prefixes.get(key)
+        if prefix is None:
+            prefix = _key_prefixes[key] = f"      {_encode_string(key)}: "
+        fields.append(prefix + (_encode_string(value) if isinstance(value, str)
+                                else json.dumps(value, ensure_ascii=False)))
+    return "    {\n" + ",\n".join(fields) + "\n    }"
+
+
+def write_users(path, count, tiers=None, seed=None, password=DEFAULT_PASSWORD,
+                include_seed=True, domain="example.com"):
+    """Stream users to `path` via a temp file and atomic rename; returns the user count"""
+    users = iter_users(count, tiers, seed, password, domain)
+    if include_seed:
+        seeds = [dict(u) for u in SEED_USERS]
+    else:
+        seeds = []
+    tmp_path = f"{path}.tmp"
+    written = 0
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write('{\n  "users": [')
+        for user in seeds:
+            f.write(("\n" if written == 0 else ",\n") + _format_user(user))
+            written += 1
+        for user in users:
+            f.write(("\n" if written == 0 else ",\n") + _format_user(user))
+            written += 1
+        f.write("\n  ]\n}" if written else "]\n}")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic users.json")
+    parser.add_argument("--count", type=int, default=100000, help="number of generated users")
+    parser.add_argument("--out", default=os.path.join("data", "users.json"), help="output file")
+    parser.add_argument("--tiers", help="tier weights, e.g. free=70,basic=20,premium=10")
+    parser.add_argument("--password", default=DEFAULT_PASSWORD,
+                        help="password shared by all generated users (stored base64, as legacy users)")
+    parser.add_argument("--seed", type=int, help="random seed for names and tiers")
+    parser.add_argument("--no-seed-users", action="store_true",
+                        help="omit test@example.com and demo@example.com")
+    args = parser.parse_args(argv)
+
+    written = write_users(args.out, args.count, parse_tiers(args.tiers), args.seed,
+                          args.password, include_seed=not args.no_seed_users)
+    size_mb = os.path.getsize(args.out) / (1024 * 1024)
+    print(f"Wrote {written} users to {args.out} ({size_mb:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
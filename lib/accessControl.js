@@ -1,5 +1,7 @@
 // Access Control and Feature Management
-import { verifyToken, decodeToken } from './token';
+// Re-exported for existing importers; client pages import them from
+// ./clientToken so the feature tables below stay out of the browser bundle
+export { getStoredToken, getStoredUser, verifyUserToken } from './clientToken';
 
 // Define features for each subscription tier
 export const FEATURES = {
@@ -107,85 +109,84 @@ export const FEATURE_DETAILS = {
   }
 };
 
-// Get token from storage (client-side)
-export function getStoredToken() {
-  if (typeof window === 'undefined') return null;
-  return localStorage.getItem('token');
-}
+// Entitlement index, compiled once at load: each feature gets a bit, each
+// tier a bitmask of its features, and each feature its minimum tier. Tier
+// catalogues are frozen and shared, so lookups never allocate.
+const TIER_ORDER = ['free', 'basic', 'premium'];
 
-// Get user from storage (client-side)
-export function getStoredUser() {
-  if (typeof window === 'undefined') return null;
-  const userStr = localStorage.getItem('user');
-  return userStr ? JSON.parse(userStr) : null;
-}
+const featureBits = new Map();   // featureId -> bit
+const tierMasks = new Map();     // tier -> bitmask
+const requiredTiers = new Map(); // featureId -> minimum tier
 
-// Verify and decode token
-export function verifyUserToken(token) {
-  if (!token) return { valid: false, error: 'No token provided' };
-  
-  const verification = verifyToken(token);
-  if (!verification.valid) {
-    return verification;
+for (const featureId of [...Object.keys(FEATURE_DETAILS), ...TIER_ORDER.flatMap(tier => FEATURES[tier])]) {
+  if (featureBits.has(featureId)) continue;
+  // Bitwise ops are 32-bit: 1 << 32 wraps to 1 and would alias feature 0
+  if (featureBits.size >= 31) {
+    throw new Error(`Too many features for the entitlement bitmask (max 31): ${featureId}`);
   }
-  
-  const decoded = decodeToken(token);
-  if (decoded.error) {
-    return { valid: false, error: decoded.error };
+  featureBits.set(featureId, 1 << featureBits.size);
+}
+
+for (const tier of TIER_ORDER) {
+  Object.freeze(FEATURES[tier]);
+  let mask = 0;
+  for (const featureId of FEATURES[tier]) {
+    mask |= featureBits.get(featureId);
+    if (!requiredTiers.has(featureId)) requiredTiers.set(featureId, tier);
   }
-  
-  return {
-    valid: true,
-    payload: verification.payload,
-    header: decoded.header,
-    tier: verification.payload.subscription || 'free'
-  };
+  tierMasks.set(tier, mask);
+}
+
+const availableFeatures = new Map();      // tier -> frozen list
+const featuresWithAccess = new Map();     // tier -> frozen list
+for (const tier of TIER_ORDER) {
+  const mask = tierMasks.get(tier);
+  availableFeatures.set(tier, Object.freeze(FEATURES[tier].map(featureId => Object.freeze({
+    id: featureId,
+    ...FEATURE_DETAILS[featureId],
+    available: true
+  }))));
+  featuresWithAccess.set(tier, Object.freeze(Object.keys(FEATURE_DETAILS).map(featureId => Object.freeze({
+    id: featureId,
+    ...FEATURE_DETAILS[featureId],
+    available: (mask & featureBits.get(featureId)) !== 0,
+    requiredTier: getRequiredTier(featureId)
+  }))));
+}
+
+const tierComparison = Object.freeze(TIER_ORDER.map(tier => Object.freeze({ tier, features: FEATURES[tier] })));
+
+// Unknown or missing tiers fall back to free
+function normalizeTier(tier) {
+  if (tierMasks.has(tier)) return tier;
+  const lower = typeof tier === 'string' ? tier.toLowerCase() : undefined;
+  return tierMasks.has(lower) ? lower : 'free';
 }
 
 // Check if user has access to a feature
 export function hasFeatureAccess(tier, featureId) {
-  const tierFeatures = FEATURES[tier?.toLowerCase()] || FEATURES.free;
-  return tierFeatures.includes(featureId);
+  const bit = featureBits.get(featureId);
+  return bit !== undefined && (tierMasks.get(normalizeTier(tier)) & bit) !== 0;
 }
 
 // Get all available features for a tier
 export function getAvailableFeatures(tier) {
-  const tierFeatures = FEATURES[tier?.toLowerCase()] || FEATURES.free;
-  return tierFeatures.map(featureId => ({
-    id: featureId,
-    ...FEATURE_DETAILS[featureId],
-    available: true
-  }));
+  return availableFeatures.get(normalizeTier(tier));
 }
 
 // Get all features with availability status
 export function getAllFeaturesWithAccess(tier) {
-  const allFeatureIds = Object.keys(FEATURE_DETAILS);
-  const tierFeatures = FEATURES[tier?.toLowerCase()] || FEATURES.free;
-  
-  return allFeatureIds.map(featureId => ({
-    id: featureId,
-    ...FEATURE_DETAILS[featureId],
-    available: tierFeatures.includes(featureId),
-    requiredTier: getRequiredTier(featureId)
-  }));
+  return featuresWithAccess.get(normalizeTier(tier));
 }
 
 // Get minimum tier required for a feature
 function getRequiredTier(featureId) {
-  if (FEATURES.free.includes(featureId)) return 'free';
-  if (FEATURES.basic.includes(featureId)) return 'basic';
-  if (FEATURES.premium.includes(featureId)) return 'premium';
-  return 'premium';
+  return requiredTiers.get(featureId) || 'premium';
 }
 
 // Get tier comparison
 export function getTierComparison() {
-  return [
-    { tier: 'free', features: FEATURES.free },
-    { tier: 'basic', features: FEATURES.basic },
-    { tier: 'premium', features: FEATURES.premium }
-  ];
+  return tierComparison;
 }
 
 // Check if upgrade is needed for feature
@@ -0,0 +1,189 @@
+// Admission control and load shedding (server only)
+// Decides, before any body parsing, whether a request is worth starting:
+// - per-client token buckets rate-limit /login and /register (429)
+// - expensive routes have a concurrency limit with a short, bounded wait
+//   queue; a full queue or a wait past the timeout sheds the request (503)
+// - while event-loop lag is above ADMISSION_LAG_MS, sheddable routes are
+//   refused outright (503) so cheap, critical routes like /verify keep the
+//   loop to themselves
+// Every rejection carries Retry-After.
+import { monitorEventLoopDelay } from 'perf_hooks';
+
+const LAG_THRESHOLD_MS = Number(process.env.ADMISSION_LAG_MS || 200);
+const LAG_WINDOW_MS = 500;
+const QUEUE_TIMEOUT_MS = Number(process.env.ADMISSION_QUEUE_TIMEOUT_MS || 1000);
+const MAX_CLIENTS = 10000;
+
+// Reverse proxies in front of the app that append to X-Forwarded-For. 1 fits
+// a single proxy, or Next's own server, which fills in the socket address
+// when the header is absent; set 0 to ignore forwarding headers entirely.
+const trustedProxies = Number(process.env.ADMISSION_TRUSTED_PROXIES ?? 1);
+const TRUSTED_PROXIES = Number.isInteger(trustedProxies) && trustedProxies >= 0 ? trustedProxies : 1;
+
+// Routes without an entry are never limited or shed (verify, verify/batch, GETs)
+const ROUTE_LIMITS = {
+  'payment': { concurrency: 8, queue: 32 },
+  'dh/generate': { concurrency: 16, queue: 64 },
+  'dh/shared-secret': { concurrency: 32, queue: 128 },
+  'register': { concurrency: 32, queue: 128 },
+  'login': { concurrency: 64, queue: 256 }
+};
+
+// "burst:perSecond" per client; 0 or "off" disables
+function parseRate(spec, fallback) {
+  const value = spec === undefined ? fallback : spec;
+  if (!value || value === '0' || value === 'off') return null;
+  const [burst, perSecond] = value.split(':').map(Number);
+  if (!(burst > 0) || !(perSecond > 0)) return null;
+  return { burst, perSecond };
+}
+
+const RATE_LIMITS = {
+  'login': parseRate(process.env.RATE_LIMIT_LOGIN, '30:10'),
+  'register': parseRate(process.env.RATE_LIMIT_REGISTER, '30:2')
+};
+
+const routes = new Map();   // route -> { inFlight, waiting, admitted, shed }
+const buckets = new Map();  // route + '\u0000' + client -> { tokens, updatedAt }
+
+let lagMonitor = null;
+let lagMs = 0;
+
+function startLagMonitor() {
+  lagMonitor = monitorEventLoopDelay({ resolution: 10 });
+  lagMonitor.enable();
+  setInterval(() => {
+    // Worst stall in the window: one long block matters more than the p99 tick
+    lagMs = lagMonitor.count ? lagMonitor.max / 1e6 : 0;
+    lagMonitor.reset();
+  }, LAG_WINDOW_MS).unref();
+}
+
+function stateFor(route) {
+  let state = routes.get(route);
+  if (!state) {
+    state = { inFlight: 0, waiting: [], admitted: 0, shed: { rate_limit: 0, lag: 0, queue_full: 0, queue_timeout: 0 } };
+    routes.set(route, state);
+  }
+  return state;
+}
+
+// The address the outermost trusted proxy saw. Each trusted proxy appends its
+// peer to X-Forwarded-For, so that hop is TRUSTED_PROXIES from the end; hops
+// left of it are whatever the client sent and would let it pick its bucket.
+export function clientKey(request) {
+  if (TRUSTED_PROXIES > 0) {
+    const hops = (request.headers.get('x-forwarded-for') || '')
+      .split(',')
+      .map((hop) => hop.trim())
+      .filter(Boolean);
+    if (hops.length) return hops[Math.max(0, hops.length - TRUSTED_PROXIES)];
+    const realIp = request.headers.get('x-real-ip');
+    if (realIp) return realIp.trim();
+  }
+  // NextRequest.ip, where the platform provides the socket address
+  return request.ip || 'unknown';
+}
+
+// Take one token from the client's bucket; returns seconds until one is available, or 0
+function takeToken(route, client, limit) {
+  const key = route + '\u0000' + client;
+  const now = performance.now();
+  let bucket = buckets.get(key);
+  if (bucket) {
+    buckets.delete(key);
+    bucket.tokens = Math.min(limit.burst, bucket.tokens + ((now - bucket.updatedAt) / 1000) * limit.perSecond);
+    bucket.updatedAt = now;
+  } else {
+    bucket = { tokens: limit.burst, updatedAt: now };
+    // Map order is least recently used first
+    if (buckets.size >= MAX_CLIENTS) buckets.delete(buckets.keys().next().value);
+  }
+  buckets.set(key, bucket);
+  if (bucket.tokens < 1) {
+    return (1 - bucket.tokens) / limit.perSecond;
+  }
+  bucket.tokens -= 1;
+  return 0;
+}
+
+function reject(state, reason, status, retryAfter) {
+  state.shed[reason]++;
+  return {
+    admitted: false,
+    status,
+    reason,
+    retryAfter: Math.max(1, Math.ceil(retryAfter)),
+    error: status === 429 ? 'Too many requests, please retry later' : 'Server busy, please retry'
+  };
+}
+
+// `transferred` tickets inherit the slot of the request that released it
+function ticket(state, transferred = false) {
+  if (!transferred) state.inFlight++;
+  state.admitted++;
+  let released = false;
+  return {
+    admitted: true,
+    release() {
+      if (released) return;
+      released = true;
+      const next = state.waiting.shift();
+      if (next) next();
+      else state.inFlight--;
+    }
+  };
+}
+
+// Resolves to { admitted: true, release() } or
+// { admitted: false, status, reason, retryAfter, error }
+export async function admit(route, client) {
+  if (!lagMonitor) startLagMonitor();
+  const limit = ROUTE_LIMITS[route];
+  const rate = RATE_LIMITS[route];
+  if (!limit && !rate) return { admitted: true, release() {} };
+  const state = stateFor(route);
+
+  if (rate) {
+    const wait = takeToken(route, client, rate);
+    if (wait > 0) return reject(state, 'rate_limit', 429, wait);
+  }
+  if (!limit) return ticket(state);
+
+  if (lagMs > LAG_THRESHOLD_MS) {
+    return reject(state, 'lag', 503, lagMs / 1000);
+  }
+  if (state.inFlight < limit.concurrency) {
+    return ticket(state);
+  }
+  if (state.waiting.length >= limit.queue) {
+    return reject(state, 'queue_full', 503, 1);
+  }
+
+  // Wait for a slot; release() hands its slot straight to the oldest waiter
+  const granted = await new Promise((resolve) => {
+    const wake = () => {
+      clearTimeout(timeout);
+      resolve(true);
+    };
+    const timeout = setTimeout(() => {
+      state.waiting.splice(state.waiting.indexOf(wake), 1);
+      resolve(false);
+    }, QUEUE_TIMEOUT_MS);
+    state.waiting.push(wake);
+  });
+  return granted ? ticket(state, true) : reject(state, 'queue_timeout', 503, 1);
+}
+
+export function getAdmissionMetrics() {
+  const byRoute = {};
+  for (const [route, state] of routes) {
+    byRoute[route] = {
+      inFlight: state.inFlight,
+      queued: state.waiting.length,
+      admitted: state.admitted,
+      shed: { ...state.shed }
+    };
+  }
+  return { lagMs, lagThresholdMs: LAG_THRESHOLD_MS, clients: buckets.size, routes: byRoute };
+}
@@ -0,0 +1,40 @@
+// Stored token helpers (client-side)
+// Split from accessControl so the token session and client pages can read
+// and verify the stored token without bundling the feature tables.
+import { verifyToken, decodeTokenHeader } from './token';
+
+// Get token from storage (client-side)
+export function getStoredToken() {
+  if (typeof window === 'undefined') return null;
+  return localStorage.getItem('token');
+}
+
+// Get user from storage (client-side)
+export function getStoredUser() {
+  if (typeof window === 'undefined') return null;
+  const userStr = localStorage.getItem('user');
+  return userStr ? JSON.parse(userStr) : null;
+}
+
+// Verify and decode token
+export function verifyUserToken(token) {
+  if (!token) return { valid: false, error: 'No token provided' };
+  
+  // verifyToken is cached per token; only the header still needs decoding here
+  const verification = verifyToken(token);
+  if (!verification.valid) {
+    return verification;
+  }
+  
+  const decoded = decodeTokenHeader(token);
+  if (decoded.error) {
+    return { valid: false, error: decoded.error };
+  }
+  
+  return {
+    valid: true,
+    payload: verification.payload,
+    header: decoded.header,
+    tier: verification.payload.subscription || 'free'
+  };
+}
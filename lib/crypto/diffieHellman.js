@@ -1,41 +1,231 @@
 // Diffie-Hellman Key Exchange Implementation
 // For secure key negotiation
+//
+// All arithmetic is BigInt so the standard RFC 3526 MODP groups work alongside
+// the original toy group (P = 23, G = 5). G^x uses a fixed-base windowed table
+// built once per group; variable bases use sliding-window exponentiation.
+// Values for the toy group stay plain Numbers on the wire; larger groups use
+// '0x'-prefixed hex strings.
 
-// Modular exponentiation: (base^exp) % mod
-function modPow(base, exp, mod) {
-  let result = 1;
-  base = base % mod;
-  
-  while (exp > 0) {
-    if (exp % 2 === 1) {
-      result = (result * base) % mod;
+const FIXED_BASE_WINDOW = 5;
+
+function modpPrime(hex) {
+  return BigInt('0x' + hex.replace(/\s+/g, ''));
+}
+
+const MODP_1536 = `
+  FFFFFFFFFFFFFFFFC90FDAA22168C234C4C6628B80DC1CD129024E088A67CC74
+  020BBEA63B139B22514A08798E3404DDEF9519B3CD3A431B302B0A6DF25F1437
+  4FE1356D6D51C245E485B576625E7EC6F44C42E9A637ED6B0BFF5CB6F406B7ED
+  EE386BFB5A899FA5AE9F24117C4B1FE649286651ECE45B3DC2007CB8A163BF05
+  98DA48361C55D39A69163FA8FD24CF5F83655D23DCA3AD961C62F356208552BB
+  9ED529077096966D670C354E4ABC9804F1746C08CA237327FFFFFFFFFFFFFFFF`;
+
+const MODP_2048 = `
+  FFFFFFFFFFFFFFFFC90FDAA22168C234C4C6628B80DC1CD129024E088A67CC74
+  020BBEA63B139B22514A08798E3404DDEF9519B3CD3A431B302B0A6DF25F1437
+  4FE1356D6D51C245E485B576625E7EC6F44C42E9A637ED6B0BFF5CB6F406B7ED
+  EE386BFB5A899FA5AE9F24117C4B1FE649286651ECE45B3DC2007CB8A163BF05
+  98DA48361C55D39A69163FA8FD24CF5F83655D23DCA3AD961C62F356208552BB
+  9ED529077096966D670C354E4ABC9804F1746C08CA18217C32905E462E36CE3B
+  E39E772C180E86039B2783A2EC07A28FB5C55DF06F4C52C9DE2BCBF695581718
+  3995497CEA956AE515D2261898FA051015728E5A8AACAA68FFFFFFFFFFFFFFFF`;
+
+const MODP_3072 = `
+  FFFFFFFFFFFFFFFFC90FDAA22168C234C4C6628B80DC1CD129024E088A67CC74
+  020BBEA63B139B22514A08798E3404DDEF9519B3CD3A431B302B0A6DF25F1437
+  4FE1356D6D51C245E485B576625E7EC6F44C42E9A637ED6B0BFF5CB6F406B7ED
+  EE386BFB5A899FA5AE9F24117C4B1FE649286651ECE45B3DC2007CB8A163BF05
+  98DA48361C55D39A69163FA8FD24CF5F83655D23DCA3AD961C62F356208552BB
+  9ED529077096966D670C354E4ABC9804F1746C08CA18217C32905E462E36CE3B
+  E39E772C180E86039B2783A2EC07A28FB5C55DF06F4C52C9DE2BCBF695581718
+  3995497CEA956AE515D2261898FA051015728E5A8AAAC42DAD33170D04507A33
+  A85521ABDF1CBA64ECFB850458DBEF0A8AEA71575D060C7DB3970F85A6E1E4C7
+  ABF5AE8CDB0933D71E8C94E04A25619DCEE3D2261AD2EE6BF12FFA06D98A0864
+  D87602733EC86A64521F2B18177B200CBBE117577A615D6C770988C0BAD946E2
+  08E24FA074E5AB3143DB5BFCE0FD108E4B82D120A93AD2CAFFFFFFFFFFFFFFFF`;
+
+// Public parameters (shared by both parties)
+export const GROUPS = {
+  toy: { name: 'toy', p: 23n, g: 5n, bits: 5, exponentBits: 5, small: true },
+  modp1536: { name: 'modp1536', p: modpPrime(MODP_1536), g: 2n, bits: 1536, exponentBits: 256, small: false },
+  modp2048: { name: 'modp2048', p: modpPrime(MODP_2048), g: 2n, bits: 2048, exponentBits: 256, small: false },
+  modp3072: { name: 'modp3072', p: modpPrime(MODP_3072), g: 2n, bits: 3072, exponentBits: 256, small: false }
+};
+
+export const DEFAULT_GROUP = 'toy';
+
+const fixedBaseTables = new Map();
+
+export function getGroup(name = DEFAULT_GROUP) {
+  return Object.prototype.hasOwnProperty.call(GROUPS, name) ? GROUPS[name] : null;
+}
+
+function requireGroup(name) {
+  const group = getGroup(name);
+  if (!group) throw new Error('Unknown DH group: ' + name);
+  return group;
+}
+
+// Bad key material from the caller; code INVALID_DH_VALUE lets the API answer 400
+function invalidValue(message) {
+  const error = new Error(message);
+  error.code = 'INVALID_DH_VALUE';
+  return error;
+}
+
+function toBigInt(value) {
+  if (typeof value === 'bigint') return value;
+  if (typeof value === 'number' && Number.isInteger(value)) return BigInt(value);
+  if (typeof value === 'string' && /^(0x[0-9a-fA-F]+|[0-9]+)$/.test(value.trim())) {
+    return BigInt(value.trim());
+  }
+  throw invalidValue('Invalid DH value: ' + value);
+}
+
+function toWire(value, group) {
+  return group.small ? Number(value) : '0x' + value.toString(16);
+}
+
+function windowSizeFor(bits) {
+  if (bits <= 24) return 1;
+  if (bits <= 80) return 3;
+  if (bits <= 240) return 4;
+  if (bits <= 768) return 5;
+  return 6;
+}
+
+// Sliding-window modular exponentiation: (base^exp) % mod
+export function modPow(base, exp, mod) {
+  if (mod === 1n) return 0n;
+  base %= mod;
+  if (base < 0n) base += mod;
+  if (exp <= 0n) return 1n;
+
+  const bits = exp.toString(2);
+  const k = windowSizeFor(bits.length);
+
+  // Odd powers base^1, base^3, ..., base^(2^k - 1)
+  const odd = [base];
+  if (k > 1) {
+    const square = (base * base) % mod;
+    for (let i = 1; i < 1 << (k - 1); i++) {
+      odd.push((odd[i - 1] * square) % mod);
     }
-    exp = Math.floor(exp / 2);
-    base = (base * base) % mod;
   }
-  
+
+  let result = 1n;
+  let i = 0;
+  while (i < bits.length) {
+    if (bits[i] === '0') {
+      result = (result * result) % mod;
+      i++;
+      continue;
+    }
+    // Longest window of at most k bits that ends in a 1
+    let j = Math.min(i + k, bits.length);
+    while (bits[j - 1] === '0') j--;
+    for (let s = i; s < j; s++) {
+      result = (result * result) % mod;
+    }
+    result = (result * odd[(parseInt(bits.slice(i, j), 2) - 1) >> 1]) % mod;
+    i = j;
+  }
+
   return result;
 }
 
-// Public parameters (shared by both parties)
-const P = 23; // Prime number
-const G = 5;  // Primitive root modulo P
+// table[i * 2^w + d] = G^(d * 2^(w*i)) mod P, covering exponents up to
+// group.exponentBits bits
+function getFixedBaseTable(group) {
+  let table = fixedBaseTables.get(group.name);
+  if (!table) {
+    const w = FIXED_BASE_WINDOW;
+    const size = 1 << w;
+    const windows = Math.ceil(group.exponentBits / w);
+    const entries = new Array(windows * size);
+    let base = group.g % group.p;
+    for (let i = 0; i < windows; i++) {
+      entries[i * size] = 1n;
+      for (let d = 1; d < size; d++) {
+        entries[i * size + d] = (entries[i * size + d - 1] * base) % group.p;
+      }
+      base = (entries[i * size + size - 1] * base) % group.p;
+    }
+    table = { windows, size, entries };
+    fixedBaseTables.set(group.name, table);
+  }
+  return table;
+}
+
+// G^exp mod P using the precomputed table: one multiply per window, no squarings
+function fixedBasePow(group, exp) {
+  if (exp <= 0n) return 1n;
+  const table = getFixedBaseTable(group);
+  const w = FIXED_BASE_WINDOW;
+  const bits = exp.toString(2);
+  if (bits.length > table.windows * w) {
+    return modPow(group.g, exp, group.p);
+  }
+
+  let result = 1n;
+  for (let i = 0, end = bits.length; end > 0; i++, end -= w) {
+    const digit = parseInt(bits.slice(Math.max(0, end - w), end), 2);
+    if (digit !== 0) {
+      result = (result * table.entries[i * table.size + digit]) % group.p;
+    }
+  }
+  return result;
+}
+
+function randomExponent(group) {
+  if (group.small) {
+    // Generate private key (random number)
+    return BigInt(Math.floor(Math.random() * (Number(group.p) - 2)) + 2);
+  }
+
+  const bytes = new Uint8Array(group.exponentBits / 8);
+  if (globalThis.crypto?.getRandomValues) {
+    globalThis.crypto.getRandomValues(bytes);
+  } else {
+    for (let i = 0; i < bytes.length; i++) bytes[i] = Math.floor(Math.random() * 256);
+  }
+  bytes[0] |= 0x80;
+  let exp = 0n;
+  for (const byte of bytes) exp = (exp << 8n) | BigInt(byte);
+  return exp;
+}
+
+export function generateKeyPair(groupName = DEFAULT_GROUP) {
+  const group = requireGroup(groupName);
+  const privateKey = randomExponent(group);
 
-export function generateKeyPair() {
-  // Generate private key (random number)
-  const privateKey = Math.floor(Math.random() * (P - 2)) + 2;
-  
   // Calculate public key: G^privateKey mod P
-  const publicKey = modPow(G, privateKey, P);
-  
-  return { privateKey, publicKey };
+  const publicKey = fixedBasePow(group, privateKey);
+
+  return { privateKey: toWire(privateKey, group), publicKey: toWire(publicKey, group) };
 }
 
-export function computeSharedSecret(privateKey, otherPublicKey) {
+export function computeSharedSecret(privateKey, otherPublicKey, groupName = DEFAULT_GROUP) {
+  const group = requireGroup(groupName);
+  const exp = toBigInt(privateKey);
+  const otherKey = toBigInt(otherPublicKey);
+
+  if (exp < 1n) {
+    throw invalidValue('Invalid private key');
+  }
+  if (!group.small && (otherKey <= 1n || otherKey >= group.p - 1n)) {
+    throw invalidValue('Invalid public key');
+  }
+
   // Calculate shared secret: otherPublicKey^privateKey mod P
-  return modPow(otherPublicKey, privateKey, P);
+  return toWire(modPow(otherKey, exp, group.p), group);
 }
 
-export function getPublicParameters() {
-  return { P, G };
+export function getPublicParameters(groupName = DEFAULT_GROUP) {
+  const group = requireGroup(groupName);
+  if (group.small) {
+    return { P: Number(group.p), G: Number(group.g) };
+  }
+  return { P: toWire(group.p, group), G: Number(group.g), group: group.name, bits: group.bits };
 }
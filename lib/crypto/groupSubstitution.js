@@ -19,41 +19,58 @@ const SUBSTITUTION_MAP = {
   'w': 'd+dd', 'x': 'c+cc', 'y': 'b+bb', 'z': 'a+aa'
 };
 
-// Create reverse map for decryption
-const REVERSE_MAP = {};
+// Lookup tables built once from SUBSTITUTION_MAP:
+//   ENCODE_GROUPS[code]  -> group for an ASCII char code
+//   DECODE_BY_LEAD[code] -> plaintext char whose group starts with that code
+// Every mapped group has a distinct first character, so decoding a group is a
+// table lookup plus one startsWith check.
+const ENCODE_GROUPS = new Array(128).fill(null);
+const DECODE_BY_LEAD = new Array(128).fill(null);
 for (const [key, value] of Object.entries(SUBSTITUTION_MAP)) {
-  REVERSE_MAP[value] = key;
+  ENCODE_GROUPS[key.charCodeAt(0)] = value;
+  DECODE_BY_LEAD[value.charCodeAt(0)] = key;
 }
 
 export function encrypt(plaintext) {
-  const groups = [];
+  let encrypted = '';
   for (let i = 0; i < plaintext.length; i++) {
-    const char = plaintext[i];
-    if (SUBSTITUTION_MAP[char]) {
-      groups.push(SUBSTITUTION_MAP[char]);
+    const code = plaintext.charCodeAt(i);
+    const group = code < 128 ? ENCODE_GROUPS[code] : null;
+    if (i > 0) encrypted += '|';
+    if (group) {
+      encrypted += group;
     } else {
       // For unmapped characters, use a default pattern
-      groups.push(char + '+' + char + char);
+      const char = plaintext[i];
+      encrypted += char + '+' + char + char;
     }
   }
-  return groups.join('|');
+  return encrypted;
 }
 
 export function decrypt(ciphertext) {
   let decrypted = '';
-  const groups = ciphertext.split('|');
-  
-  for (const group of groups) {
-    if (REVERSE_MAP[group]) {
-      decrypted += REVERSE_MAP[group];
+  const length = ciphertext.length;
+  let start = 0;
+
+  while (start <= length) {
+    let end = ciphertext.indexOf('|', start);
+    if (end === -1) end = length;
+
+    const lead = ciphertext.charCodeAt(start);
+    const candidate = lead < 128 ? DECODE_BY_LEAD[lead] : null;
+    const group = candidate && SUBSTITUTION_MAP[candidate];
+    if (group && end - start === group.length && ciphertext.startsWith(group, start)) {
+      decrypted += candidate;
     } else {
-      // Handle unmapped groups - extract first character before +
-      const parts = group.split('+');
-      if (parts.length > 0) {
-        decrypted += parts[0];
-      }
+      // Handle unmapped groups - extract everything before the first +
+      const plus = ciphertext.indexOf('+', start);
+      decrypted += ciphertext.slice(start, plus !== -1 && plus < end ? plus : end);
     }
+
+    if (end === length) break;
+    start = end + 1;
   }
-  
+
   return decrypted;
 }
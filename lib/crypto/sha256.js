@@ -0,0 +1,130 @@
+// SHA-256 and HMAC-SHA256 (FIPS 180-4, RFC 2104)
+// Produces the fixed-size signature of v2 tokens. Synchronous and free of
+// external libraries, so tokens sign and verify identically in the browser
+// and on the server.
+
+const K = new Int32Array([
+  0x428a2f98, 0x71374491, 0xb5c0fbcf, 0xe9b5dba5, 0x3956c25b, 0x59f111f1, 0x923f82a4, 0xab1c5ed5,
+  0xd807aa98, 0x12835b01, 0x243185be, 0x550c7dc3, 0x72be5d74, 0x80deb1fe, 0x9bdc06a7, 0xc19bf174,
+  0xe49b69c1, 0xefbe4786, 0x0fc19dc6, 0x240ca1cc, 0x2de92c6f, 0x4a7484aa, 0x5cb0a9dc, 0x76f988da,
+  0x983e5152, 0xa831c66d, 0xb00327c8, 0xbf597fc7, 0xc6e00bf3, 0xd5a79147, 0x06ca6351, 0x14292967,
+  0x27b70a85, 0x2e1b2138, 0x4d2c6dfc, 0x53380d13, 0x650a7354, 0x766a0abb, 0x81c2c92e, 0x92722c85,
+  0xa2bfe8a1, 0xa81a664b, 0xc24b8b70, 0xc76c51a3, 0xd192e819, 0xd6990624, 0xf40e3585, 0x106aa070,
+  0x19a4c116, 0x1e376c08, 0x2748774c, 0x34b0bcb5, 0x391c0cb3, 0x4ed8aa4a, 0x5b9cca4f, 0x682e6ff3,
+  0x748f82ee, 0x78a5636f, 0x84c87814, 0x8cc70208, 0x90befffa, 0xa4506ceb, 0xbef9a3f7, 0xc67178f2
+]);
+
+const IV = [
+  0x6a09e667, 0xbb67ae85, 0x3c6ef372, 0xa54ff53a, 0x510e527f, 0x9b05688c, 0x1f83d9ab, 0x5be0cd19
+];
+
+const BLOCK_SIZE = 64;
+const W = new Int32Array(64);
+const tail = new Uint8Array(BLOCK_SIZE * 2);
+const utf8 = new TextEncoder();
+
+// Fold one 64-byte block of `bytes` at `offset` into `state`
+function compress(state, bytes, offset) {
+  for (let i = 0; i < 16; i++) {
+    const j = offset + i * 4;
+    W[i] = (bytes[j] << 24) | (bytes[j + 1] << 16) | (bytes[j + 2] << 8) | bytes[j + 3];
+  }
+  for (let i = 16; i < 64; i++) {
+    const w15 = W[i - 15];
+    const w2 = W[i - 2];
+    const s0 = ((w15 >>> 7) | (w15 << 25)) ^ ((w15 >>> 18) | (w15 << 14)) ^ (w15 >>> 3);
+    const s1 = ((w2 >>> 17) | (w2 << 15)) ^ ((w2 >>> 19) | (w2 << 13)) ^ (w2 >>> 10);
+    W[i] = (W[i - 16] + s0 + W[i - 7] + s1) | 0;
+  }
+
+  let a = state[0], b = state[1], c = state[2], d = state[3];
+  let e = state[4], f = state[5], g = state[6], h = state[7];
+  for (let i = 0; i < 64; i++) {
+    const S1 = ((e >>> 6) | (e << 26)) ^ ((e >>> 11) | (e << 21)) ^ ((e >>> 25) | (e << 7));
+    const ch = (e & f) ^ (~e & g);
+    const t1 = (h + S1 + ch + K[i] + W[i]) | 0;
+    const S0 = ((a >>> 2) | (a << 30)) ^ ((a >>> 13) | (a << 19)) ^ ((a >>> 22) | (a << 10));
+    const maj = (a & b) ^ (a & c) ^ (b & c);
+    const t2 = (S0 + maj) | 0;
+    h = g;
+    g = f;
+    f = e;
+    e = (d + t1) | 0;
+    d = c;
+    c = b;
+    b = a;
+    a = (t1 + t2) | 0;
+  }
+  state[0] = (state[0] + a) | 0;
+  state[1] = (state[1] + b) | 0;
+  state[2] = (state[2] + c) | 0;
+  state[3] = (state[3] + d) | 0;
+  state[4] = (state[4] + e) | 0;
+  state[5] = (state[5] + f) | 0;
+  state[6] = (state[6] + g) | 0;
+  state[7] = (state[7] + h) | 0;
+}
+
+// Hash `bytes` starting from `initial`, which has already absorbed
+// `prefixLength` bytes (a whole number of blocks)
+function finish(initial, prefixLength, bytes) {
+  const state = Int32Array.from(initial);
+  const fullBlocks = bytes.length - (bytes.length % BLOCK_SIZE);
+  for (let offset = 0; offset < fullBlocks; offset += BLOCK_SIZE) {
+    compress(state, bytes, offset);
+  }
+
+  // Padding: 0x80, zeros, then the message length in bits (big-endian)
+  const remaining = bytes.length - fullBlocks;
+  const tailLength = remaining < 56 ? BLOCK_SIZE : BLOCK_SIZE * 2;
+  tail.fill(0, 0, tailLength);
+  tail.set(bytes.subarray(fullBlocks), 0);
+  tail[remaining] = 0x80;
+  const bitLength = (prefixLength + bytes.length) * 8;
+  const high = Math.floor(bitLength / 0x100000000);
+  tail[tailLength - 8] = high >>> 24;
+  tail[tailLength - 7] = high >>> 16;
+  tail[tailLength - 6] = high >>> 8;
+  tail[tailLength - 5] = high;
+  tail[tailLength - 4] = bitLength >>> 24;
+  tail[tailLength - 3] = bitLength >>> 16;
+  tail[tailLength - 2] = bitLength >>> 8;
+  tail[tailLength - 1] = bitLength;
+  compress(state, tail, 0);
+  if (tailLength > BLOCK_SIZE) compress(state, tail, BLOCK_SIZE);
+
+  const digest = new Uint8Array(32);
+  for (let i = 0; i < 8; i++) {
+    digest[i * 4] = state[i] >>> 24;
+    digest[i * 4 + 1] = state[i] >>> 16;
+    digest[i * 4 + 2] = state[i] >>> 8;
+    digest[i * 4 + 3] = state[i];
+  }
+  return digest;
+}
+
+function toBytes(data) {
+  return typeof data === 'string' ? utf8.encode(data) : data;
+}
+
+export function sha256(data) {
+  return finish(IV, 0, toBytes(data));
+}
+
+// Returns mac(data) -> 32-byte digest. The ipad/opad blocks are absorbed
+// once here, so each MAC only hashes the message plus one outer block.
+export function createHmacSha256(key) {
+  let keyBytes = toBytes(key);
+  if (keyBytes.length > BLOCK_SIZE) keyBytes = sha256(keyBytes);
+
+  const pad = new Uint8Array(BLOCK_SIZE);
+  const inner = Int32Array.from(IV);
+  const outer = Int32Array.from(IV);
+  pad.set(keyBytes);
+  for (let i = 0; i < BLOCK_SIZE; i++) pad[i] ^= 0x36;
+  compress(inner, pad, 0);
+  for (let i = 0; i < BLOCK_SIZE; i++) pad[i] ^= 0x36 ^ 0x5c;
+  compress(outer, pad, 0);
+
+  return (data) => finish(outer, BLOCK_SIZE, finish(inner, BLOCK_SIZE, toBytes(data)));
+}
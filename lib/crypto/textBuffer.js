@@ -0,0 +1,38 @@
+// Reusable char-code buffers for the table-driven ciphers
+// Ciphers write output char codes into a shared scratch array and convert it
+// to a string once, instead of growing a string one character at a time.
+
+const CHUNK_SIZE = 8192;
+
+// windows-1252 decodes bytes < 0x80 exactly as ASCII
+const asciiDecoder = typeof TextDecoder !== 'undefined' ? new TextDecoder('latin1') : null;
+
+let scratch8 = new Uint8Array(1024);
+let scratch16 = new Uint16Array(1024);
+
+export function byteBuffer(length) {
+  if (scratch8.length < length) {
+    scratch8 = new Uint8Array(Math.max(length, scratch8.length * 2));
+  }
+  return scratch8;
+}
+
+export function wideBuffer(length) {
+  if (scratch16.length < length) {
+    scratch16 = new Uint16Array(Math.max(length, scratch16.length * 2));
+  }
+  return scratch16;
+}
+
+export function codesToString(codes, length) {
+  const parts = [];
+  for (let i = 0; i < length; i += CHUNK_SIZE) {
+    parts.push(String.fromCharCode.apply(null, codes.subarray(i, Math.min(i + CHUNK_SIZE, length))));
+  }
+  return parts.join('');
+}
+
+// Bytes must all be < 0x80
+export function asciiToString(bytes, length) {
+  return asciiDecoder ? asciiDecoder.decode(bytes.subarray(0, length)) : codesToString(bytes, length);
+}
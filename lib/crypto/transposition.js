@@ -1,15 +1,156 @@
 // Transposition Cipher for Signature Encryption
 // Rearranges characters based on a numeric key
+//
+// The column order is computed once per key and the read/write index
+// permutation once per (key, length). Encrypt/decrypt are then a single pass
+// over a preallocated buffer; output (including 'X' padding) matches the
+// original grid implementation exactly.
+
+import { asciiToString, byteBuffer, codesToString, wideBuffer } from './textBuffer.js';
+
+const PAD = 88; // 'X'
+const PERMUTATION_CACHE_SIZE = 64;
+
+const columnOrders = new Map();
+const permutations = new Map();
+
+// Columns in the order they are read: ascending digit, ties by position
+function getColumnOrder(key) {
+  let order = columnOrders.get(key);
+  if (order === undefined) {
+    if (!/^[0-9]+$/.test(key)) {
+      order = null;
+    } else {
+      const keyArray = key.split('').map(Number);
+      const sorted = keyArray.map((val, idx) => ({ val, idx })).sort((a, b) => a.val - b.val);
+      const columns = Int32Array.from(sorted, ({ idx }) => idx);
+      const rank = new Int32Array(columns.length);
+      columns.forEach((col, r) => {
+        rank[col] = r;
+      });
+      order = { columns, rank };
+    }
+    columnOrders.set(key, order);
+  }
+  return order;
+}
+
+function cachePermutation(cacheKey, perm) {
+  if (permutations.size >= PERMUTATION_CACHE_SIZE) {
+    permutations.delete(permutations.keys().next().value);
+  }
+  permutations.set(cacheKey, perm);
+  return perm;
+}
+
+// perm[k] = plaintext index written to ciphertext position k, or -1 for padding
+function getEncryptPermutation(key, order, length) {
+  const cacheKey = 'e' + length + ':' + key;
+  const cached = permutations.get(cacheKey);
+  if (cached) return cached;
+
+  const numCols = order.columns.length;
+  const numRows = Math.ceil(length / numCols);
+  const perm = new Int32Array(numRows * numCols);
+  let k = 0;
+  for (let c = 0; c < numCols; c++) {
+    const col = order.columns[c];
+    for (let row = 0; row < numRows; row++) {
+      const src = row * numCols + col;
+      perm[k++] = src < length ? src : -1;
+    }
+  }
+  return cachePermutation(cacheKey, perm);
+}
+
+// perm[k] = ciphertext index of grid cell k (row-major), or -1 for an empty cell
+function getDecryptPermutation(key, order, length) {
+  const cacheKey = 'd' + length + ':' + key;
+  const cached = permutations.get(cacheKey);
+  if (cached) return cached;
+
+  const numCols = order.columns.length;
+  const numRows = Math.ceil(length / numCols);
+  const perm = new Int32Array(numRows * numCols);
+  let k = 0;
+  for (let row = 0; row < numRows; row++) {
+    for (let col = 0; col < numCols; col++) {
+      const src = order.rank[col] * numRows + row;
+      perm[k++] = src < length ? src : -1;
+    }
+  }
+  return cachePermutation(cacheKey, perm);
+}
+
+function encryptWith(plaintext, perm, out) {
+  const total = perm.length;
+  for (let k = 0; k < total; k++) {
+    const src = perm[k];
+    out[k] = src < 0 ? PAD : plaintext.charCodeAt(src);
+  }
+  return total;
+}
+
+function decryptWith(ciphertext, perm, lastRowStart, out) {
+  const total = perm.length;
+  let n = 0;
+  for (let k = 0; k < total; k++) {
+    const src = perm[k];
+    if (src < 0) continue;
+    const code = ciphertext.charCodeAt(src);
+    // Padding is dropped from the last row only
+    if (code === PAD && k >= lastRowStart) continue;
+    out[n++] = code;
+  }
+  // Remove trailing padding
+  while (n > 0 && out[n - 1] === PAD) n--;
+  return n;
+}
+
+function isAscii(text) {
+  for (let i = 0; i < text.length; i++) {
+    if (text.charCodeAt(i) >= 128) return false;
+  }
+  return true;
+}
 
 export function encrypt(plaintext, key = '34152') {
+  const order = getColumnOrder(key);
+  if (!order) return encryptLegacy(plaintext, key);
+
+  const perm = getEncryptPermutation(key, order, plaintext.length);
+  if (isAscii(plaintext)) {
+    const out = byteBuffer(perm.length);
+    return asciiToString(out, encryptWith(plaintext, perm, out));
+  }
+  const out = wideBuffer(perm.length);
+  return codesToString(out, encryptWith(plaintext, perm, out));
+}
+
+export function decrypt(ciphertext, key = '34152') {
+  const order = getColumnOrder(key);
+  if (!order) return decryptLegacy(ciphertext, key);
+
+  const perm = getDecryptPermutation(key, order, ciphertext.length);
+  const lastRowStart = perm.length - order.columns.length;
+  if (isAscii(ciphertext)) {
+    const out = byteBuffer(perm.length);
+    return asciiToString(out, decryptWith(ciphertext, perm, lastRowStart, out));
+  }
+  const out = wideBuffer(perm.length);
+  return codesToString(out, decryptWith(ciphertext, perm, lastRowStart, out));
+}
+
+// Reference grid implementation, kept for keys that are not all digits
+function encryptLegacy(plaintext, key) {
   const keyArray = key.split('').map(Number);
   const numCols = keyArray.length;
   const numRows = Math.ceil(plaintext.length / numCols);
-  
+
   // Create grid
   const grid = [];
   let textIndex = 0;
-  
+
   for (let row = 0; row < numRows; row++) {
     grid[row] = [];
     for (let col = 0; col < numCols; col++) {
@@ -20,31 +161,31 @@ export function encrypt(plaintext, key = '34152') {
       }
     }
   }
-  
+
   // Read columns in key order
   let encrypted = '';
   const sortedKey = keyArray.map((val, idx) => ({ val, idx })).sort((a, b) => a.val - b.val);
-  
+
   for (const { idx } of sortedKey) {
     for (let row = 0; row < numRows; row++) {
       encrypted += grid[row][idx];
     }
   }
-  
+
   return encrypted;
 }
 
-export function decrypt(ciphertext, key = '34152') {
+function decryptLegacy(ciphertext, key) {
   const keyArray = key.split('').map(Number);
   const numCols = keyArray.length;
   const numRows = Math.ceil(ciphertext.length / numCols);
-  
+
   // Create empty grid
   const grid = Array(numRows).fill(null).map(() => Array(numCols).fill(''));
-  
+
   // Determine column order
   const sortedKey = keyArray.map((val, idx) => ({ val, idx })).sort((a, b) => a.val - b.val);
-  
+
   // Fill grid column by column in sorted key order
   let textIndex = 0;
   for (const { idx } of sortedKey) {
@@ -54,7 +195,7 @@ export function decrypt(ciphertext, key = '34152') {
       }
     }
   }
-  
+
   // Read grid row by row
   let decrypted = '';
   for (let row = 0; row < numRows; row++) {
@@ -64,7 +205,7 @@ export function decrypt(ciphertext, key = '34152') {
       }
     }
   }
-  
+
   // Remove padding
   return decrypted.replace(/X+$/, '');
 }
@@ -1,20 +1,97 @@
 // Vigenère Cipher for Payload Encryption
 // Polyalphabetic substitution cipher using a key
+//
+// createVigenere(key) precomputes, for every key position, a char-code table
+// mapping each ASCII input character to its shifted output. Encrypt/decrypt
+// then run a single pass over a reusable typed array with no per-character
+// allocation. Output is identical to the original indexOf-based cipher.
+
+import { asciiToString, byteBuffer, codesToString, wideBuffer } from './textBuffer.js';
 
 const ALPHABET = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789 .,;:!?-_';
 
-export function encrypt(plaintext, key = 'SECRETKEY') {
+// Char code -> index in ALPHABET (-1 if not in the alphabet); ALPHABET is ASCII
+const CHAR_INDEX = new Int16Array(128).fill(-1);
+for (let i = 0; i < ALPHABET.length; i++) {
+  CHAR_INDEX[ALPHABET.charCodeAt(i)] = i;
+}
+
+const CONTEXT_CACHE_SIZE = 32;
+const contexts = new Map();
+
+// Flat table indexed by (keyPosition << 7) | charCode
+function buildTable(shifts, direction) {
+  const n = ALPHABET.length;
+  const table = new Uint8Array(shifts.length << 7);
+  shifts.forEach((shift, position) => {
+    for (let code = 0; code < 128; code++) {
+      const index = CHAR_INDEX[code];
+      table[(position << 7) | code] = index === -1
+        ? code
+        : ALPHABET.charCodeAt((((index + direction * shift) % n) + n) % n);
+    }
+  });
+  return table;
+}
+
+// ASCII fast path; returns null as soon as a non-ASCII character shows up
+function transformAscii(text, table, keyLength) {
+  const length = text.length;
+  const out = byteBuffer(length);
+  let keyOffset = 0;
+  const keyEnd = keyLength << 7;
+
+  for (let i = 0; i < length; i++) {
+    const code = text.charCodeAt(i);
+    if (code >= 128) return null;
+    out[i] = table[keyOffset | code];
+    if (CHAR_INDEX[code] !== -1) {
+      keyOffset += 128;
+      if (keyOffset === keyEnd) keyOffset = 0;
+    }
+  }
+
+  return asciiToString(out, length);
+}
+
+function transformWide(text, table, keyLength) {
+  const length = text.length;
+  const out = wideBuffer(length);
+  let keyOffset = 0;
+  const keyEnd = keyLength << 7;
+
+  for (let i = 0; i < length; i++) {
+    const code = text.charCodeAt(i);
+    if (code < 128 && CHAR_INDEX[code] !== -1) {
+      out[i] = table[keyOffset | code];
+      keyOffset += 128;
+      if (keyOffset === keyEnd) keyOffset = 0;
+    } else {
+      out[i] = code;
+    }
+  }
+
+  return codesToString(out, length);
+}
+
+function transform(text, table, keyLength) {
+  return transformAscii(text, table, keyLength) ?? transformWide(text, table, keyLength);
+}
+
+// Reference implementation, kept for keys containing characters outside
+// ALPHABET (their shift is -1, which the table form cannot reproduce)
+function encryptLegacy(plaintext, key) {
   let encrypted = '';
   let keyIndex = 0;
-  
+
   for (let i = 0; i < plaintext.length; i++) {
     const char = plaintext[i];
     const charIndex = ALPHABET.indexOf(char);
-    
+
     if (charIndex !== -1) {
       const keyChar = key[keyIndex % key.length];
       const keyCharIndex = ALPHABET.indexOf(keyChar.toUpperCase());
-      
+
       // Shift character by key character position
       const newIndex = (charIndex + keyCharIndex) % ALPHABET.length;
       encrypted += ALPHABET[newIndex];
@@ -23,32 +100,73 @@ export function encrypt(plaintext, key = 'SECRETKEY') {
       encrypted += char;
     }
   }
-  
+
   return encrypted;
 }
 
-export function decrypt(ciphertext, key = 'SECRETKEY') {
+function decryptLegacy(ciphertext, key) {
   let decrypted = '';
   let keyIndex = 0;
-  
+
   for (let i = 0; i < ciphertext.length; i++) {
     const char = ciphertext[i];
     const charIndex = ALPHABET.indexOf(char);
-    
+
     if (charIndex !== -1) {
       const keyChar = key[keyIndex % key.length];
       const keyCharIndex = ALPHABET.indexOf(keyChar.toUpperCase());
-      
+
       // Reverse shift
       let newIndex = (charIndex - keyCharIndex) % ALPHABET.length;
       if (newIndex < 0) newIndex += ALPHABET.length;
-      
+
       decrypted += ALPHABET[newIndex];
       keyIndex++;
     } else {
       decrypted += char;
     }
   }
-  
+
   return decrypted;
 }
+
+// Build a reusable cipher context for one key
+export function createVigenere(key = 'SECRETKEY') {
+  const shifts = Array.from(key, (keyChar) => ALPHABET.indexOf(keyChar.toUpperCase()));
+
+  if (key.length === 0 || key.length !== shifts.length || shifts.some((shift) => shift < 0)) {
+    return {
+      key,
+      encrypt: (plaintext) => encryptLegacy(plaintext, key),
+      decrypt: (ciphertext) => decryptLegacy(ciphertext, key)
+    };
+  }
+
+  const encryptTable = buildTable(shifts, 1);
+  const decryptTable = buildTable(shifts, -1);
+  return {
+    key,
+    encrypt: (plaintext) => transform(plaintext, encryptTable, shifts.length),
+    decrypt: (ciphertext) => transform(ciphertext, decryptTable, shifts.length)
+  };
+}
+
+function getContext(key) {
+  let context = contexts.get(key);
+  if (!context) {
+    context = createVigenere(key);
+    if (contexts.size >= CONTEXT_CACHE_SIZE) {
+      contexts.delete(contexts.keys().next().value);
+    }
+    contexts.set(key, context);
+  }
+  return context;
+}
+
+export function encrypt(plaintext, key = 'SECRETKEY') {
+  return getContext(key).encrypt(plaintext);
+}
+
+export function decrypt(ciphertext, key = 'SECRETKEY') {
+  return getContext(key).decrypt(ciphertext);
+}
@@ -1,46 +1,322 @@
 // Simple JSON database operations
+// Users are kept resident in memory and indexed by email and id; the file is
+// only re-read when its mtime changes (e.g. edited by hand or another process).
+//
+// Writes go to an append-only journal (one JSON mutation per line). Mutations
+// arriving while a flush is in progress are batched into the next group commit,
+// so a burst of writes costs one append + fsync instead of one full rewrite each.
+// A mutation only reaches the resident store once its batch is on disk, so a
+// failed commit is never visible to readers or folded into a snapshot.
+// Once the journal grows past COMPACT_THRESHOLD records it is folded into a new
+// users.json snapshot and truncated.
 import fs from 'fs';
 import path from 'path';
 
 const DB_PATH = path.join(process.cwd(), 'data', 'users.json');
+const JOURNAL_PATH = path.join(process.cwd(), 'data', 'users.journal');
+const COMPACT_THRESHOLD = 1000;
 
-export function readDB() {
+let store = null;      // { users, byEmail, byId, mtimeMs }
+let loading = null;    // in-flight load, shared by concurrent callers
+
+let queue = [];        // [{ record, resolve, reject }] waiting for the next commit
+let flushing = null;   // promise of the running flush loop
+let journalHandle = null;
+let journalRecords = 0;
+let compactWaiters = [];  // callers of compactDB() waiting for the next snapshot
+// Emails and ids of creates still waiting for their commit
+const reservedEmails = new Set();
+const reservedIds = new Set();
+
+function buildStore(data, mtimeMs) {
+  const users = Array.isArray(data?.users) ? data.users : [];
+  const byEmail = new Map();
+  const byId = new Map();
+  users.forEach((user, index) => {
+    byEmail.set(user.email, index);
+    byId.set(user.id, index);
+  });
+  return { users, byEmail, byId, mtimeMs };
+}
+
+// Apply one mutation to the resident store. Replaying a record that is already
+// reflected in the snapshot leaves the store unchanged.
+function applyRecord(db, record) {
+  if (record.op === 'create') {
+    const existing = db.byId.get(record.user.id);
+    if (existing !== undefined) {
+      db.users[existing] = record.user;
+      db.byEmail.set(record.user.email, existing);
+      return record.user;
+    }
+    const index = db.users.push(record.user) - 1;
+    db.byEmail.set(record.user.email, index);
+    db.byId.set(record.user.id, index);
+    return record.user;
+  }
+
+  if (record.op === 'update') {
+    const index = db.byEmail.get(record.email);
+    if (index === undefined) return null;
+    db.users[index] = { ...db.users[index], ...record.updates };
+    return db.users[index];
+  }
+
+  return null;
+}
+
+async function statMtime() {
+  try {
+    const stat = await fs.promises.stat(DB_PATH);
+    return stat.mtimeMs;
+  } catch (error) {
+    return 0;
+  }
+}
+
+// Returns the replayable records plus the byte length they span (validBytes)
+// and the file size; anything past validBytes is a torn tail
+async function readJournal() {
+  let bytes;
   try {
-    const data = fs.readFileSync(DB_PATH, 'utf8');
+    bytes = await fs.promises.readFile(JOURNAL_PATH);
+  } catch (error) {
+    return { records: [], validBytes: 0, size: 0 };
+  }
+
+  const records = [];
+  let validBytes = 0;
+  while (validBytes < bytes.length) {
+    const end = bytes.indexOf(0x0a, validBytes);
+    // A line without its newline was never acknowledged (appends end in one)
+    if (end === -1) break;
+    const line = bytes.toString('utf8', validBytes, end);
+    if (line) {
+      try {
+        records.push(JSON.parse(line));
+      } catch (error) {
+        // A torn line was never acknowledged; stop replaying there
+        break;
+      }
+    }
+    validBytes = end + 1;
+  }
+  return { records, validBytes, size: bytes.length };
+}
+
+async function writeFileDurable(filePath, contents) {
+  const tmpPath = filePath + '.tmp';
+  const handle = await fs.promises.open(tmpPath, 'w');
+  try {
+    await handle.writeFile(contents);
+    await handle.sync();
+  } finally {
+    await handle.close();
+  }
+  await fs.promises.rename(tmpPath, filePath);
+  // The rename itself is only durable once the directory entry is synced
+  const dir = await fs.promises.open(path.dirname(filePath), 'r');
+  try {
+    await dir.sync();
+  } finally {
+    await dir.close();
+  }
+}
+
+export async function readDB() {
+  try {
+    const data = await fs.promises.readFile(DB_PATH, 'utf8');
     return JSON.parse(data);
   } catch (error) {
     return { users: [] };
   }
 }
 
-export function writeDB(data) {
-  fs.writeFileSync(DB_PATH, JSON.stringify(data, null, 2));
+export async function writeDB(data) {
+  await writeFileDurable(DB_PATH, JSON.stringify(data, null, 2));
 }
 
-export function findUser(email) {
-  const db = readDB();
-  return db.users.find(u => u.email === email);
+// Return the resident store, reloading snapshot + journal only if the
+// snapshot changed on disk behind our back
+async function getStore() {
+  if (store && (flushing || queue.length > 0)) return store;
+
+  const mtimeMs = await statMtime();
+  if (store && store.mtimeMs === mtimeMs) return store;
+
+  if (!loading) {
+    loading = (async () => {
+      const db = buildStore(await readDB(), mtimeMs);
+      const { records, validBytes, size } = await readJournal();
+      if (validBytes < size) {
+        // Cut the torn tail off before anything is appended after it, or the
+        // next replay would stop there and drop every later write
+        console.warn(`Discarding ${size - validBytes} torn bytes at the end of the DB journal`);
+        await fs.promises.truncate(JOURNAL_PATH, validBytes);
+      }
+      for (const record of records) {
+        applyRecord(db, record);
+      }
+      journalRecords = records.length;
+      store = db;
+      return store;
+    })().finally(() => {
+      loading = null;
+    });
+  }
+  return loading;
 }
 
-export function createUser(user) {
-  const db = readDB();
+async function openJournal() {
+  if (!journalHandle) {
+    journalHandle = await fs.promises.open(JOURNAL_PATH, 'a');
+  }
+  return journalHandle;
+}
+
+// Fold the journal into a fresh snapshot. Only called from the flush loop
+// with an empty queue, so the snapshot is exactly the committed state and no
+// append can race the truncate.
+async function compact() {
+  const contents = JSON.stringify({ users: store.users }, null, 2);
+  await writeFileDurable(DB_PATH, contents);
+  store.mtimeMs = await statMtime();
+
+  const handle = await openJournal();
+  await handle.truncate(0);
+  await handle.sync();
+  journalRecords = 0;
+}
+
+async function flushLoop() {
+  while (queue.length > 0 || compactWaiters.length > 0) {
+    if (queue.length > 0) {
+      const batch = queue;
+      queue = [];
+      let handle = null;
+      let size = null;
+      try {
+        handle = await openJournal();
+        size = (await handle.stat()).size;
+        const lines = batch.map(({ record }) => JSON.stringify(record) + '\n').join('');
+        await handle.write(lines);
+        await handle.datasync();
+      } catch (error) {
+        // Drop whatever part of the batch did land, or a restart would replay
+        // writes their callers were told had failed
+        if (handle && size !== null) await handle.truncate(size).catch(() => {});
+        batch.forEach(({ reject }) => reject(error));
+        continue;
+      }
+      journalRecords += batch.length;
+      batch.forEach(({ record, resolve }) => resolve(applyRecord(store, record)));
+    }
+
+    if (queue.length === 0 && (journalRecords >= COMPACT_THRESHOLD || compactWaiters.length > 0)) {
+      const waiters = compactWaiters;
+      compactWaiters = [];
+      try {
+        await compact();
+        waiters.forEach(({ resolve }) => resolve());
+      } catch (error) {
+        console.error('DB compaction failed:', error);
+        waiters.forEach(({ reject }) => reject(error));
+      }
+    }
+  }
+}
+
+function scheduleFlush() {
+  if (!flushing) {
+    flushing = new Promise((resolve) => setImmediate(resolve))
+      .then(flushLoop)
+      .finally(() => {
+        flushing = null;
+      });
+  }
+}
+
+// Queue a record for the next group commit; resolves with applyRecord's
+// result once it is on disk and applied to the store
+function commit(record) {
+  const committed = new Promise((resolve, reject) => {
+    queue.push({ record, resolve, reject });
+  });
+  scheduleFlush();
+  return committed;
+}
+
+// Snapshot all committed writes and reset the journal
+export async function compactDB() {
+  await getStore();
+  const compacted = new Promise((resolve, reject) => {
+    compactWaiters.push({ resolve, reject });
+  });
+  scheduleFlush();
+  return compacted;
+}
+
+export async function findUser(email) {
+  const db = await getStore();
+  const index = db.byEmail.get(email);
+  return index === undefined ? undefined : db.users[index];
+}
+
+export async function findUserById(id) {
+  const db = await getStore();
+  const index = db.byId.get(id);
+  return index === undefined ? undefined : db.users[index];
+}
+
+// Throws an error with code USER_EXISTS if the email is taken, counting
+// creates that are still committing. Checked here because callers await
+// between their own lookup and this call.
+export async function createUser(user) {
+  const db = await getStore();
+  if (db.byEmail.has(user.email) || reservedEmails.has(user.email)) {
+    const error = new Error('User already exists');
+    error.code = 'USER_EXISTS';
+    throw error;
+  }
+
+  let id = Date.now();
+  while (db.byId.has(id.toString()) || reservedIds.has(id.toString())) id++;
+
   const newUser = {
-    id: Date.now().toString(),
+    id: id.toString(),
     ...user,
     createdAt: new Date().toISOString()
   };
-  db.users.push(newUser);
-  writeDB(db);
-  return newUser;
+  reservedEmails.add(newUser.email);
+  reservedIds.add(newUser.id);
+  try {
+    return await commit({ op: 'create', user: newUser });
+  } finally {
+    reservedEmails.delete(newUser.email);
+    reservedIds.delete(newUser.id);
+  }
 }
 
-export function updateUser(email, updates) {
-  const db = readDB();
-  const userIndex = db.users.findIndex(u => u.email === email);
-  if (userIndex !== -1) {
-    db.users[userIndex] = { ...db.users[userIndex], ...updates };
-    writeDB(db);
-    return db.users[userIndex];
-  }
-  return null;
+export async function updateUser(email, updates) {
+  const db = await getStore();
+  if (!db.byEmail.has(email)) return null;
+
+  return commit({ op: 'update', email, updates });
+}
+
+// Sizes of the snapshot and journal files, for metrics
+export async function getDBStats() {
+  const sizeOf = async (filePath) => {
+    try {
+      return (await fs.promises.stat(filePath)).size;
+    } catch (error) {
+      return 0;
+    }
+  };
+  return {
+    users: store ? store.users.length : 0,
+    snapshotBytes: await sizeOf(DB_PATH),
+    journalBytes: await sizeOf(JOURNAL_PATH),
+    journalRecords
+  };
 }
@@ -0,0 +1,132 @@
+// Pre-generated Diffie-Hellman key-pair pool (server only)
+// A worker thread keeps each group's pool between the low and high watermarks
+// so /api/dh/generate pops a ready pair in O(1) instead of running the modular
+// exponentiation on the request thread. An empty pool falls back to inline
+// generation and counts as a miss.
+import { Worker } from 'worker_threads';
+import { generateKeyPair } from './crypto/diffieHellman.js';
+
+function watermark(name, fallback) {
+  const value = Math.floor(Number(process.env[name]));
+  return Number.isFinite(value) && value >= 0 ? value : fallback;
+}
+
+const LOW_WATERMARK = watermark('DH_POOL_LOW', 16);
+// A refill asks the worker for HIGH - depth pairs, so HIGH must stay above LOW
+// or the request is empty, no final reply comes back and the pool never refills
+const HIGH_WATERMARK = Math.max(watermark('DH_POOL_HIGH', 64), LOW_WATERMARK + 1);
+if (process.env.DH_POOL_HIGH && HIGH_WATERMARK !== watermark('DH_POOL_HIGH', 64)) {
+  console.warn(`DH_POOL_HIGH must be above DH_POOL_LOW (${LOW_WATERMARK}); using ${HIGH_WATERMARK}`);
+}
+
+const pools = new Map();   // group -> pool state
+let worker = null;
+let workerStarted = false; // the current worker has replied at least once
+let workerFailed = false;
+
+function getPool(group) {
+  let pool = pools.get(group);
+  if (!pool) {
+    pool = {
+      pairs: [],
+      refilling: false,
+      hits: 0,
+      misses: 0,
+      generated: 0,
+      refills: 0,
+      firstRefillAt: 0,
+      lastRefillAt: 0
+    };
+    pools.set(group, pool);
+  }
+  return pool;
+}
+
+function onWorkerMessage({ group, pairs, error, final }) {
+  workerStarted = true;
+  const pool = getPool(group);
+  if (error) {
+    console.error('DH key pool refill failed:', error);
+  } else {
+    const now = Date.now();
+    if (!pool.firstRefillAt) pool.firstRefillAt = now;
+    pool.lastRefillAt = now;
+    pool.generated += pairs.length;
+    pool.refills++;
+    for (const pair of pairs) {
+      if (pool.pairs.length < HIGH_WATERMARK) pool.pairs.push(pair);
+    }
+  }
+  if (final) pool.refilling = false;
+}
+
+function getWorker() {
+  if (!worker && !workerFailed) {
+    try {
+      worker = new Worker(new URL('./dhKeyPoolWorker.js', import.meta.url));
+      workerStarted = false;
+      worker.on('message', onWorkerMessage);
+      worker.on('error', (error) => {
+        console.error('DH key pool worker error:', error);
+        worker = null;
+        // A worker that dies before its first reply can't load; stop respawning
+        // and let takeKeyPair generate inline
+        if (!workerStarted) workerFailed = true;
+        for (const pool of pools.values()) pool.refilling = false;
+      });
+      // Don't keep the process alive just for the pool
+      worker.unref();
+    } catch (error) {
+      console.error('DH key pool worker unavailable, generating inline:', error);
+      workerFailed = true;
+    }
+  }
+  return worker;
+}
+
+function requestRefill(group, pool) {
+  if (pool.refilling || pool.pairs.length >= LOW_WATERMARK) return;
+  const refillWorker = getWorker();
+  if (!refillWorker) return;
+  pool.refilling = true;
+  refillWorker.postMessage({ group, count: HIGH_WATERMARK - pool.pairs.length });
+}
+
+// Start filling a group's pool ahead of the first request
+export function warmKeyPool(group) {
+  requestRefill(group, getPool(group));
+}
+
+export function takeKeyPair(group) {
+  const pool = getPool(group);
+  const pair = pool.pairs.pop();
+  if (pair) {
+    pool.hits++;
+  } else {
+    pool.misses++;
+  }
+  requestRefill(group, pool);
+  return pair || generateKeyPair(group);
+}
+
+export function getKeyPoolMetrics() {
+  const groups = {};
+  for (const [group, pool] of pools) {
+    const seconds = (pool.lastRefillAt - pool.firstRefillAt) / 1000;
+    groups[group] = {
+      depth: pool.pairs.length,
+      hits: pool.hits,
+      misses: pool.misses,
+      generated: pool.generated,
+      refills: pool.refills,
+      refillRate: seconds > 0 ? pool.generated / seconds : 0,
+      refilling: pool.refilling
+    };
+  }
+  return {
+    lowWatermark: LOW_WATERMARK,
+    highWatermark: HIGH_WATERMARK,
+    worker: worker ? 'running' : workerFailed ? 'unavailable' : 'idle',
+    groups
+  };
+}
@@ -0,0 +1,20 @@
+// Worker thread that pre-generates Diffie-Hellman key pairs for lib/dhKeyPool.js
+import { parentPort } from 'worker_threads';
+import { generateKeyPair } from './crypto/diffieHellman.js';
+
+const CHUNK_SIZE = 8;
+
+parentPort.on('message', ({ group, count }) => {
+  try {
+    // Post in small chunks so the pool refills progressively
+    for (let done = 0; done < count; done += CHUNK_SIZE) {
+      const pairs = [];
+      for (let i = done; i < Math.min(done + CHUNK_SIZE, count); i++) {
+        pairs.push(generateKeyPair(group));
+      }
+      parentPort.postMessage({ group, pairs, final: done + CHUNK_SIZE >= count });
+    }
+  } catch (error) {
+    parentPort.postMessage({ group, error: error.message, final: true });
+  }
+});
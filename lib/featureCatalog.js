@@ -0,0 +1,45 @@
+// Feature catalogue responses for GET /api/features (server only)
+// The catalogue is static, so each tier's JSON body is serialized once at
+// load with a strong ETag. CATALOG_VERSION hashes the whole catalogue;
+// requests that name the current version can be cached as immutable.
+import { createHash } from 'crypto';
+import { FEATURES, FEATURE_DETAILS, getAllFeaturesWithAccess, getTierComparison } from './accessControl';
+
+function digest(text) {
+  return createHash('sha256').update(text).digest('base64url');
+}
+
+export const CATALOG_VERSION = digest(JSON.stringify({ FEATURES, FEATURE_DETAILS })).slice(0, 16);
+
+const IMMUTABLE = 'public, max-age=31536000, immutable';
+const REVALIDATE = 'public, no-cache';
+
+const responses = new Map();   // tier -> { body, etag }
+for (const tier of Object.keys(FEATURES)) {
+  const body = JSON.stringify({
+    version: CATALOG_VERSION,
+    tier,
+    features: getAllFeaturesWithAccess(tier),
+    tiers: getTierComparison()
+  });
+  responses.set(tier, { body, etag: `"${digest(body).slice(0, 27)}"` });
+}
+
+// Unknown or missing tiers get the free catalogue, like accessControl
+export function getFeatureCatalog(tier) {
+  return responses.get(tier) || responses.get(tier?.toLowerCase()) || responses.get('free');
+}
+
+// Cache-Control for a request that asked for catalogue version `version`
+export function catalogCacheControl(version) {
+  return version === CATALOG_VERSION ? IMMUTABLE : REVALIDATE;
+}
+
+// If-None-Match uses weak comparison, so W/ prefixes are ignored
+export function matchesETag(ifNoneMatch, etag) {
+  if (!ifNoneMatch) return false;
+  return ifNoneMatch.split(',').some((tag) => {
+    const value = tag.trim();
+    return value === '*' || value.replace(/^W\//, '') === etag;
+  });
+}
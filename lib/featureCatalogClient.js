@@ -0,0 +1,83 @@
+// Feature catalogue client (browser only)
+// Fetches the per-tier catalogue from GET /api/features instead of bundling
+// and rebuilding it on every render. The first request revalidates with the
+// ETag (304 on repeat loads); once the catalogue version is known, other
+// tiers are requested with ?v= so the browser may cache them as immutable.
+import { useEffect, useState } from 'react';
+
+const catalogs = new Map();   // tier -> Promise of catalogue
+const loaded = new Map();     // tier -> catalogue, once fetched
+let version = null;
+
+export function fetchFeatureCatalog(tier = 'free') {
+  let pending = catalogs.get(tier);
+  if (!pending) {
+    const query = new URLSearchParams({ tier });
+    if (version) query.set('v', version);
+    pending = fetch(`/api/features?${query}`)
+      .then((response) => {
+        if (!response.ok) throw new Error('Failed to load features: ' + response.status);
+        return response.json();
+      })
+      .then((catalog) => {
+        version = catalog.version;
+        loaded.set(tier, catalog);
+        return catalog;
+      })
+      .catch((error) => {
+        catalogs.delete(tier);
+        throw error;
+      });
+    catalogs.set(tier, pending);
+  }
+  return pending;
+}
+
+// React hook: the features-with-access list for `tier`, or [] until loaded.
+// Pass null to skip fetching (e.g. before the user's tier is known).
+export function useFeatureCatalog(tier) {
+  const [features, setFeatures] = useState([]);
+
+  useEffect(() => {
+    if (tier === null) return undefined;
+    let active = true;
+    fetchFeatureCatalog(tier || 'free')
+      .then((catalog) => {
+        if (active) setFeatures(catalog.features);
+      })
+      .catch((error) => console.error(error));
+    return () => {
+      active = false;
+    };
+  }, [tier]);
+
+  return features;
+}
+
+// React hook: whether `tier` has `featureId`, or null while the catalogue
+// loads. A catalogue that fails to load denies access.
+export function useFeatureAccess(tier, featureId) {
+  const key = tier === null ? null : tier || 'free';
+  const cached = key === null ? undefined : loaded.get(key);
+  const [fetched, setFetched] = useState({ key: null, features: null });
+
+  useEffect(() => {
+    if (key === null || cached) return undefined;
+    let active = true;
+    fetchFeatureCatalog(key)
+      .then((catalog) => {
+        if (active) setFetched({ key, features: catalog.features });
+      })
+      .catch((error) => {
+        console.error(error);
+        if (active) setFetched({ key, features: [] });
+      });
+    return () => {
+      active = false;
+    };
+  }, [key, cached]);
+
+  const features = cached ? cached.features : fetched.key === key ? fetched.features : null;
+  if (key === null || !features) return null;
+  return features.some((feature) => feature.id === featureId && feature.available);
+}
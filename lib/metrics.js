@@ -0,0 +1,162 @@
+// Request metrics (server only)
+// Per-route counters and latency histograms, per-stage timings for body parse,
+// DB access, token work and individual cipher calls, plus event-loop lag.
+// Rendered in Prometheus text format by GET /api/metrics; each response also
+// carries its own stage breakdown in a Server-Timing header.
+import { monitorEventLoopDelay } from 'perf_hooks';
+import { setCipherTimer } from './token';
+
+const BUCKETS_MS = [0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000];
+
+class Histogram {
+  constructor() {
+    this.counts = new Array(BUCKETS_MS.length + 1).fill(0);
+    this.sum = 0;
+    this.count = 0;
+  }
+
+  observe(ms) {
+    let i = 0;
+    while (i < BUCKETS_MS.length && ms > BUCKETS_MS[i]) i++;
+    this.counts[i]++;
+    this.sum += ms;
+    this.count++;
+  }
+}
+
+const requestCounts = new Map();     // 'route\u0000status' -> count
+const requestDurations = new Map();  // route -> Histogram
+const stageDurations = new Map();    // stage -> Histogram
+
+const eventLoopDelay = monitorEventLoopDelay({ resolution: 20 });
+eventLoopDelay.enable();
+
+function histogramFor(map, key) {
+  let histogram = map.get(key);
+  if (!histogram) {
+    histogram = new Histogram();
+    map.set(key, histogram);
+  }
+  return histogram;
+}
+
+class RequestTimer {
+  constructor(route) {
+    this.route = route;
+    this.start = performance.now();
+    this.stages = new Map();
+    // Bound so it can be handed to token.js as the cipher timer
+    this.record = (stage, ms) => {
+      this.stages.set(stage, (this.stages.get(stage) || 0) + ms);
+      histogramFor(stageDurations, stage).observe(ms);
+    };
+  }
+
+  // Time a synchronous stage; cipher calls made inside it are timed as well
+  time(stage, fn) {
+    const previous = setCipherTimer(this.record);
+    const start = performance.now();
+    try {
+      return fn();
+    } finally {
+      this.record(stage, performance.now() - start);
+      setCipherTimer(previous);
+    }
+  }
+
+  async timeAsync(stage, fn) {
+    const start = performance.now();
+    try {
+      return await fn();
+    } finally {
+      this.record(stage, performance.now() - start);
+    }
+  }
+
+  finish(response) {
+    const total = performance.now() - this.start;
+    const countKey = this.route + '\u0000' + response.status;
+    requestCounts.set(countKey, (requestCounts.get(countKey) || 0) + 1);
+    histogramFor(requestDurations, this.route).observe(total);
+
+    const timings = [];
+    for (const [stage, ms] of this.stages) {
+      timings.push(`${stage};dur=${ms.toFixed(3)}`);
+    }
+    timings.push(`total;dur=${total.toFixed(3)}`);
+    response.headers.set('Server-Timing', timings.join(', '));
+    return response;
+  }
+}
+
+export function startRequest(route) {
+  return new RequestTimer(route);
+}
+
+function escapeLabel(value) {
+  return String(value).replace(/\\/g, '\\\\').replace(/"/g, '\\"').replace(/\n/g, '\\n');
+}
+
+function renderHistogram(lines, name, labelName, map) {
+  for (const [key, histogram] of map) {
+    const label = `${labelName}="${escapeLabel(key)}"`;
+    let cumulative = 0;
+    BUCKETS_MS.forEach((bound, i) => {
+      cumulative += histogram.counts[i];
+      lines.push(`${name}_bucket{${label},le="${bound}"} ${cumulative}`);
+    });
+    lines.push(`${name}_bucket{${label},le="+Inf"} ${histogram.count}`);
+    lines.push(`${name}_sum{${label}} ${histogram.sum.toFixed(3)}`);
+    lines.push(`${name}_count{${label}} ${histogram.count}`);
+  }
+}
+
+// Render all metrics in Prometheus text exposition format. `sampled` is a list
+// of { name, help, value, labels?, type? } collected by the caller at scrape
+// time; type is 'gauge' (the default) or 'counter' for running totals.
+export function renderMetrics(sampled = []) {
+  const lines = [];
+
+  lines.push('# HELP api_requests_total Total API requests by route and status');
+  lines.push('# TYPE api_requests_total counter');
+  for (const [key, count] of requestCounts) {
+    const [route, status] = key.split('\u0000');
+    lines.push(`api_requests_total{route="${escapeLabel(route)}",status="${status}"} ${count}`);
+  }
+
+  lines.push('# HELP api_request_duration_ms Request latency by route');
+  lines.push('# TYPE api_request_duration_ms histogram');
+  renderHistogram(lines, 'api_request_duration_ms', 'route', requestDurations);
+
+  lines.push('# HELP api_stage_duration_ms Time spent per request stage and cipher call');
+  lines.push('# TYPE api_stage_duration_ms histogram');
+  renderHistogram(lines, 'api_stage_duration_ms', 'stage', stageDurations);
+
+  // Event-loop delay since the previous scrape
+  const lag = {
+    mean: eventLoopDelay.count ? eventLoopDelay.mean / 1e6 : 0,
+    p99: eventLoopDelay.count ? eventLoopDelay.percentile(99) / 1e6 : 0,
+    max: eventLoopDelay.count ? eventLoopDelay.max / 1e6 : 0
+  };
+  eventLoopDelay.reset();
+  lines.push('# HELP event_loop_lag_ms Event-loop delay since the last scrape');
+  lines.push('# TYPE event_loop_lag_ms gauge');
+  for (const [stat, value] of Object.entries(lag)) {
+    lines.push(`event_loop_lag_ms{stat="${stat}"} ${value.toFixed(3)}`);
+  }
+
+  const seen = new Set();
+  for (const { name, help, value, labels, type = 'gauge' } of sampled) {
+    if (!seen.has(name)) {
+      seen.add(name);
+      lines.push(`# HELP ${name} ${help}`);
+      lines.push(`# TYPE ${name} ${type}`);
+    }
+    const labelText = labels
+      ? '{' + Object.entries(labels).map(([k, v]) => `${k}="${escapeLabel(v)}"`).join(',') + '}'
+      : '';
+    lines.push(`${name}${labelText} ${value}`);
+  }
+
+  return lines.join('\n') + '\n';
+}
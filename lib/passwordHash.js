@@ -0,0 +1,174 @@
+// Password hashing service (server only)
+// scrypt runs on a pool of worker threads so a login never blocks the event
+// loop, and concurrent logins spread across cores. Jobs wait in a bounded
+// queue; when it is full, hashing fails fast with code PASSWORD_QUEUE_FULL so
+// the API can shed load instead of queueing without limit.
+//
+// Stored format: scrypt$N$r$p$salt$key (base64 salt and key). Anything else
+// is a legacy base64 password, which still verifies and is flagged for
+// rehashing, as are hashes made with outdated cost parameters.
+import { Worker } from 'worker_threads';
+import { availableParallelism, cpus } from 'os';
+import { randomBytes, scrypt, timingSafeEqual } from 'crypto';
+
+const SCRYPT_N = Number(process.env.SCRYPT_N || 16384);
+const SCRYPT_R = Number(process.env.SCRYPT_R || 8);
+const SCRYPT_P = Number(process.env.SCRYPT_P || 1);
+const KEY_LENGTH = 32;
+const SALT_LENGTH = 16;
+
+const CORES = typeof availableParallelism === 'function' ? availableParallelism() : cpus().length;
+const POOL_SIZE = Number(process.env.PASSWORD_HASH_WORKERS || Math.max(1, CORES - 1));
+const MAX_QUEUE = Number(process.env.PASSWORD_HASH_QUEUE || 256);
+
+const PREFIX = 'scrypt$';
+
+const workers = [];     // { worker, job, started }
+const queue = [];       // jobs waiting for a free worker
+let nextJobId = 1;
+let workersFailed = false;
+let completed = 0;
+let rejected = 0;
+
+function spawnWorker() {
+  const slot = { worker: null, job: null, started: false };
+  const worker = new Worker(new URL('./passwordHashWorker.js', import.meta.url));
+  worker.on('message', ({ id, key, error }) => {
+    const { job } = slot;
+    slot.started = true;
+    if (!job || job.id !== id) return;
+    slot.job = null;
+    worker.unref();
+    completed++;
+    if (error) {
+      job.reject(new Error(error));
+    } else {
+      job.resolve(Buffer.from(key, 'base64'));
+    }
+    dispatch();
+  });
+  worker.on('error', (error) => {
+    console.error('Password hash worker error:', error);
+    workers.splice(workers.indexOf(slot), 1);
+    // A worker that dies before its first reply can't load; stop respawning
+    if (!slot.started) workersFailed = true;
+    if (slot.job) slot.job.reject(error);
+    dispatch();
+  });
+  // Only hold the process open while a job is running
+  worker.unref();
+  slot.worker = worker;
+  workers.push(slot);
+  return slot;
+}
+
+function idleWorker() {
+  const idle = workers.find((slot) => !slot.job);
+  if (idle || workers.length >= POOL_SIZE || workersFailed) return idle || null;
+  try {
+    return spawnWorker();
+  } catch (error) {
+    console.error('Password hash workers unavailable, using the libuv pool:', error);
+    workersFailed = true;
+    return null;
+  }
+}
+
+function dispatch() {
+  while (queue.length > 0) {
+    const slot = idleWorker();
+    if (!slot) {
+      if (workersFailed && workers.length === 0) runInline(queue.shift());
+      else return;
+      continue;
+    }
+    const job = queue.shift();
+    slot.job = job;
+    slot.worker.ref();
+    slot.worker.postMessage({
+      id: job.id,
+      password: job.password,
+      salt: job.salt.toString('base64'),
+      N: job.N,
+      r: job.r,
+      p: job.p,
+      keyLength: job.keyLength
+    });
+  }
+}
+
+// Fallback when worker threads can't start: async scrypt is still off the
+// event loop, just limited to the libuv thread pool
+function runInline(job) {
+  scrypt(job.password, job.salt, job.keyLength, { N: job.N, r: job.r, p: job.p, maxmem: 256 * job.N * job.r }, (error, key) => {
+    completed++;
+    if (error) job.reject(error);
+    else job.resolve(key);
+  });
+}
+
+function derive(password, salt, N, r, p, keyLength) {
+  if (queue.length >= MAX_QUEUE) {
+    rejected++;
+    const error = new Error('Password hashing queue is full');
+    error.code = 'PASSWORD_QUEUE_FULL';
+    return Promise.reject(error);
+  }
+  return new Promise((resolve, reject) => {
+    queue.push({ id: nextJobId++, password: String(password), salt, N, r, p, keyLength, resolve, reject });
+    dispatch();
+  });
+}
+
+function legacyHash(password) {
+  return Buffer.from(password).toString('base64');
+}
+
+function safeEqual(a, b) {
+  return a.length === b.length && timingSafeEqual(a, b);
+}
+
+// Stands in for the stored hash of an unknown user, so a login for an email
+// that doesn't exist costs the same scrypt run as one that does. Current
+// parameters, fixed salt; the key is all zeroes and matches no password.
+export const DUMMY_PASSWORD_HASH = [
+  PREFIX + SCRYPT_N, SCRYPT_R, SCRYPT_P,
+  Buffer.alloc(SALT_LENGTH).toString('base64'), Buffer.alloc(KEY_LENGTH).toString('base64')
+].join('$');
+
+export async function hashPassword(password) {
+  const salt = randomBytes(SALT_LENGTH);
+  const key = await derive(password, salt, SCRYPT_N, SCRYPT_R, SCRYPT_P, KEY_LENGTH);
+  return [PREFIX + SCRYPT_N, SCRYPT_R, SCRYPT_P, salt.toString('base64'), key.toString('base64')].join('$');
+}
+
+// Resolves to { valid, needsRehash }
+export async function verifyPassword(password, stored) {
+  if (typeof stored !== 'string' || !stored.startsWith(PREFIX)) {
+    const valid = typeof stored === 'string' && safeEqual(Buffer.from(legacyHash(String(password))), Buffer.from(stored));
+    return { valid, needsRehash: valid };
+  }
+
+  const [, N, r, p, salt, key] = stored.split('$');
+  if (!salt || !key || ![N, r, p].every((value) => /^[1-9][0-9]*$/.test(value))) {
+    return { valid: false, needsRehash: false };
+  }
+  const expected = Buffer.from(key, 'base64');
+  const actual = await derive(password, Buffer.from(salt, 'base64'), Number(N), Number(r), Number(p), expected.length);
+  const valid = safeEqual(actual, expected);
+  const current = Number(N) === SCRYPT_N && Number(r) === SCRYPT_R && Number(p) === SCRYPT_P;
+  return { valid, needsRehash: valid && !current };
+}
+
+export function getPasswordHashMetrics() {
+  return {
+    poolSize: POOL_SIZE,
+    workers: workers.length,
+    busy: workers.filter((slot) => slot.job).length,
+    queued: queue.length,
+    maxQueue: MAX_QUEUE,
+    completed,
+    rejected,
+    params: { N: SCRYPT_N, r: SCRYPT_R, p: SCRYPT_P }
+  };
+}
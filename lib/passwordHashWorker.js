@@ -0,0 +1,17 @@
+// Worker thread that runs scrypt for lib/passwordHash.js
+import { parentPort } from 'worker_threads';
+import { scryptSync } from 'crypto';
+
+parentPort.on('message', ({ id, password, salt, N, r, p, keyLength }) => {
+  try {
+    const key = scryptSync(password, Buffer.from(salt, 'base64'), keyLength, {
+      N,
+      r,
+      p,
+      maxmem: 256 * N * r
+    });
+    parentPort.postMessage({ id, key: key.toString('base64') });
+  } catch (error) {
+    parentPort.postMessage({ id, error: error.message });
+  }
+});
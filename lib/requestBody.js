@@ -0,0 +1,67 @@
+// Size-capped JSON request bodies (server only)
+// The body is read from the request stream chunk by chunk and abandoned as
+// soon as it passes the route's limit, so an oversized upload is never
+// buffered whole. Failures carry a code the route maps to a status:
+// UNSUPPORTED_MEDIA_TYPE (415), BODY_TOO_LARGE (413), INVALID_JSON (400).
+
+function bodyError(code, message) {
+  const error = new Error(message);
+  error.code = code;
+  return error;
+}
+
+// A request without a body (or with Content-Length: 0) is parsed as {}
+function declaresBody(request) {
+  const length = request.headers.get('content-length');
+  if (length !== null) return Number(length) > 0;
+  return request.body !== null;
+}
+
+// Checks that need only the headers; returns the error to report, or null
+export function checkBodyHeaders(request, maxBytes) {
+  if (!declaresBody(request)) return null;
+  const contentType = request.headers.get('content-type');
+  if (!contentType || !contentType.includes('application/json')) {
+    return bodyError('UNSUPPORTED_MEDIA_TYPE', 'Content-Type must be application/json');
+  }
+  if (Number(request.headers.get('content-length')) > maxBytes) {
+    return bodyError('BODY_TOO_LARGE', `Request body too large (max ${maxBytes} bytes)`);
+  }
+  return null;
+}
+
+export async function readJsonBody(request, maxBytes) {
+  const headerError = checkBodyHeaders(request, maxBytes);
+  if (headerError) throw headerError;
+  if (!declaresBody(request) || !request.body) return {};
+
+  const reader = request.body.getReader();
+  const chunks = [];
+  let size = 0;
+  for (;;) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    size += value.byteLength;
+    if (size > maxBytes) {
+      reader.cancel().catch(() => {});
+      throw bodyError('BODY_TOO_LARGE', `Request body too large (max ${maxBytes} bytes)`);
+    }
+    chunks.push(value);
+  }
+  if (size === 0) return {};
+
+  let bytes = chunks[0];
+  if (chunks.length > 1) {
+    bytes = new Uint8Array(size);
+    let offset = 0;
+    for (const chunk of chunks) {
+      bytes.set(chunk, offset);
+      offset += chunk.byteLength;
+    }
+  }
+  try {
+    return JSON.parse(new TextDecoder().decode(bytes));
+  } catch {
+    throw bodyError('INVALID_JSON', 'Request body is not valid JSON');
+  }
+}
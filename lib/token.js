@@ -2,6 +2,19 @@
 import * as groupSubstitution from './crypto/groupSubstitution.js';
 import * as vigenere from './crypto/vigenere.js';
 import * as transposition from './crypto/transposition.js';
+import { createHmacSha256 } from './crypto/sha256.js';
+
+// Token formats, selected by header alg:
+//   v1 'CUSTOM'  - group-substituted header, Vigenère payload, transposed
+//                  copy of header.payload as the signature
+//   v2 'CUSTOM2' - short header id, Vigenère payload (base64url) and a
+//                  fixed 16-byte HMAC-SHA256 signature over id.payload
+// verifyToken accepts both, so clients can migrate; createToken keeps issuing
+// v1 unless TOKEN_ALG=CUSTOM2 opts in to v2.
+export const TOKEN_ALG_V1 = 'CUSTOM';
+export const TOKEN_ALG_V2 = 'CUSTOM2';
+const DEFAULT_TOKEN_ALG =
+  (typeof process !== 'undefined' && process.env && process.env.TOKEN_ALG) || TOKEN_ALG_V1;
 
 function base64Encode(str) {
   if (typeof window !== 'undefined') {
@@ -24,13 +37,114 @@ function base64Decode(str) {
   }
 }
 
-export function createToken(payload, vigenereKey = 'SECRETKEY', transpositionKey = '34152') {
-  // Create header
-  const header = {
-    alg: 'CUSTOM',
-    typ: 'JWT'
-  };
-  
+// base64url without padding over UTF-8, for v2 tokens
+function base64UrlEncode(str) {
+  if (typeof window !== 'undefined') {
+    return bytesToBase64Url(new TextEncoder().encode(str));
+  } else {
+    return Buffer.from(str).toString('base64url');
+  }
+}
+
+function base64UrlDecode(str) {
+  if (typeof window !== 'undefined') {
+    const binary = atob(str.replace(/-/g, '+').replace(/_/g, '/'));
+    const bytes = new Uint8Array(binary.length);
+    for (let i = 0; i < binary.length; i++) bytes[i] = binary.charCodeAt(i);
+    return new TextDecoder().decode(bytes);
+  } else {
+    return Buffer.from(str, 'base64url').toString('utf-8');
+  }
+}
+
+function bytesToBase64Url(bytes) {
+  if (typeof window !== 'undefined') {
+    let binary = '';
+    for (let i = 0; i < bytes.length; i++) binary += String.fromCharCode(bytes[i]);
+    return btoa(binary).replace(/\+/g, '-').replace(/\//g, '_').replace(/=+$/, '');
+  } else {
+    return Buffer.from(bytes.buffer, bytes.byteOffset, bytes.length).toString('base64url');
+  }
+}
+
+// Optional (stage, ms) callback used by server metrics to time each cipher call
+let cipherTimer = null;
+
+export function setCipherTimer(timer) {
+  const previous = cipherTimer;
+  cipherTimer = timer;
+  return previous;
+}
+
+function timed(stage, fn, a, b) {
+  if (!cipherTimer) return fn(a, b);
+  const start = performance.now();
+  try {
+    return fn(a, b);
+  } finally {
+    cipherTimer(stage, performance.now() - start);
+  }
+}
+
+const DEFAULT_HEADER = {
+  alg: 'CUSTOM',
+  typ: 'JWT'
+};
+
+// Encoded header part per distinct header JSON, and the reverse: encoded
+// header -> parsed header, so decoding a known header skips the cipher
+const encodedHeaders = new Map();
+const knownHeaders = new Map();
+
+function encodeHeader(headerStr) {
+  let encodedHeader = encodedHeaders.get(headerStr);
+  if (encodedHeader === undefined) {
+    // Header: Group Substitution Cipher
+    const encryptedHeader = timed('group_substitution_encrypt', groupSubstitution.encrypt, headerStr);
+    encodedHeader = base64Encode(encryptedHeader).replace(/=/g, '');
+    encodedHeaders.set(headerStr, encodedHeader);
+    knownHeaders.set(encodedHeader, Object.freeze(JSON.parse(headerStr)));
+  }
+  return encodedHeader;
+}
+
+function decodeHeader(encodedHeader) {
+  const known = knownHeaders.get(encodedHeader) || COMPACT_HEADERS.get(encodedHeader);
+  if (known) return known;
+
+  const encryptedHeader = base64Decode(encodedHeader);
+  const headerStr = timed('group_substitution_decrypt', groupSubstitution.decrypt, encryptedHeader);
+  return JSON.parse(headerStr);
+}
+
+const DEFAULT_HEADER_STR = JSON.stringify(DEFAULT_HEADER);
+encodeHeader(DEFAULT_HEADER_STR);
+
+// v2 header ids stand in for the whole encoded header. They are far shorter
+// than any v1 header part, so the two formats can't be confused.
+const COMPACT_HEADERS = new Map([
+  ['c2', Object.freeze({ alg: TOKEN_ALG_V2, typ: 'JWT' })]
+]);
+const COMPACT_HEADER_IDS = new Map([[TOKEN_ALG_V2, 'c2']]);
+const SIGNATURE_BYTES = 16;
+
+// One precomputed HMAC per key pair. The HMAC key is the cipher key pair
+// itself (vigenereKey NUL transpositionKey), so with the default arguments v2
+// signatures are only as secret as the hard-coded 'SECRETKEY' / '34152'.
+const signers = new Map();
+
+function getSigner(vigenereKey, transpositionKey) {
+  const cacheKey = vigenereKey + '\u0000' + transpositionKey;
+  let signer = signers.get(cacheKey);
+  if (!signer) {
+    const mac = createHmacSha256(cacheKey);
+    signer = (data) => bytesToBase64Url(mac(data).subarray(0, SIGNATURE_BYTES));
+    signers.set(cacheKey, signer);
+  }
+  return signer;
+}
+
+export function createToken(payload, vigenereKey = 'SECRETKEY', transpositionKey = '34152', alg = DEFAULT_TOKEN_ALG) {
   // Add expiration to payload (1 hour from now)
   const tokenPayload = {
     ...payload,
@@ -39,26 +153,96 @@ export function createToken(payload, vigenereKey = 'SECRETKEY', transpositionKey
   };
   
   // Encrypt each part
-  const headerStr = JSON.stringify(header);
+  const headerStr = DEFAULT_HEADER_STR;
   const payloadStr = JSON.stringify(tokenPayload);
   
-  // Header: Group Substitution Cipher
-  const encryptedHeader = groupSubstitution.encrypt(headerStr);
-  const encodedHeader = base64Encode(encryptedHeader).replace(/=/g, '');
+  const headerId = COMPACT_HEADER_IDS.get(alg);
+  if (headerId) {
+    // v2: Vigenère payload, HMAC signature over id.payload
+    const encryptedPayload = timed('vigenere_encrypt', vigenere.encrypt, payloadStr, vigenereKey);
+    const signatureData = headerId + '.' + base64UrlEncode(encryptedPayload);
+    const signature = timed('hmac_sign', getSigner(vigenereKey, transpositionKey), signatureData);
+    return `${signatureData}.${signature}`;
+  }
+  
+  // Header: Group Substitution Cipher (memoized per distinct header)
+  const encodedHeader = encodeHeader(headerStr);
   
   // Payload: Vigenère Cipher
-  const encryptedPayload = vigenere.encrypt(payloadStr, vigenereKey);
+  const encryptedPayload = timed('vigenere_encrypt', vigenere.encrypt, payloadStr, vigenereKey);
   const encodedPayload = base64Encode(encryptedPayload).replace(/=/g, '');
   
   // Create signature from header + payload
   const signatureData = encodedHeader + '.' + encodedPayload;
-  const encryptedSignature = transposition.encrypt(signatureData, transpositionKey);
+  const encryptedSignature = timed('transposition_encrypt', transposition.encrypt, signatureData, transpositionKey);
   const encodedSignature = base64Encode(encryptedSignature).replace(/=/g, '');
   
   return `${encodedHeader}.${encodedPayload}.${encodedSignature}`;
 }
 
+// Bounded LRU of successful verifications, keyed by token string per key pair.
+// Entries are dropped once the payload's exp passes, so a hot token costs one
+// decrypt per lifetime instead of one per request.
+const VERIFY_CACHE_SIZE = 1000;
+const verifyCaches = new Map();
+const verifyCacheStats = { hits: 0, misses: 0, evictions: 0, expired: 0 };
+
+function getVerifyCache(vigenereKey, transpositionKey) {
+  const cacheKey = vigenereKey + '\u0000' + transpositionKey;
+  let cache = verifyCaches.get(cacheKey);
+  if (!cache) {
+    cache = new Map();
+    verifyCaches.set(cacheKey, cache);
+  }
+  return cache;
+}
+
+export function getVerifyCacheStats() {
+  let size = 0;
+  for (const cache of verifyCaches.values()) size += cache.size;
+  return { ...verifyCacheStats, size, capacity: VERIFY_CACHE_SIZE };
+}
+
+export function clearVerifyCache() {
+  verifyCaches.clear();
+  verifyCacheStats.hits = 0;
+  verifyCacheStats.misses = 0;
+  verifyCacheStats.evictions = 0;
+  verifyCacheStats.expired = 0;
+}
+
 export function verifyToken(token, vigenereKey = 'SECRETKEY', transpositionKey = '34152') {
+  if (typeof token !== 'string') {
+    return verifyTokenUncached(token, vigenereKey, transpositionKey);
+  }
+
+  const cache = getVerifyCache(vigenereKey, transpositionKey);
+  const cached = cache.get(token);
+  if (cached) {
+    cache.delete(token);
+    if (cached.exp !== undefined && cached.exp < Math.floor(Date.now() / 1000)) {
+      verifyCacheStats.expired++;
+      return { valid: false, error: 'Token expired' };
+    }
+    cache.set(token, cached);
+    verifyCacheStats.hits++;
+    return cached.result;
+  }
+
+  verifyCacheStats.misses++;
+  const result = verifyTokenUncached(token, vigenereKey, transpositionKey);
+  if (result.valid) {
+    Object.freeze(result.payload);
+    cache.set(token, { result: Object.freeze(result), exp: result.payload.exp || undefined });
+    if (cache.size > VERIFY_CACHE_SIZE) {
+      cache.delete(cache.keys().next().value);
+      verifyCacheStats.evictions++;
+    }
+  }
+  return result;
+}
+
+function verifyTokenUncached(token, vigenereKey, transpositionKey) {
   try {
     const parts = token.split('.');
     if (parts.length !== 3) {
@@ -67,9 +251,15 @@ export function verifyToken(token, vigenereKey = 'SECRETKEY', transpositionKey =
     
     const [encodedHeader, encodedPayload, encodedSignature] = parts;
     
+    if (COMPACT_HEADERS.has(encodedHeader)) {
+      return verifyCompact(encodedHeader, encodedPayload, encodedSignature, vigenereKey, transpositionKey);
+    }
+    
     // Verify signature
     const expectedSignatureData = encodedHeader + '.' + encodedPayload;
-    const decryptedSignature = transposition.decrypt(
+    const decryptedSignature = timed(
+      'transposition_decrypt',
+      transposition.decrypt,
       base64Decode(encodedSignature),
       transpositionKey
     );
@@ -80,7 +270,7 @@ export function verifyToken(token, vigenereKey = 'SECRETKEY', transpositionKey =
     
     // Decrypt payload
     const encryptedPayload = base64Decode(encodedPayload);
-    const payloadStr = vigenere.decrypt(encryptedPayload, vigenereKey);
+    const payloadStr = timed('vigenere_decrypt', vigenere.decrypt, encryptedPayload, vigenereKey);
     const payload = JSON.parse(payloadStr);
     
     // Check expiration
@@ -94,6 +284,44 @@ export function verifyToken(token, vigenereKey = 'SECRETKEY', transpositionKey =
   }
 }
 
+// Compare without an early exit, so the time taken doesn't reveal how much of
+// a forged signature matched. Plain JS because this module also runs in the
+// browser, where crypto.timingSafeEqual isn't available.
+function signaturesEqual(a, b) {
+  if (typeof a !== 'string' || a.length !== b.length) return false;
+  let diff = 0;
+  for (let i = 0; i < a.length; i++) {
+    diff |= a.charCodeAt(i) ^ b.charCodeAt(i);
+  }
+  return diff === 0;
+}
+
+function verifyCompact(headerId, encodedPayload, signature, vigenereKey, transpositionKey) {
+  const expected = timed('hmac_sign', getSigner(vigenereKey, transpositionKey), headerId + '.' + encodedPayload);
+  if (!signaturesEqual(signature, expected)) {
+    return { valid: false, error: 'Invalid signature' };
+  }
+  
+  const payloadStr = timed('vigenere_decrypt', vigenere.decrypt, base64UrlDecode(encodedPayload), vigenereKey);
+  const payload = JSON.parse(payloadStr);
+  
+  if (payload.exp && payload.exp < Math.floor(Date.now() / 1000)) {
+    return { valid: false, error: 'Token expired' };
+  }
+  
+  return { valid: true, payload };
+}
+
+// Decrypt only the header part of a token
+export function decodeTokenHeader(token) {
+  try {
+    const encodedHeader = token.split('.', 1)[0];
+    return { header: decodeHeader(encodedHeader) };
+  } catch (error) {
+    return { error: 'Failed to decode token: ' + error.message };
+  }
+}
+
 export function decodeToken(token, vigenereKey = 'SECRETKEY') {
   try {
     const parts = token.split('.');
@@ -103,13 +331,13 @@ export function decodeToken(token, vigenereKey = 'SECRETKEY') {
     
     const [encodedHeader, encodedPayload, encodedSignature] = parts;
     
-    // Decrypt header
-    const encryptedHeader = base64Decode(encodedHeader);
-    const headerStr = groupSubstitution.decrypt(encryptedHeader);
-    const header = JSON.parse(headerStr);
+    // Decrypt header (known headers are recognised without decrypting)
+    const header = decodeHeader(encodedHeader);
     
     // Decrypt payload
-    const encryptedPayload = base64Decode(encodedPayload);
+    const encryptedPayload = COMPACT_HEADERS.has(encodedHeader)
+      ? base64UrlDecode(encodedPayload)
+      : base64Decode(encodedPayload);
     const payloadStr = vigenere.decrypt(encryptedPayload, vigenereKey);
     const payload = JSON.parse(payloadStr);
     
@@ -0,0 +1,108 @@
+// Client-side token session (browser only)
+// One shared store verifies the stored token once per change and publishes
+// { tier, payload, exp } to every subscriber, so gated components don't each
+// decrypt the same token on mount and on every tokenUpdated / storage /
+// visibilitychange event. A single timer re-checks the token at expiry.
+import { useSyncExternalStore } from 'react';
+import { getStoredToken, verifyUserToken } from './clientToken';
+
+// setTimeout delays are capped at 2^31 - 1 ms
+const MAX_TIMER_MS = 2147483647;
+
+const LOADING = Object.freeze({ loading: true, valid: false, tier: 'free', payload: null, exp: null });
+
+let session = LOADING;
+let currentToken;
+let expiryTimer = null;
+const listeners = new Set();
+
+function publish(next) {
+  session = Object.freeze(next);
+  for (const listener of listeners) listener();
+}
+
+// Same token verified to the same outcome: keep the published object so
+// subscribers don't re-render
+function isUnchanged(token, previousToken, next) {
+  return token === previousToken && !session.loading && session.valid === next.valid &&
+    session.tier === next.tier && session.exp === next.exp;
+}
+
+function scheduleExpiryCheck(exp) {
+  clearTimeout(expiryTimer);
+  expiryTimer = null;
+  if (!exp) return;
+  // verifyToken only rejects once exp < floor(now / 1000), i.e. a second
+  // after exp; an earlier check would still see the token as valid
+  const delay = Math.min(Math.max((exp + 1) * 1000 - Date.now(), 0), MAX_TIMER_MS);
+  expiryTimer = setTimeout(() => refreshTokenSession(true), delay);
+}
+
+function isExpired() {
+  return session.exp !== null && session.exp < Math.floor(Date.now() / 1000);
+}
+
+// Re-read the stored token and verify it if it changed (or if forced, e.g.
+// at expiry). Unchanged tokens cost one localStorage read.
+export function refreshTokenSession(force = false) {
+  const token = getStoredToken();
+  if (!force && token === currentToken && !session.loading) return session;
+  const previousToken = currentToken;
+  currentToken = token;
+
+  const verification = token ? verifyUserToken(token) : { valid: false };
+  const next = verification.valid
+    ? { loading: false, valid: true, tier: verification.tier, payload: verification.payload, exp: verification.payload.exp ?? null }
+    : { loading: false, valid: false, tier: 'free', payload: null, exp: null };
+  if (!isUnchanged(token, previousToken, next)) publish(next);
+  scheduleExpiryCheck(session.exp);
+  return session;
+}
+
+function onTokenUpdated() {
+  refreshTokenSession();
+}
+
+function onStorage(e) {
+  if (e.key === 'token' || e.key === null) refreshTokenSession();
+}
+
+function onVisibility() {
+  // Timers are throttled in background tabs, so catch a missed expiry here
+  if (document.visibilityState === 'visible') refreshTokenSession(isExpired());
+}
+
+export function subscribeTokenSession(listener) {
+  listeners.add(listener);
+  if (listeners.size === 1) {
+    window.addEventListener('tokenUpdated', onTokenUpdated);
+    window.addEventListener('storage', onStorage);
+    document.addEventListener('visibilitychange', onVisibility);
+    refreshTokenSession();
+  }
+  return () => {
+    listeners.delete(listener);
+    if (listeners.size === 0) {
+      window.removeEventListener('tokenUpdated', onTokenUpdated);
+      window.removeEventListener('storage', onStorage);
+      document.removeEventListener('visibilitychange', onVisibility);
+      clearTimeout(expiryTimer);
+      expiryTimer = null;
+      // Verify afresh when the next subscriber arrives
+      currentToken = undefined;
+    }
+  };
+}
+
+export function getTokenSession() {
+  return session;
+}
+
+function getServerSession() {
+  return LOADING;
+}
+
+// React hook: the current { loading, valid, tier, payload, exp } session
+export function useTokenSession() {
+  return useSyncExternalStore(subscribeTokenSession, getTokenSession, getServerSession);
+}
@@ -0,0 +1,421 @@
+#!/usr/bin/env python3
+"""
+Concurrent load generator for the JWT-like Token System API
+Drives N virtual users against a mixed workload and reports per-endpoint latency
+"""
+
+import math
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+import gen_users
+
+# Relative weight of each endpoint in the default mixed workload
+DEFAULT_MIX = {
+    "register": 1,
+    "login": 4,
+    "verify": 10,
+    "payment": 1,
+    "dh/generate": 2,
+    "dh/shared-secret": 2,
+}
+
+
+class LatencyHistogram:
+    """Log-bucketed latency histogram (~1% precision) that merges by summing bucket counts"""
+
+    GROWTH = 1.01
+    FLOOR_MS = 0.001
+
+    def __init__(self):
+        self.counts = {}
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def _bucket(self, ms):
+        if ms <= self.FLOOR_MS:
+            return 0
+        return int(math.log(ms / self.FLOOR_MS, self.GROWTH))
+
+    def record(self, ms):
+        """Record a single latency sample in milliseconds"""
+        bucket = self._bucket(ms)
+        self.counts[bucket] = self.counts.get(bucket, 0) + 1
+        self.count += 1
+        self.total_ms += ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+
+    def merge(self, other):
+        """Fold another histogram's samples into this one"""
+        for bucket, n in other.counts.items():
+            self.counts[bucket] = self.counts.get(bucket, 0) + n
+        self.count += other.count
+        self.total_ms += other.total_ms
+        self.max_ms = max(self.max_ms, other.max_ms)
+        return self
+
+    def percentile(self, pct):
+        """Upper bound of the bucket holding the given percentile, capped at the observed max"""
+        if self.count == 0:
+            return 0.0
+        rank = math.ceil(self.count * pct / 100.0)
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen >= rank:
+                return min(self.FLOOR_MS * self.GROWTH ** (bucket + 1), self.max_ms)
+        return self.max_ms
+
+    def mean(self):
+        return self.total_ms / self.count if self.count else 0.0
+
+
+class EndpointStats:
+    """Latency histogram plus status accounting for one endpoint"""
+
+    def __init__(self):
+        self.histogram = LatencyHistogram()
+        self.statuses = {}
+        self.errors = 0
+
+    def merge(self, other):
+        self.histogram.merge(other.histogram)
+        for status, n in other.statuses.items():
+            self.statuses[status] = self.statuses.get(status, 0) + n
+        self.errors += other.errors
+        return self
+
+
+def parse_mix(spec):
+    """Parse a workload mix such as 'login=4,verify=10' into a weight dict"""
+    if not spec:
+        return dict(DEFAULT_MIX)
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.strip().partition("=")
+        if name not in DEFAULT_MIX:
+            raise ValueError(f"Unknown endpoint in mix: {name}")
+        mix[name] = float(weight) if weight else 1.0
+    return mix
+
+
+class VirtualUser:
+    """One simulated client with its own session, credentials and token"""
+
+    def __init__(self, base_url, user_id, run_id, recorder=None):
+        self.base_url = base_url
+        self.session = requests.Session()
+        if recorder:
+            recorder.attach(self.session)
+        self.user_id = user_id
+        self.run_id = run_id
+        self.registered = 0
+        self.email = "test@example.com"
+        self.password = "password123"
+        self.token = None
+        self.stats = {}
+
+    def _post(self, endpoint, payload):
+        return self.session.post(f"{self.base_url}/{endpoint}", json=payload)
+
+    def ensure_token(self):
+        """Log in once so token-bearing endpoints have something to present"""
+        if self.token is None:
+            response = self._post("login", {"email": self.email, "password": self.password})
+            if response.status_code == 200:
+                self.token = response.json().get("token")
+
+    def op_register(self):
+        self.registered += 1
+        email = f"load-{self.run_id}-{self.user_id}-{self.registered}@example.com"
+        response = self._post("register", {
+            "email": email,
+            "password": "loadpassword123",
+            "name": f"Load User {self.user_id}"
+        })
+        if response.status_code == 200:
+            self.email = email
+            self.password = "loadpassword123"
+            self.token = response.json().get("token")
+        return response
+
+    def op_login(self):
+        response = self._post("login", {"email": self.email, "password": self.password})
+        if response.status_code == 200:
+            self.token = response.json().get("token")
+        return response
+
+    def op_verify(self):
+        return self._post("verify", {"token": self.token or "invalid.token.here"})
+
+    def op_payment(self):
+        response = self._post("payment", {
+            "token": self.token or "invalid.token.here",
+            "tier": random.choice(["basic", "premium"]),
+            "paymentMethod": "demo"
+        })
+        if response.status_code == 200:
+            self.token = response.json().get("token", self.token)
+        return response
+
+    def op_dh_generate(self):
+        return self._post("dh/generate", {})
+
+    def op_dh_shared_secret(self):
+        return self._post("dh/shared-secret", {"privateKey": 6, "otherPublicKey": 19})
+
+    def execute(self, endpoint):
+        """Run one request against an endpoint and record its latency"""
+        handler = getattr(self, "op_" + endpoint.replace("/", "_").replace("-", "_"))
+        stats = self.stats.setdefault(endpoint, EndpointStats())
+        start = time.perf_counter()
+        try:
+            response = handler()
+            elapsed = (time.perf_counter() - start) * 1000.0
+            stats.statuses[response.status_code] = stats.statuses.get(response.status_code, 0) + 1
+            if response.status_code >= 500:
+                stats.errors += 1
+        except Exception:
+            elapsed = (time.perf_counter() - start) * 1000.0
+            stats.errors += 1
+        stats.histogram.record(elapsed)
+
+
+class LoadResult:
+    """Merged outcome of a load run"""
+
+    def __init__(self, users, elapsed, stats):
+        self.users = users
+        self.elapsed = elapsed
+        self.stats = stats
+
+    @property
+    def total_requests(self):
+        return sum(s.histogram.count for s in self.stats.values())
+
+    @property
+    def throughput(self):
+        return self.total_requests / self.elapsed if self.elapsed else 0.0
+
+    def overall(self):
+        combined = EndpointStats()
+        for stats in self.stats.values():
+            combined.merge(stats)
+        return combined
+
+    def to_dict(self):
+        def summarize(stats):
+            h = stats.histogram
+            return {
+                "count": h.count,
+                "errors": stats.errors,
+                "rps": h.count / self.elapsed if self.elapsed else 0.0,
+                "mean_ms": h.mean(),
+                "p50_ms": h.percentile(50),
+                "p95_ms": h.percentile(95),
+                "p99_ms": h.percentile(99),
+                "max_ms": h.max_ms,
+                "statuses": {str(k): v for k, v in stats.statuses.items()},
+            }
+        return {
+            "users": self.users,
+            "elapsed_s": self.elapsed,
+            "total_requests": self.total_requests,
+            "throughput_rps": self.throughput,
+            "endpoints": {name: summarize(s) for name, s in sorted(self.stats.items())},
+            "overall": summarize(self.overall()),
+        }
+
+
+def run_load(base_url, users=10, duration=None, total_requests=None, mix=None, seed=None,
+             recorder=None):
+    """Run a closed-loop mixed workload with `users` concurrent virtual users.
+
+    Stops after `duration` seconds or once `total_requests` have been issued,
+    whichever is given (defaults to 10 seconds). Requests are written to
+    `recorder` (a traffic.TrafficRecorder) when one is given.
+    """
+    mix = mix or dict(DEFAULT_MIX)
+    if duration is None and total_requests is None:
+        duration = 10.0
+    endpoints = list(mix.keys())
+    weights = [mix[e] for e in endpoints]
+    run_id = int(time.time() * 1000)
+    remaining = [total_requests]
+    lock = threading.Lock()
+
+    def claim():
+        if total_requests is None:
+            return True
+        with lock:
+            if remaining[0] <= 0:
+                return False
+            remaining[0] -= 1
+            return True
+
+    def worker(user_id):
+        rng = random.Random(None if seed is None else seed + user_id)
+        vu = VirtualUser(base_url, user_id, run_id, recorder)
+        try:
+            vu.ensure_token()
+        except Exception:
+            pass
+        while claim():
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+            vu.execute(rng.choices(endpoints, weights)[0])
+        return vu.stats
+
+    start = time.perf_counter()
+    deadline = start + duration if duration is not None else None
+    with ThreadPoolExecutor(max_workers=users) as pool:
+        per_user = list(pool.map(worker, range(users)))
+    elapsed = time.perf_counter() - start
+
+    merged = {}
+    for stats in per_user:
+        for endpoint, endpoint_stats in stats.items():
+            merged.setdefault(endpoint, EndpointStats()).merge(endpoint_stats)
+    return LoadResult(users, elapsed, merged)
+
+
+def print_load_report(result, title=None):
+    """Print throughput and latency percentiles per endpoint"""
+    print("=" * 80)
+    print(title or f"LOAD TEST - {result.users} virtual users, {result.elapsed:.2f}s")
+    print("=" * 80)
+    print(f"{'Endpoint':<20}{'Count':>8}{'Err':>6}{'RPS':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}")
+    print("-" * 80)
+    rows = sorted(result.stats.items()) + [("ALL", result.overall())]
+    for name, stats in rows:
+        h = stats.histogram
+        rps = h.count / result.elapsed if result.elapsed else 0.0
+        print(f"{name:<20}{h.count:>8}{stats.errors:>6}{rps:>9.1f}"
+              f"{h.percentile(50):>9.1f}{h.percentile(95):>9.1f}"
+              f"{h.percentile(99):>9.1f}{h.max_ms:>9.1f}")
+    print("-" * 80)
+    print(f"Throughput: {result.throughput:.1f} req/s  (latencies in ms)")
+    print()
+
+
+def find_saturation(base_url, user_steps, duration=10.0, mix=None):
+    """Run successive load stages and report where throughput stops scaling"""
+    results = []
+    for users in user_steps:
+        result = run_load(base_url, users=users, duration=duration, mix=mix)
+        results.append(result)
+        overall = result.overall().histogram
+        print(f"{users:>5} users: {result.throughput:>9.1f} req/s  "
+              f"p99 {overall.percentile(99):>8.1f} ms")
+    best = max(results, key=lambda r: r.throughput) if results else None
+    if best:
+        print(f"Peak throughput {best.throughput:.1f} req/s at {best.users} users")
+    return results
+
+
+def _scrape_gauges(session, base_url, names):
+    """Read selected gauges from /metrics; missing endpoint or gauges give {}"""
+    try:
+        response = session.get(f"{base_url}/metrics")
+        if response.status_code != 200:
+            return {}
+    except requests.RequestException:
+        return {}
+    values = {}
+    for line in response.text.splitlines():
+        name, _, value = line.partition(" ")
+        if name in names:
+            values[name] = float(value)
+    return values
+
+
+def run_db_sweep(base_url, sizes, data_file, users=10, duration=10.0, mix=None, reload=None,
+                 tiers=None):
+    """Measure endpoint latency as the user table grows.
+
+    For each size, a synthetic users.json is streamed to `data_file` (which the
+    server must be reading) and any journal beside it is removed. `reload` is
+    called with the path for servers that don't watch the file. The first
+    request after the swap is timed separately as the reload cost.
+    """
+    mix = mix or {"login": 4, "register": 1, "payment": 1}
+    journal = os.path.join(os.path.dirname(data_file) or ".", "users.journal")
+    session = requests.Session()
+    rows = []
+    for size in sizes:
+        written = gen_users.write_users(data_file, size, tiers=tiers, seed=size)
+        if os.path.exists(journal):
+            os.remove(journal)
+        if reload:
+            reload(data_file)
+
+        start = time.perf_counter()
+        session.post(f"{base_url}/login", json={"email": "test@example.com", "password": "password123"})
+        reload_ms = (time.perf_counter() - start) * 1000.0
+
+        result = run_load(base_url, users=users, duration=duration, mix=mix)
+        gauges = _scrape_gauges(session, base_url,
+                                ("process_resident_memory_bytes", "nodejs_heap_used_bytes"))
+        row = {
+            "db_users": written,
+            "file_mb": os.path.getsize(data_file) / (1024 * 1024),
+            "reload_ms": reload_ms,
+            "rss_mb": gauges.get("process_resident_memory_bytes", 0) / (1024 * 1024) or None,
+            "heap_mb": gauges.get("nodejs_heap_used_bytes", 0) / (1024 * 1024) or None,
+            "load": result.to_dict(),
+        }
+        rows.append(row)
+        overall = result.overall().histogram
+        memory = f"  rss {row['rss_mb']:.0f} MB" if row["rss_mb"] else ""
+        print(f"{written:>10} users ({row['file_mb']:>7.1f} MB): first request {reload_ms:>8.1f} ms  "
+              f"{result.throughput:>8.1f} req/s  p50 {overall.percentile(50):>7.1f} ms  "
+              f"p99 {overall.percentile(99):>7.1f} ms{memory}")
+    return rows
+
+
+def plot_db_sweep(rows, path=None):
+    """Plot p50/p99 latency per endpoint against user count.
+
+    Writes a PNG to `path` when matplotlib is installed, otherwise prints a text chart.
+    """
+    endpoints = sorted({name for row in rows for name in row["load"]["endpoints"]})
+    if path:
+        try:
+            import matplotlib
+            matplotlib.use("Agg")
+            import matplotlib.pyplot as plt
+        except ImportError:
+            print("matplotlib not installed; printing a text chart instead")
+        else:
+            fig, ax = plt.subplots(figsize=(9, 5))
+            xs = [row["db_users"] for row in rows]
+            for name in endpoints:
+                for pct, style in (("p50_ms", "-"), ("p99_ms", "--")):
+                    ys = [row["load"]["endpoints"].get(name, {}).get(pct) for row in rows]
+                    ax.plot(xs, ys, style, marker="o", label=f"{name} {pct[:3]}")
+            ax.set_xscale("log")
+            ax.set_xlabel("users in DB")
+            ax.set_ylabel("latency (ms)")
+            ax.legend(fontsize="small")
+            fig.tight_layout()
+            fig.savefig(path)
+            print(f"Saved plot to {path}")
+            return
+
+    width = 40
+    peak = max((row["load"]["endpoints"][name]["p99_ms"]
+                for row in rows for name in endpoints if name in row["load"]["endpoints"]), default=0)
+    for name in endpoints:
+        print(f"{name} p99 (ms)")
+        for row in rows:
+            p99 = row["load"]["endpoints"].get(name, {}).get("p99_ms", 0.0)
+            bar = "#" * (int(width * p99 / peak) if peak else 0)
+            print(f"  {row['db_users']:>10} |{bar:<{width}} {p99:.1f}")
+    print()
@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Next.js API route handler
+Speaks the same JSON contract as app/api/[[...path]]/route.js so the backend
+tests and load generator can run offline, with optional injected latency/failures
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Same groups as lib/crypto/diffieHellman.js (toy group plus RFC 3526 MODP groups)
+MODP_2048 = int(
+    "FFFFFFFFFFFFFFFFC90FDAA22168C234C4C6628B80DC1CD129024E088A67CC74"
+    "020BBEA63B139B22514A08798E3404DDEF9519B3CD3A431B302B0A6DF25F1437"
+    "4FE1356D6D51C245E485B576625E7EC6F44C42E9A637ED6B0BFF5CB6F406B7ED"
+    "EE386BFB5A899FA5AE9F24117C4B1FE649286651ECE45B3DC2007CB8A163BF05"
+    "98DA48361C55D39A69163FA8FD24CF5F83655D23DCA3AD961C62F356208552BB"
+    "9ED529077096966D670C354E4ABC9804F1746C08CA18217C32905E462E36CE3B"
+    "E39E772C180E86039B2783A2EC07A28FB5C55DF06F4C52C9DE2BCBF695581718"
+    "3995497CEA956AE515D2261898FA051015728E5A8AACAA68FFFFFFFFFFFFFFFF", 16)
+
+DH_GROUPS = {
+    "toy": {"p": 23, "g": 5, "bits": 5, "small": True},
+    "modp2048": {"p": MODP_2048, "g": 2, "bits": 2048, "small": False},
+}
+DH_DEFAULT_GROUP = "toy"
+
+MAX_VERIFY_BATCH = 1000
+
+# Per-endpoint JSON body caps in bytes, as in the API route
+KB = 1024
+MAX_BODY = {
+    "register": 8 * KB,
+    "login": 8 * KB,
+    "verify": 32 * KB,
+    "verify/batch": MAX_VERIFY_BATCH * 4 * KB,
+    "payment": 32 * KB,
+    "dh/generate": 1 * KB,
+    "dh/shared-secret": 16 * KB,
+}
+
+SEED_USERS = [
+    {
+        "id": "1763927257917",
+        "email": "test@example.com",
+        "password": "cGFzc3dvcmQxMjM=",
+        "name": "Test User",
+        "subscription": "premium",
+        "createdAt": "2025-11-23T19:47:37.917Z"
+    },
+    {
+        "id": "1763927653689",
+        "email": "demo@example.com",
+        "password": "ZGVtbzEyMw==",
+        "name": "Demo User",
+        "subscription": "free",
+        "createdAt": "2025-11-23T19:54:13.690Z"
+    }
+]
+
+
+def _b64(data):
+    return base64.b64encode(data.encode()).decode().rstrip("=")
+
+
+def _unb64(data):
+    return base64.b64decode(data + "=" * (-len(data) % 4)).decode()
+
+
+def hash_password(password):
+    return base64.b64encode(password.encode()).decode()
+
+
+class StandinState:
+    """In-memory users and token minting shared by all handler threads"""
+
+    def __init__(self, latency_ms=0.0, jitter_ms=0.0, failure_rate=0.0, seed=None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.failure_rate = failure_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.RLock()
+        self.users = {u["email"]: dict(u) for u in SEED_USERS}
+        self.last_id = 0
+
+    def load_users(self, path):
+        """Replace the user table with the contents of a users.json file"""
+        with open(path, encoding="utf-8") as f:
+            users = json.load(f).get("users", [])
+        with self.lock:
+            self.users = {u["email"]: u for u in users}
+
+    def next_id(self):
+        with self.lock:
+            self.last_id = max(self.last_id + 1, int(time.time() * 1000))
+            return str(self.last_id)
+
+    def create_token(self, user):
+        now = int(time.time())
+        payload = {
+            "userId": user["id"],
+            "email": user["email"],
+            "name": user["name"],
+            "subscription": user["subscription"],
+            "iat": now,
+            "exp": now + 3600
+        }
+        header = _b64(json.dumps({"alg": "STANDIN", "typ": "JWT"}, separators=(",", ":")))
+        body = _b64(json.dumps(payload, separators=(",", ":")))
+        signature = _b64(hashlib.sha256(f"{header}.{body}".encode()).hexdigest()[:32])
+        return f"{header}.{body}.{signature}"
+
+    def verify_token(self, token):
+        try:
+            parts = token.split(".")
+            if len(parts) != 3:
+                return {"valid": False, "error": "Invalid token format"}
+            header, body, signature = parts
+            expected = _b64(hashlib.sha256(f"{header}.{body}".encode()).hexdigest()[:32])
+            if signature != expected:
+                return {"valid": False, "error": "Invalid signature"}
+            payload = json.loads(_unb64(body))
+            if payload.get("exp") and payload["exp"] < int(time.time()):
+                return {"valid": False, "error": "Token expired"}
+            return {"valid": True, "payload": payload}
+        except Exception as e:
+            return {"valid": False, "error": f"Token decryption failed: {e}"}
+
+
+def dh_value(value):
+    """Parse a DH key like toBigInt in diffieHellman.js; None if invalid"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, str) and re.fullmatch(r"0x[0-9a-fA-F]+|[0-9]+", value.strip()):
+        return int(value.strip(), 0 if value.strip().startswith("0x") else 10)
+    return None
+
+
+def dh_wire(value, group):
+    return value if group["small"] else hex(value)
+
+
+def dh_parameters(name, group):
+    if group["small"]:
+        return {"P": group["p"], "G": group["g"]}
+    return {"P": hex(group["p"]), "G": group["g"], "group": name, "bits": group["bits"]}
+
+
+def public_user(user):
+    return {k: user[k] for k in ("id", "email", "name", "subscription")}
+
+
+def handle_post(state, path, body):
+    """Dispatch one POST request; returns (status, json_body)"""
+    if path == "register":
+        email, password, name = body.get("email"), body.get("password"), body.get("name")
+        if not email or not password or not name:
+            return 400, {"error": "Missing required fields"}
+        with state.lock:
+            if email in state.users:
+                return 400, {"error": "User already exists"}
+            user = {
+                "id": state.next_id(),
+                "email": email,
+                "password": hash_password(password),
+                "name": name,
+                "subscription": "free",
+                "createdAt": datetime.now(timezone.utc).isoformat()
+            }
+            state.users[email] = user
+        return 200, {"user": public_user(user), "token": state.create_token(user)}
+
+    if path == "login":
+        email, password = body.get("email"), body.get("password")
+        if not email or not password:
+            return 400, {"error": "Missing email or password"}
+        user = state.users.get(email)
+        if not user or user["password"] != hash_password(password):
+            return 401, {"error": "Invalid credentials"}
+        return 200, {"user": public_user(user), "token": state.create_token(user)}
+
+    if path == "verify":
+        token = body.get("token")
+        if not token:
+            return 400, {"error": "Token required"}
+        return 200, state.verify_token(token)
+
+    if path == "verify/batch":
+        tokens = body.get("tokens")
+        if not isinstance(tokens, list):
+            return 400, {"error": "Tokens array required"}
+        if len(tokens) > MAX_VERIFY_BATCH:
+            return 400, {"error": f"Batch too large (max {MAX_VERIFY_BATCH} tokens)"}
+        seen = {}
+        results = []
+        for token in tokens:
+            if not isinstance(token, str) or not token:
+                results.append({"valid": False, "error": "Token required"})
+                continue
+            if token not in seen:
+                seen[token] = state.verify_token(token)
+            results.append(seen[token])
+        return 200, {"results": results}
+
+    if path == "payment":
+        token, tier, method = body.get("token"), body.get("tier"), body.get("paymentMethod")
+        if not token or not tier:
+            return 400, {"error": "Token and tier required"}
+        verification = state.verify_token(token)
+        if not verification["valid"]:
+            return 401, {"error": "Invalid token"}
+        if method == "stripe":
+            return 400, {"error": "Stripe not configured. Please use demo payment."}
+        if method != "demo":
+            return 400, {"error": "Invalid payment method"}
+        with state.lock:
+            user = state.users.get(verification["payload"]["email"])
+            if user is None:
+                return 500, {"error": "Internal server error: user not found"}
+            user["subscription"] = tier
+        return 200, {
+            "success": True,
+            "message": "Demo payment successful",
+            "subscription": tier,
+            "token": state.create_token(user)
+        }
+
+    if path == "dh/generate":
+        group = DH_GROUPS.get(body.get("group") or DH_DEFAULT_GROUP)
+        if group is None:
+            return 400, {"error": "Unknown DH group"}
+        if group["small"]:
+            private_key = state.rng.randrange(2, group["p"])
+        else:
+            private_key = state.rng.getrandbits(256) | (1 << 255)
+        return 200, {
+            "publicKey": dh_wire(pow(group["g"], private_key, group["p"]), group),
+            "parameters": dh_parameters(body.get("group") or DH_DEFAULT_GROUP, group)
+        }
+
+    if path == "dh/shared-secret":
+        private_key, other_public_key = body.get("privateKey"), body.get("otherPublicKey")
+        if private_key is None or other_public_key is None:
+            return 400, {"error": "privateKey and otherPublicKey required"}
+        group = DH_GROUPS.get(body.get("group") or DH_DEFAULT_GROUP)
+        if group is None:
+            return 400, {"error": "Unknown DH group"}
+        exponent, other = dh_value(private_key), dh_value(other_public_key)
+        for raw, value in ((private_key, exponent), (other_public_key, other)):
+            if value is None:
+                return 400, {"error": f"Invalid DH value: {raw}"}
+        if exponent < 1:
+            return 400, {"error": "Invalid private key"}
+        if not group["small"] and not 1 < other < group["p"] - 1:
+            return 400, {"error": "Invalid public key"}
+        secret = pow(other, exponent, group["p"])
+        return 200, {"sharedSecret": dh_wire(secret, group)}
+
+    return 404, {"error": "Endpoint not found"}
+
+
+def make_handler(state):
+    class StandinHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def log_message(self, format, *args):
+            pass
+
+        def _route(self):
+            path = self.path.split("?", 1)[0].strip("/")
+            return path[len("api/"):] if path.startswith("api/") else path
+
+        def _send(self, status, data, close=False):
+            raw = json.dumps(data).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(raw)))
+            if close:
+                # Also tells the server to drop the connection after this response
+                self.send_header("Connection", "close")
+            self.end_headers()
+            self.wfile.write(raw)
+
+        def _simulate(self):
+            """Apply injected latency; returns True when this request should fail"""
+            delay = state.latency_ms
+            if state.jitter_ms:
+                delay += state.rng.uniform(0, state.jitter_ms)
+            if delay > 0:
+                time.sleep(delay / 1000.0)
+            return state.failure_rate > 0 and state.rng.random() < state.failure_rate
+
+        def do_POST(self):
+            route = self._route()
+            length = int(self.headers.get("Content-Length") or 0)
+            # Same checks and order as the API route: headers first, then the body
+            if route in MAX_BODY and length:
+                if "application/json" not in (self.headers.get("Content-Type") or ""):
+                    # Unread, so the body can't be told apart from the next request
+                    return self._send(415, {"error": "Content-Type must be application/json"},
+                                      close=True)
+                if length > MAX_BODY[route]:
+                    return self._send(413, {"error": f"Request body too large "
+                                                     f"(max {MAX_BODY[route]} bytes)"}, close=True)
+            raw = self.rfile.read(length) if length else b""
+            if self._simulate():
+                return self._send(500, {"error": "Internal server error: injected failure"})
+            body = {}
+            if route in MAX_BODY and raw:
+                try:
+                    body = json.loads(raw.decode())
+                except ValueError:
+                    return self._send(400, {"error": "Request body is not valid JSON"})
+            try:
+                status, data = handle_post(state, route, body)
+            except Exception as e:
+                status, data = 500, {"error": f"Internal server error: {e}"}
+            self._send(status, data)
+
+        def do_GET(self):
+            if self._simulate():
+                return self._send(500, {"error": "Internal server error: injected failure"})
+            if self._route() == "health":
+                return self._send(200, {"status": "ok"})
+            self._send(405, {"error": "Method not allowed"})
+
+    return StandinHandler
+
+
+class StandinServer:
+    """Threaded stand-in server that can run in the background of a test process"""
+
+    def __init__(self, host="127.0.0.1", port=0, latency_ms=0.0, jitter_ms=0.0,
+                 failure_rate=0.0, seed=None, users_file=None):
+        self.state = StandinState(latency_ms, jitter_ms, failure_rate, seed)
+        if users_file:
+            self.state.load_users(users_file)
+        self.httpd = ThreadingHTTPServer((host, port), make_handler(self.state))
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/api"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline stand-in for the token API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=3001)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="fixed delay per request")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="extra uniform random delay")
+    parser.add_argument("--failure-rate", type=float, default=0.0,
+                        help="fraction of requests answered with HTTP 500")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--users-file", help="load users from a users.json (e.g. from gen_users.py)")
+    args = parser.parse_args(argv)
+
+    server = StandinServer(args.host, args.port, args.latency_ms, args.jitter_ms,
+                           args.failure_rate, args.seed, args.users_file)
+    print(f"Stand-in API listening on {server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Capture tests: passwords and tokens never reach a traffic capture file
+"""
+
+import json
+
+import requests
+
+import traffic
+from standin_server import StandinServer
+
+PASSWORD = "hunter2-secret"
+
+
+def read_capture(path):
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    return text, [json.loads(line) for line in text.splitlines()]
+
+
+def test_redact_keeps_shape():
+    body = {"email": "a@example.com", "password": PASSWORD, "tokens": ["t1", "t2", "t3"],
+            "nested": {"token": "t4"}, "tier": "basic"}
+    assert traffic.redact(body) == {
+        "email": "a@example.com",
+        "password": traffic.REDACTED,
+        "tokens": [traffic.REDACTED] * 3,
+        "nested": {"token": traffic.REDACTED},
+        "tier": "basic",
+    }
+
+
+def test_recorder_never_writes_secrets(tmp_path):
+    path = tmp_path / "capture.jsonl"
+    with traffic.TrafficRecorder(path) as recorder:
+        recorder.record("POST", "login", {"email": "a@example.com", "password": PASSWORD}, 200)
+        recorder.record("POST", "verify", {"token": "live-token-value"}, 200)
+    text, entries = read_capture(path)
+    assert PASSWORD not in text and "live-token-value" not in text
+    assert entries[0]["body"]["email"] == "a@example.com"
+
+
+def test_proxy_and_session_captures_hold_no_secrets(tmp_path):
+    with StandinServer() as server:
+        proxy_path = tmp_path / "proxy.jsonl"
+        with traffic.CaptureProxy(server.base_url, proxy_path) as proxy:
+            session = requests.Session()
+            token = session.post(f"{proxy.base_url}/login", json={
+                "email": "test@example.com", "password": "password123"}).json()["token"]
+            session.post(f"{proxy.base_url}/verify/batch", json={"tokens": [token, token]})
+
+        session_path = tmp_path / "session.jsonl"
+        with traffic.TrafficRecorder(session_path) as recorder:
+            session = recorder.attach(requests.Session())
+            session.post(f"{server.base_url}/register", json={
+                "email": "new@example.com", "password": PASSWORD, "name": "New"})
+            session.post(f"{server.base_url}/verify", json={"token": token})
+
+    for path, secrets in ((proxy_path, ("password123", token)), (session_path, (PASSWORD, token))):
+        text, entries = read_capture(path)
+        assert len(entries) == 2
+        for secret in secrets:
+            assert secret not in text
+    _, entries = read_capture(proxy_path)
+    assert entries[1]["body"]["tokens"] == [traffic.REDACTED] * 2
+
+
+def test_replay_logs_in_with_replay_credentials():
+    rewriter = traffic.BodyRewriter(token="fresh", credentials=("user@example.com", "pw"))
+    captured = traffic.redact({"email": "someone@example.com", "password": PASSWORD})
+    assert rewriter("login", captured, 200) == {"email": "user@example.com", "password": "pw"}
+    # Failed logins stay failed
+    assert rewriter("login", captured, 401)["password"] == traffic.REDACTED
@@ -0,0 +1,676 @@
+#!/usr/bin/env python3
+"""
+Offline codec for JWT-like Token System tokens
+Decodes and verifies v1 ('CUSTOM') and compact v2 ('CUSTOM2') tokens exactly as
+lib/token.js does, without the Node app: group substitution headers, Vigenère
+payloads over the ALPHABET table, transposed v1 signatures and truncated
+HMAC-SHA256 v2 signatures. verify_tokens() checks many tokens at once with
+vectorized table lookups (NumPy when installed), and audit_logs() streams log
+files through a process pool.
+"""
+
+import argparse
+import base64
+import binascii
+import hashlib
+import hmac
+import json
+import math
+import os
+import re
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from operator import itemgetter
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+ALPHABET = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789 .,;:!?-_"
+TOKEN_ALG_V1 = "CUSTOM"
+TOKEN_ALG_V2 = "CUSTOM2"
+DEFAULT_VIGENERE_KEY = "SECRETKEY"
+DEFAULT_TRANSPOSITION_KEY = "34152"
+
+COMPACT_HEADERS = {"c2": {"alg": TOKEN_ALG_V2, "typ": "JWT"}}
+SIGNATURE_BYTES = 16
+PAD = "X"
+PAD_BYTE = ord(PAD)
+
+SUBSTITUTION_MAP = {
+    "A": "Z+ZZ", "B": "Y+YY", "C": "X+XX", "D": "W+WW", "E": "V+VV",
+    "F": "U+UU", "G": "T+TT", "H": "S+SS", "I": "R+RR", "J": "Q+QQ",
+    "K": "P+PP", "L": "O+OO", "M": "N+NN", "N": "M+MM", "O": "L+LL",
+    "P": "K+KK", "Q": "J+JJ", "R": "I+II", "S": "H+HH", "T": "G+GG",
+    "U": "F+FF", "V": "E+EE", "W": "D+DD", "X": "C+CC", "Y": "B+BB",
+    "Z": "A+AA", "0": "9+99", "1": "8+88", "2": "7+77", "3": "6+66",
+    "4": "5+55", "5": "4+44", "6": "3+33", "7": "2+22", "8": "1+11",
+    "9": "0+00", " ": "_+__", ".": "-+--", ",": "*+**", ":": "#+##",
+    "{": "[+[[", "}": "]+]]", '"': "'+'''", "a": "z+zz", "b": "y+yy",
+    "c": "x+xx", "d": "w+ww", "e": "v+vv", "f": "u+uu", "g": "t+tt",
+    "h": "s+ss", "i": "r+rr", "j": "q+qq", "k": "p+pp", "l": "o+oo",
+    "m": "n+nn", "n": "m+mm", "o": "l+ll", "p": "k+kk", "q": "j+jj",
+    "r": "i+ii", "s": "h+hh", "t": "g+gg", "u": "f+ff", "v": "e+ee",
+    "w": "d+dd", "x": "c+cc", "y": "b+bb", "z": "a+aa",
+}
+# Every group starts with a distinct character
+DECODE_BY_LEAD = {group[0]: char for char, group in SUBSTITUTION_MAP.items()}
+
+# Tokens as they appear in logs: v2, then v1 (standard base64, no padding)
+TOKEN_RE = re.compile(
+    r"(?<![\w+/.-])(?:c2\.[A-Za-z0-9_-]*\.[A-Za-z0-9_-]{22}"
+    r"|[A-Za-z0-9+/]{16,}\.[A-Za-z0-9+/]{16,}\.[A-Za-z0-9+/]{16,})(?![\w+/.-])"
+)
+
+_BASE64_CHARS = re.compile(r"[^A-Za-z0-9+/_-]+")
+_URL_TO_STD = str.maketrans("-_", "+/")
+_JS_NUMBER = re.compile(r"[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?")
+_JS_WHITESPACE = " \t\n\r\v\f\u00a0\u1680\u2000\u2001\u2002\u2003\u2004\u2005\u2006\u2007\u2008\u2009\u200a\u2028\u2029\u202f\u205f\u3000\ufeff"
+
+
+class TokenDecryptionError(ValueError):
+    """A token part that lib/token.js would throw on (reported, not raised, by verify)"""
+
+
+# --- Node/JS compatibility ---------------------------------------------------
+
+def node_base64_decode(text):
+    """Buffer.from(text, 'base64') semantics: both alphabets, junk skipped, stop at '='"""
+    if len(text) % 4 != 1:
+        # Well-formed standard base64 (the usual case) decodes the same either way
+        try:
+            return binascii.a2b_base64(text + "=" * (-len(text) % 4), strict_mode=True)
+        except binascii.Error:
+            pass
+    end = text.find("=")
+    if end != -1:
+        text = text[:end]
+    text = _BASE64_CHARS.sub("", text)
+    if "-" in text or "_" in text:
+        text = text.translate(_URL_TO_STD)
+    remainder = len(text) % 4
+    if remainder == 1:
+        text = text[:-1]
+    elif remainder:
+        text += "=" * (4 - remainder)
+    return binascii.a2b_base64(text)
+
+
+def base64url(data):
+    """base64url without padding, like Buffer#toString('base64url')"""
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def js_utf8(text):
+    """TextEncoder: UTF-8, with lone surrogates replaced by U+FFFD"""
+    try:
+        return text.encode("utf-8")
+    except UnicodeEncodeError:
+        units = text.encode("utf-16-le", "surrogatepass")
+        return units.decode("utf-16-le", "replace").encode("utf-8")
+
+
+def _utf16_units(text):
+    """A string as JS sees it: one item per UTF-16 code unit"""
+    if text.isascii():
+        return text
+    data = text.encode("utf-16-le", "surrogatepass")
+    return [chr(int.from_bytes(data[i:i + 2], "little")) for i in range(0, len(data), 2)]
+
+
+def _from_utf16_units(units):
+    if isinstance(units, str):
+        return units
+    data = b"".join(ord(unit).to_bytes(2, "little") for unit in units)
+    return data.decode("utf-16-le", "surrogatepass")
+
+
+def _reject_constant(name):
+    raise ValueError(f"Unexpected token {name!r}, not valid JSON")
+
+
+_json_decoder = json.JSONDecoder(parse_constant=_reject_constant)
+
+
+def parse_json(text):
+    """JSON.parse: like json.loads but without NaN and Infinity"""
+    return _json_decoder.decode(text)
+
+
+def _js_to_number(value):
+    """Number(value) for the JSON types a payload field can hold"""
+    if value is None:
+        return 0.0
+    if isinstance(value, bool):
+        return 1.0 if value else 0.0
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, list):
+        return _js_to_number(",".join("" if item is None else _js_to_string(item) for item in value))
+    if isinstance(value, dict):
+        return math.nan
+    text = value.strip(_JS_WHITESPACE)
+    if not text:
+        return 0.0
+    if text in ("Infinity", "+Infinity"):
+        return math.inf
+    if text == "-Infinity":
+        return -math.inf
+    prefix = text[:2].lower()
+    if prefix in ("0x", "0o", "0b"):
+        try:
+            return float(int(text[2:], {"0x": 16, "0o": 8, "0b": 2}[prefix]))
+        except ValueError:
+            return math.nan
+    if _JS_NUMBER.fullmatch(text):
+        return float(text)
+    return math.nan
+
+
+def _js_to_string(value):
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, list):
+        return ",".join("" if item is None else _js_to_string(item) for item in value)
+    if isinstance(value, dict):
+        return "[object Object]"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _js_truthy(value):
+    if isinstance(value, (list, dict)):
+        return True
+    if isinstance(value, float) and math.isnan(value):
+        return False
+    return bool(value)
+
+
+def is_expired(payload, now):
+    """payload.exp && payload.exp < now, with JS truthiness and coercion"""
+    if payload is None:
+        raise TokenDecryptionError("Cannot read properties of null (reading 'exp')")
+    exp = payload.get("exp") if isinstance(payload, dict) else None
+    return _js_truthy(exp) and _js_to_number(exp) < now
+
+
+# --- Ciphers -----------------------------------------------------------------
+
+def group_substitution_decrypt(ciphertext):
+    """Inverse of lib/crypto/groupSubstitution.js encrypt"""
+    decrypted = []
+    for group in ciphertext.split("|"):
+        candidate = DECODE_BY_LEAD.get(group[:1])
+        if candidate is not None and SUBSTITUTION_MAP[candidate] == group:
+            decrypted.append(candidate)
+        else:
+            # Unmapped groups: everything before the first +
+            decrypted.append(group.partition("+")[0])
+    return "".join(decrypted)
+
+
+class Vigenere:
+    """Vigenère over ALPHABET for one key; the key advances on alphabet characters only"""
+
+    def __init__(self, key=DEFAULT_VIGENERE_KEY):
+        self.key = key
+        # JS upper-cases each UTF-16 unit; characters outside ALPHABET shift by -1
+        self.shifts = [ALPHABET.find(unit.upper()) for unit in _utf16_units(key)]
+        n = len(ALPHABET)
+        self.tables = []
+        for shift in self.shifts:
+            table = bytearray(range(256))
+            for index, char in enumerate(ALPHABET):
+                table[ord(char)] = ord(ALPHABET[(index - shift) % n])
+            self.tables.append(bytes(table))
+        self.char_maps = [{char: chr(table[ord(char)]) for char in ALPHABET} for table in self.tables]
+        self.matrix = None
+        if np is not None and self.tables:
+            self.matrix = np.frombuffer(b"".join(self.tables), dtype=np.uint8).reshape(len(self.tables), 256)
+
+    def _check_key(self, has_alphabet):
+        if not self.shifts and has_alphabet:
+            # lib/crypto/vigenere.js reads key[NaN] and throws
+            raise TokenDecryptionError("Cannot read properties of undefined (reading 'toUpperCase')")
+
+    def decrypt(self, ciphertext):
+        """Decrypt a string; non-alphabet characters pass through unchanged"""
+        maps = self.char_maps
+        out = []
+        position = 0
+        for char in ciphertext:
+            if char in ALPHABET_SET:
+                if not maps:
+                    self._check_key(True)
+                out.append(maps[position][char])
+                position += 1
+                if position == len(maps):
+                    position = 0
+            else:
+                out.append(char)
+        return "".join(out)
+
+    def decrypt_bytes(self, data):
+        """Decrypt UTF-8 bytes; bytes >= 0x80 never change or advance the key, so
+        this equals decrypting the decoded string"""
+        return self.decrypt(data.decode("latin-1")).encode("latin-1")
+
+    def decrypt_many(self, items):
+        """Decrypt a list of byte strings in one vectorized pass"""
+        if self.matrix is None or not items:
+            return [self.decrypt_bytes(item) for item in items]
+        lengths = np.fromiter((len(item) for item in items), dtype=np.int64, count=len(items))
+        flat = np.frombuffer(b"".join(items), dtype=np.uint8)
+        if flat.size == 0:
+            return [b""] * len(items)
+        is_alpha = ALPHABET_MASK[flat]
+        # Key position of each character: alphabet characters before it in its own item
+        before = np.cumsum(is_alpha, dtype=np.int64) - is_alpha
+        starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        first = before[np.minimum(starts, flat.size - 1)]
+        position = (before - np.repeat(first, lengths)) % len(self.tables)
+        out = self.matrix[position, flat].tobytes()
+        results = []
+        offset = 0
+        for length in lengths.tolist():
+            results.append(out[offset:offset + length])
+            offset += length
+        return results
+
+
+ALPHABET_SET = frozenset(ALPHABET)
+ALPHABET_MASK = None
+if np is not None:
+    ALPHABET_MASK = np.zeros(256, dtype=bool)
+    ALPHABET_MASK[[ord(char) for char in ALPHABET]] = True
+
+
+# Decrypt plans depend only on the column ranks and the length. They are cached
+# at module level, keyed on both, so instances share them without the caches
+# holding the instances alive.
+
+@lru_cache(maxsize=256)
+def _plan(rank, length):
+    num_cols = len(rank)
+    num_rows = -(-length // num_cols)
+    perm = []
+    for row in range(num_rows):
+        for col in range(num_cols):
+            src = rank[col] * num_rows + row
+            perm.append(src if src < length else -1)
+    return perm, len(perm) - num_cols
+
+
+@lru_cache(maxsize=256)
+def _getters(rank, length):
+    perm, last_row_start = _plan(rank, length)
+    head = [src for src in perm[:last_row_start] if src >= 0]
+    tail = [src for src in perm[last_row_start:] if src >= 0]
+    getter = itemgetter(*head) if len(head) > 1 else (lambda s, i=head: tuple(s[j] for j in i))
+    return getter, tail
+
+
+@lru_cache(maxsize=256)
+def _head_index(rank, length):
+    perm, last_row_start = _plan(rank, length)
+    return np.array([src for src in perm[:last_row_start] if src >= 0], dtype=np.intp)
+
+
+class Transposition:
+    """Columnar transposition decrypt for one all-digit key, with the 'X' padding rules of lib/crypto/transposition.js"""
+
+    def __init__(self, key=DEFAULT_TRANSPOSITION_KEY):
+        if not key.isascii() or not key.isdigit():
+            # The JS cipher sorts NaN column numbers here, which is implementation-defined
+            raise ValueError("transposition key must be ASCII digits")
+        self.key = key
+        columns = sorted(range(len(key)), key=lambda idx: int(key[idx]))
+        rank = [0] * len(key)
+        for position, col in enumerate(columns):
+            rank[col] = position
+        self.rank = tuple(rank)
+
+    def plan(self, length):
+        """For a ciphertext length: (source index per grid cell, row-major, or -1; first last-row cell)"""
+        return _plan(self.rank, length)
+
+    def _getters(self, length):
+        return _getters(self.rank, length)
+
+    def decrypt(self, ciphertext):
+        """Decrypt a string, counting in UTF-16 code units like JS"""
+        units = _utf16_units(ciphertext)
+        getter, tail = self._getters(len(units))
+        # Padding is dropped from the last row only, then trailing padding
+        text = "".join(getter(units)) + "".join(units[src] for src in tail if units[src] != PAD)
+        return _from_utf16_units(text.rstrip(PAD))
+
+    def matches_many(self, signatures, expected):
+        """For ASCII byte strings of one length: decrypt(signature) == expected, vectorized.
+
+        Rows above the last are a fixed gather compared in bulk; only last-row
+        cells can be dropped as padding, so the short tail is checked per token.
+        """
+        getter, tail = self._getters(len(signatures[0]))
+        head = self._head_index(len(signatures[0]))
+        width = len(head)
+        grid = np.frombuffer(b"".join(signatures), dtype=np.uint8).reshape(len(signatures), -1)
+        matches = [False] * len(signatures)
+        # Shorter expectations can only match through trailing-'X' trimming of the head
+        long_enough = [i for i, data in enumerate(expected) if len(data) >= width]
+        short = [i for i, data in enumerate(expected) if len(data) < width]
+        if long_enough:
+            heads = grid[long_enough][:, head]
+            want = np.frombuffer(b"".join(expected[i][:width] for i in long_enough),
+                                 dtype=np.uint8).reshape(len(long_enough), width)
+            head_ok = (heads == want).all(axis=1).tolist()
+            for i, ok in zip(long_enough, head_ok):
+                if not ok:
+                    continue
+                signature = signatures[i]
+                rest = bytes(signature[src] for src in tail if signature[src] != PAD_BYTE)
+                if rest:
+                    matches[i] = expected[i][width:] == rest
+                else:
+                    matches[i] = len(expected[i]) == width and not expected[i].endswith(b"X")
+        for i in short:
+            matches[i] = self.decrypt(signatures[i].decode("ascii")).encode("ascii") == expected[i]
+        return matches
+
+    def _head_index(self, length):
+        return _head_index(self.rank, length)
+
+
+# --- Tokens ------------------------------------------------------------------
+
+def decode_header(encoded_header):
+    """Header dict of a token's first part (raises on undecodable headers)"""
+    compact = COMPACT_HEADERS.get(encoded_header)
+    if compact is not None:
+        return dict(compact)
+    header_str = group_substitution_decrypt(node_base64_decode(encoded_header).decode("utf-8", "replace"))
+    return parse_json(header_str)
+
+
+class TokenCodec:
+    """Decode and verify tokens for one key pair; keeps the per-key tables and HMAC"""
+
+    def __init__(self, vigenere_key=DEFAULT_VIGENERE_KEY, transposition_key=DEFAULT_TRANSPOSITION_KEY):
+        self.vigenere_key = vigenere_key
+        self.transposition_key = transposition_key
+        self.vigenere = Vigenere(vigenere_key)
+        self.transposition = Transposition(transposition_key)
+        self.mac = hmac.new(js_utf8(vigenere_key + "\u0000" + transposition_key), digestmod=hashlib.sha256)
+
+    def sign(self, data):
+        """v2 signature of 'c2.<payload>'"""
+        mac = self.mac.copy()
+        mac.update(js_utf8(data))
+        return base64url(mac.digest()[:SIGNATURE_BYTES])
+
+    def decode(self, token):
+        """Like decodeToken in lib/token.js: {header, payload, signature} or {error}"""
+        try:
+            parts = token.split(".")
+            if len(parts) != 3:
+                return {"error": "Invalid token format"}
+            encoded_header, encoded_payload, signature = parts
+            header = decode_header(encoded_header)
+            payload_bytes = self.vigenere.decrypt_bytes(node_base64_decode(encoded_payload))
+            payload = parse_json(payload_bytes.decode("utf-8", "replace"))
+            return {"header": header, "payload": payload, "signature": signature}
+        except Exception as e:
+            return {"error": f"Failed to decode token: {e}"}
+
+    def verify(self, token, now=None):
+        """Like verifyToken in lib/token.js: {valid: True, payload} or {valid: False, error}"""
+        return self.verify_many([token], now=now)[0]
+
+    def verify_many(self, tokens, now=None, vectorized=True):
+        """Verify a batch; results in input order. Ciphers run once across the
+        whole batch when NumPy is available and `vectorized` is set."""
+        now = int(time.time()) if now is None else now
+        vectorized = vectorized and np is not None
+        results = [None] * len(tokens)
+        passed = []          # (index, payload bytes) with a good signature
+        v1_ascii = {}        # signature length -> [(index, signature, expected)]
+
+        for i, token in enumerate(tokens):
+            try:
+                parts = token.split(".")
+            except AttributeError:
+                results[i] = {"valid": False, "error": "Token decryption failed: token is not a string"}
+                continue
+            if len(parts) != 3:
+                results[i] = {"valid": False, "error": "Invalid token format"}
+                continue
+            encoded_header, encoded_payload, signature = parts
+
+            if encoded_header in COMPACT_HEADERS:
+                if signature != self.sign(encoded_header + "." + encoded_payload):
+                    results[i] = {"valid": False, "error": "Invalid signature"}
+                else:
+                    passed.append((i, node_base64_decode(encoded_payload)))
+                continue
+
+            expected = encoded_header + "." + encoded_payload
+            signature_bytes = node_base64_decode(signature)
+            if vectorized and signature_bytes and signature_bytes.isascii() and expected.isascii():
+                v1_ascii.setdefault(len(signature_bytes), []).append((i, signature_bytes, expected))
+                continue
+            decrypted = self.transposition.decrypt(signature_bytes.decode("utf-8", "replace"))
+            if decrypted != expected:
+                results[i] = {"valid": False, "error": "Invalid signature"}
+            else:
+                passed.append((i, node_base64_decode(encoded_payload)))
+
+        for group in v1_ascii.values():
+            matches = self.transposition.matches_many([item[1] for item in group],
+                                                      [item[2].encode("ascii") for item in group])
+            for (i, _, expected), match in zip(group, matches):
+                if match:
+                    passed.append((i, node_base64_decode(expected.split(".")[1])))
+                else:
+                    results[i] = {"valid": False, "error": "Invalid signature"}
+
+        payloads = [data for _, data in passed]
+        if vectorized and self.vigenere.shifts:
+            decrypted = self.vigenere.decrypt_many(payloads)
+        else:
+            decrypted = [None] * len(payloads)
+        for (i, data), plain in zip(passed, decrypted):
+            try:
+                if plain is None:
+                    self.vigenere._check_key(_has_alphabet(data))
+                    plain = self.vigenere.decrypt_bytes(data)
+                payload = parse_json(plain.decode("utf-8", "replace"))
+                if is_expired(payload, now):
+                    results[i] = {"valid": False, "error": "Token expired"}
+                else:
+                    results[i] = {"valid": True, "payload": payload}
+            except Exception as e:
+                results[i] = {"valid": False, "error": f"Token decryption failed: {e}"}
+        return results
+
+
+def _has_alphabet(data):
+    return any(byte < 128 and chr(byte) in ALPHABET_SET for byte in data)
+
+
+@lru_cache(maxsize=32)
+def get_codec(vigenere_key=DEFAULT_VIGENERE_KEY, transposition_key=DEFAULT_TRANSPOSITION_KEY):
+    return TokenCodec(vigenere_key, transposition_key)
+
+
+def decode_token(token, vigenere_key=DEFAULT_VIGENERE_KEY):
+    """Decode without verifying (decodeToken in lib/token.js)"""
+    return get_codec(vigenere_key).decode(token)
+
+
+def verify_token(token, vigenere_key=DEFAULT_VIGENERE_KEY, transposition_key=DEFAULT_TRANSPOSITION_KEY, now=None):
+    """Verify one token (verifyToken in lib/token.js)"""
+    return get_codec(vigenere_key, transposition_key).verify(token, now=now)
+
+
+def verify_tokens(tokens, vigenere_key=DEFAULT_VIGENERE_KEY, transposition_key=DEFAULT_TRANSPOSITION_KEY,
+                  now=None, vectorized=True):
+    """Verify many tokens at once; results in input order"""
+    return get_codec(vigenere_key, transposition_key).verify_many(list(tokens), now=now, vectorized=vectorized)
+
+
+# --- Log auditing ------------------------------------------------------------
+
+def _classify(result):
+    if result["valid"]:
+        return "valid"
+    error = result["error"]
+    return "decryption_failed" if error.startswith("Token decryption failed") else \
+        error.lower().replace(" ", "_")
+
+
+def _audit_tokens(tokens, vigenere_key, transposition_key, now, samples):
+    """Verify one chunk of tokens and summarise it (runs in a worker process)"""
+    summary = {"tokens": len(tokens), "outcomes": Counter(), "formats": Counter(),
+               "tiers": Counter(), "invalid_samples": []}
+    results = verify_tokens(tokens, vigenere_key, transposition_key, now=now)
+    for token, result in zip(tokens, results):
+        outcome = _classify(result)
+        summary["outcomes"][outcome] += 1
+        summary["formats"]["v2" if token.startswith("c2.") else "v1"] += 1
+        if result["valid"]:
+            payload = result["payload"]
+            if isinstance(payload, dict):
+                summary["tiers"][str(payload.get("subscription"))] += 1
+        elif len(summary["invalid_samples"]) < samples:
+            summary["invalid_samples"].append({"token": token[:80], "error": result["error"]})
+    return summary
+
+
+def _audit_range(path, start, end, vigenere_key, transposition_key, now, batch_size, samples):
+    """Verify tokens in the lines that start inside [start, end) of a plain file"""
+    total = None
+    with open(path, "rb") as f:
+        if start > 0:
+            # The line holding byte start - 1 belongs to the previous range
+            f.seek(start - 1)
+            f.readline()
+        batch = []
+        position = f.tell()
+        while position < end:
+            line = f.readline()
+            if not line:
+                break
+            position += len(line)
+            batch.extend(TOKEN_RE.findall(line.decode("utf-8", "replace")))
+            if len(batch) >= batch_size:
+                total = _merge(total, _audit_tokens(batch, vigenere_key, transposition_key, now, samples))
+                batch = []
+        if batch or total is None:
+            total = _merge(total, _audit_tokens(batch, vigenere_key, transposition_key, now, samples))
+    return total
+
+
+def _merge(total, summary, samples=5):
+    if total is None:
+        return summary
+    total["tokens"] += summary["tokens"]
+    for key in ("outcomes", "formats", "tiers"):
+        total[key].update(summary[key])
+    room = samples - len(total["invalid_samples"])
+    total["invalid_samples"].extend(summary["invalid_samples"][:max(room, 0)])
+    return total
+
+
+def _iter_gz_batches(path, batch_size):
+    import gzip
+    with gzip.open(path, "rt", encoding="utf-8", errors="replace") as f:
+        batch = []
+        for line in f:
+            batch.extend(TOKEN_RE.findall(line))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+def audit_logs(paths, workers=None, vigenere_key=DEFAULT_VIGENERE_KEY,
+               transposition_key=DEFAULT_TRANSPOSITION_KEY, now=None,
+               chunk_bytes=16 * 1024 * 1024, batch_size=20000, samples=5):
+    """Find and verify every token in the given log files across a process pool.
+
+    Plain files are split into byte ranges that workers read themselves; .gz
+    files are read here and shipped to workers in batches. Returns a summary
+    dict with outcome, format and tier counts plus a few invalid samples.
+    """
+    now = int(time.time()) if now is None else now
+    workers = workers or os.cpu_count() or 1
+    started = time.perf_counter()
+    total = None
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = []
+        for path in paths:
+            if str(path).endswith(".gz"):
+                for batch in _iter_gz_batches(path, batch_size):
+                    futures.append(pool.submit(_audit_tokens, batch, vigenere_key, transposition_key, now, samples))
+                continue
+            size = os.path.getsize(path)
+            for start in range(0, max(size, 1), chunk_bytes):
+                futures.append(pool.submit(_audit_range, path, start, min(start + chunk_bytes, size),
+                                           vigenere_key, transposition_key, now, batch_size, samples))
+        for future in futures:
+            total = _merge(total, future.result(), samples)
+    if total is None:
+        total = _audit_tokens([], vigenere_key, transposition_key, now, samples)
+    total["elapsed_s"] = time.perf_counter() - started
+    total["tokens_per_s"] = total["tokens"] / total["elapsed_s"] if total["elapsed_s"] else 0.0
+    return total
+
+
+def print_audit_report(summary):
+    """Print token counts by outcome, format and tier"""
+    print(f"🔍 Verified {summary['tokens']} tokens in {summary['elapsed_s']:.2f}s "
+          f"({summary['tokens_per_s'] * 60 / 1e6:.2f}M tokens/min)")
+    for title, key in (("Outcome", "outcomes"), ("Format", "formats"), ("Tier (valid tokens)", "tiers")):
+        print(f"\n{title}:")
+        for name, count in summary[key].most_common():
+            print(f"  {name:<24}{count:>12}")
+    if summary["invalid_samples"]:
+        print("\nInvalid samples:")
+        for sample in summary["invalid_samples"]:
+            print(f"  {sample['token']}...  {sample['error']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Decode, verify and audit tokens offline")
+    parser.add_argument("logs", nargs="*", help="log files to scan for tokens (.gz ok)")
+    parser.add_argument("--token", action="append", default=[], help="verify and decode a single token")
+    parser.add_argument("--vigenere-key", default=DEFAULT_VIGENERE_KEY)
+    parser.add_argument("--transposition-key", default=DEFAULT_TRANSPOSITION_KEY)
+    parser.add_argument("--now", type=int, help="Unix time to check expiry against (default: now)")
+    parser.add_argument("--workers", type=int, help="worker processes for log audits (default: CPU count)")
+    parser.add_argument("--json", dest="json_out", help="write the audit summary as JSON to this file")
+    args = parser.parse_args(argv)
+    if not args.logs and not args.token:
+        parser.error("give log files or --token")
+
+    for token in args.token:
+        result = verify_token(token, args.vigenere_key, args.transposition_key, now=args.now)
+        decoded = decode_token(token, args.vigenere_key)
+        print(json.dumps({"verify": result, "decode": decoded}, indent=2, ensure_ascii=False))
+
+    if args.logs:
+        summary = audit_logs(args.logs, workers=args.workers, vigenere_key=args.vigenere_key,
+                             transposition_key=args.transposition_key, now=args.now)
+        print_audit_report(summary)
+        if args.json_out:
+            with open(args.json_out, "w") as f:
+                json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+"""
+Traffic capture and open-loop replay for the JWT-like Token System API
+Records request streams (endpoint, body, inter-arrival time) to JSONL and replays
+them on a fixed schedule, so a slow response never delays the requests behind it
+"""
+
+import gzip
+import heapq
+import itertools
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+import requests
+
+from loadgen import EndpointStats, LatencyHistogram, LoadResult, print_load_report
+
+# Sleep until this close to a send time, then spin for the rest
+SPIN_S = 0.001
+
+# Capture entries buffered by replay() to put them back in send order
+REORDER_WINDOW = 4096
+
+# Body fields never written to a capture; replay fills them in again
+SECRET_FIELDS = frozenset(("password", "token", "tokens"))
+REDACTED = "<redacted>"
+
+
+def _open(path, mode):
+    """Open a capture file as text; .gz paths are transparently compressed"""
+    if str(path).endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def _endpoint(url):
+    """API endpoint of a URL with its query string, e.g.
+    http://host/api/metrics?format=json -> metrics?format=json"""
+    parts = urlsplit(url)
+    path = parts.path.strip("/")
+    path = path[len("api/"):] if path.startswith("api/") else path
+    return path + (f"?{parts.query}" if parts.query else "")
+
+
+def _decode_body(raw):
+    if not raw:
+        return None
+    if isinstance(raw, bytes):
+        raw = raw.decode("utf-8", "replace")
+    try:
+        return json.loads(raw)
+    except ValueError:
+        return raw
+
+
+def redact(body):
+    """Copy of a request body with SECRET_FIELDS masked; list lengths are kept,
+    so a /verify/batch entry still records its batch size"""
+    if isinstance(body, dict):
+        return {key: _mask(value) if key in SECRET_FIELDS else redact(value)
+                for key, value in body.items()}
+    if isinstance(body, list):
+        return [redact(item) for item in body]
+    return body
+
+
+def _mask(value):
+    if isinstance(value, list):
+        return [REDACTED] * len(value)
+    return None if value is None else REDACTED
+
+
+class TrafficRecorder:
+    """Thread-safe JSONL writer; one line per request with its send-time offset.
+    Passwords and tokens are redacted before anything reaches the file."""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = _open(path, "w")
+        self.lock = threading.Lock()
+        self.start = time.monotonic()
+        self.count = 0
+
+    def record(self, method, endpoint, body, status=None, latency_ms=None, sent_at=None):
+        """Append one request; sent_at is a time.monotonic() timestamp (defaults to now)"""
+        sent_at = time.monotonic() if sent_at is None else sent_at
+        with self.lock:
+            entry = {
+                "t": round(max(0.0, sent_at - self.start), 6),
+                "method": method,
+                "endpoint": endpoint,
+                "body": redact(body),
+                "status": status,
+                "latency_ms": None if latency_ms is None else round(latency_ms, 3),
+            }
+            self.file.write(json.dumps(entry, separators=(",", ":")) + "\n")
+            self.count += 1
+
+    def attach(self, session):
+        """Record every request a requests.Session makes"""
+        def hook(response, *args, **kwargs):
+            elapsed = response.elapsed.total_seconds()
+            request = response.request
+            self.record(request.method, _endpoint(request.url), _decode_body(request.body),
+                        response.status_code, elapsed * 1000.0, time.monotonic() - elapsed)
+        session.hooks["response"].append(hook)
+        return session
+
+    def close(self):
+        with self.lock:
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def make_proxy_handler(upstream, recorder):
+    local = threading.local()
+
+    class CaptureHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def log_message(self, format, *args):
+            pass
+
+        def _forward(self, method):
+            sent_at = time.monotonic()
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length) if length else b""
+            endpoint = _endpoint(self.path)
+            url = f"{upstream}/{endpoint}"
+            headers = {k: v for k, v in self.headers.items()
+                       if k.lower() in ("content-type", "if-none-match", "accept")}
+            if not hasattr(local, "session"):
+                local.session = requests.Session()
+            try:
+                response = local.session.request(method, url, data=raw or None, headers=headers)
+                status, content = response.status_code, response.content
+                content_type = response.headers.get("Content-Type", "application/json")
+            except requests.RequestException as e:
+                status, content = 502, json.dumps({"error": f"Upstream error: {e}"}).encode()
+                content_type = "application/json"
+            recorder.record(method, endpoint, _decode_body(raw), status, (time.monotonic() - sent_at) * 1000.0, sent_at)
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+
+        def do_POST(self):
+            self._forward("POST")
+
+        def do_GET(self):
+            self._forward("GET")
+
+    return CaptureHandler
+
+
+class CaptureProxy:
+    """Recording reverse proxy: point real clients at it to capture their traffic"""
+
+    def __init__(self, upstream, path, host="127.0.0.1", port=0):
+        self.recorder = TrafficRecorder(path)
+        self.httpd = ThreadingHTTPServer((host, port), make_proxy_handler(upstream.rstrip("/"), self.recorder))
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/api"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.recorder.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def iter_capture(path):
+    """Lazily yield capture entries; only one line is held in memory at a time"""
+    with _open(path, "r") as f:
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                raise ValueError(f"{path}:{number}: not valid JSON")
+            if "endpoint" not in entry or "t" not in entry:
+                raise ValueError(f"{path}:{number}: missing 'endpoint' or 't'")
+            yield entry
+
+
+def _in_send_order(entries, window=REORDER_WINDOW):
+    """Yield entries by ascending t. Recorders write an entry when its response
+    arrives, so a capture is only out of order by about one response time; a
+    heap of `window` entries restores send order without reading the whole file"""
+    heap = []
+    for seq, entry in enumerate(entries):
+        heapq.heappush(heap, (float(entry["t"]), seq, entry))
+        if len(heap) > window:
+            yield heapq.heappop(heap)[2]
+    while heap:
+        yield heapq.heappop(heap)[2]
+
+
+class BodyRewriter:
+    """Keep replayed bodies meaningful: unique registration emails, a live
+    token for requests that succeeded at capture time (deliberately invalid
+    tokens are left alone), and working credentials for logins that did"""
+
+    def __init__(self, token=None, run_id=None, credentials=None):
+        self.token = token
+        self.run_id = run_id or int(time.time() * 1000)
+        self.credentials = credentials
+        self.seq = itertools.count()
+
+    def __call__(self, endpoint, body, status=None):
+        if not isinstance(body, dict):
+            return body
+        body = dict(body)
+        succeeded = status is None or status < 400
+        if self.token and succeeded:
+            if "token" in body:
+                body["token"] = self.token
+            if isinstance(body.get("tokens"), list):
+                body["tokens"] = [self.token] * len(body["tokens"])
+        if endpoint == "login" and self.credentials and succeeded:
+            body["email"], body["password"] = self.credentials
+        if endpoint == "register" and isinstance(body.get("email"), str):
+            body["email"] = f"replay{self.run_id}.{next(self.seq)}.{body['email']}"
+        return body
+
+
+# Account replay logs in with, since captured passwords are redacted
+REPLAY_CREDENTIALS = ("test@example.com", "password123")
+
+
+def fresh_token(base_url, email=REPLAY_CREDENTIALS[0], password=REPLAY_CREDENTIALS[1]):
+    """Log in once so replayed token-bearing requests carry a live token"""
+    try:
+        response = requests.post(f"{base_url}/login", json={"email": email, "password": password})
+        if response.status_code == 200:
+            return response.json().get("token")
+    except requests.RequestException:
+        pass
+    return None
+
+
+def _sleep_until(target):
+    """Sleep to within SPIN_S of a monotonic deadline, then spin to hit it precisely"""
+    while True:
+        remaining = target - time.monotonic()
+        if remaining <= 0:
+            return
+        if remaining > SPIN_S:
+            time.sleep(remaining - SPIN_S)
+
+
+class ReplayResult(LoadResult):
+    """Load result plus how far sends slipped behind the schedule"""
+
+    def __init__(self, workers, elapsed, stats, send_lag, scheduled):
+        super().__init__(workers, elapsed, stats)
+        self.send_lag = send_lag
+        self.scheduled = scheduled
+
+    def to_dict(self):
+        data = super().to_dict()
+        data["scheduled"] = self.scheduled
+        data["send_lag_ms"] = {
+            "mean": self.send_lag.mean(),
+            "p99": self.send_lag.percentile(99),
+            "max": self.send_lag.max_ms,
+        }
+        return data
+
+
+def replay(base_url, path, speed=1.0, rps=None, workers=64, rewrite=True, limit=None):
+    """Replay a capture open-loop against base_url.
+
+    Entries are replayed in send order, and each is due at
+    start + (t - earliest t) / speed (or start + i / rps when a fixed rate is
+    given) whether or not earlier requests have finished. Latency is
+    measured from that due time, so queueing behind a slow server shows up in
+    the tail instead of being hidden by a delayed send (coordinated omission).
+    """
+    base_url = base_url.rstrip("/")
+    rewriter = BodyRewriter(fresh_token(base_url), credentials=REPLAY_CREDENTIALS) if rewrite else None
+    local = threading.local()
+    stats_lock = threading.Lock()
+    stats = {}
+    send_lag = LatencyHistogram()
+    # Bounds memory when the server falls behind; late sends still count from their due time
+    in_flight = threading.BoundedSemaphore(workers * 4)
+
+    def send(entry, due):
+        try:
+            if not hasattr(local, "session"):
+                local.session = requests.Session()
+            method = entry.get("method") or "POST"
+            endpoint = entry["endpoint"]
+            body = entry.get("body")
+            if rewriter:
+                body = rewriter(endpoint, body, entry.get("status"))
+            lag = max(0.0, time.monotonic() - due) * 1000.0
+            status = None
+            try:
+                if method == "GET":
+                    response = local.session.get(f"{base_url}/{endpoint}")
+                else:
+                    response = local.session.post(f"{base_url}/{endpoint}", json=body)
+                status = response.status_code
+            except requests.RequestException:
+                pass
+            latency = (time.monotonic() - due) * 1000.0
+            name = endpoint if method == "POST" else f"{method} {endpoint}"
+            with stats_lock:
+                endpoint_stats = stats.setdefault(name, EndpointStats())
+                endpoint_stats.histogram.record(latency)
+                send_lag.record(lag)
+                if status is None or status >= 500:
+                    endpoint_stats.errors += 1
+                if status is not None:
+                    endpoint_stats.statuses[status] = endpoint_stats.statuses.get(status, 0) + 1
+        finally:
+            in_flight.release()
+
+    entries = _in_send_order(iter_capture(path))
+    if limit is not None:
+        entries = itertools.islice(entries, limit)
+
+    scheduled = 0
+    first_t = None
+    offset = 0.0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        start = time.monotonic()
+        for i, entry in enumerate(entries):
+            # The earliest send is time zero
+            if first_t is None:
+                first_t = float(entry["t"])
+            # An entry more than REORDER_WINDOW lines late is sent straight away
+            # rather than counted as lag against a time already passed
+            offset = i / rps if rps else max(offset, (float(entry["t"]) - first_t) / speed)
+            due = start + offset
+            _sleep_until(due)
+            in_flight.acquire()
+            pool.submit(send, entry, due)
+            scheduled += 1
+    elapsed = time.monotonic() - start
+    return ReplayResult(workers, elapsed, stats, send_lag, scheduled)
+
+
+def print_replay_report(result):
+    """Print per-endpoint latency (from scheduled send time) and schedule slip"""
+    print_load_report(result, title=f"REPLAY - {result.scheduled} requests, "
+                                    f"{result.users} workers, {result.elapsed:.2f}s")
+    print(f"Send lag behind schedule: mean {result.send_lag.mean():.2f} ms, "
+          f"p99 {result.send_lag.percentile(99):.2f} ms, max {result.send_lag.max_ms:.2f} ms")
+    print()